@@ -0,0 +1,431 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: benchmark.py
+Purpose: *Time every stage of the scraper and measure its peak memory without
+          touching congress.gov, senate.gov, clerk.house.gov or cbo.gov, by
+          running it on a page cache in offline mode
+         *Replay a page cache recorded by a real run, or write a synthetic
+          one with as many members and bills as asked for
+         *Scale the synthetic members and bills up separately, so a loop that
+          is quadratic in either one shows up as falling throughput
+         *Compare parsing each kind of saved page into a full BeautifulSoup
+          tree with page_parsers.py, in time and peak RSS
+         *Time extracting the summaries of the saved CBO pdfs, and cut a
+          small fixture set out of a real run's page cache to keep in
+          tests/data/recorded
+"""
+import os
+import io
+import glob
+import csv
+import json
+import random
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+import time
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup
+from page_cache import PageCache
+from fetch import HttpBackend
+from bill_catalogue import BillCatalogue, PUBLIC_LAWS_URL
+from cbo_index import CboIndex, COST_ESTIMATES_URL, HOME_URL, CBO_BILL_FINDER, ordinal
+from cbo_parser import parse_cbo_summary, pdf_summary
+from pdf_text import PdfTextExtractor
+from roll_calls import SENATE_MENU_URL, SENATE_VOTE_URL, HOUSE_MEASURE
+from page_parsers import member_search_rows, link_strings, links, roll_call_rows, cbo_listing, estimate_page
+from web_scraping import (MEMBER_SEARCH_URL, HOUSE_VOTES_URL, ROLL_CALL_PAGES, quick_members_of_congress,
+                          get_representative_voting_records, get_senator_voting_records,
+                          get_cost_estimates, assign_scores, create_csv)
+
+STATES = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL", "IN", "IA",
+          "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ",
+          "NM", "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT",
+          "VA", "WA", "WV", "WI", "WY"]
+PARTIES = {"D":"Democrat", "R":"Republican", "I":"Independent"}
+VOTES = ["Yea", "Yea", "Yea", "Nay", "Not Voting"]
+#How many rows clerk.house.gov and cbo.gov put on one list page
+ROWS_PER_PAGE = 100
+#Each kind of HTML page: which cache keys hold it, how page_parsers.py reads
+#   it and what the scraper used to read from a whole BeautifulSoup tree of it
+PAGE_TYPES = [
+    ("member search", lambda key: key.startswith(MEMBER_SEARCH_URL), member_search_rows,
+     lambda soup: soup.find_all(name='a', href=True)),
+    ("public laws", lambda key: key.startswith(PUBLIC_LAWS_URL), link_strings,
+     lambda soup: soup.find_all(name='a')),
+    ("roll call index", lambda key: key.startswith(HOUSE_VOTES_URL) and key.endswith("/index.asp"),
+     lambda page: links(page, ROLL_CALL_PAGES), lambda soup: soup.find_all(name='a', href=True, string=ROLL_CALL_PAGES)),
+    ("roll call list", lambda key: key.startswith(HOUSE_VOTES_URL) and "/ROLL_" in key,
+     lambda page: roll_call_rows(page, HOUSE_MEASURE), lambda soup: soup.find_all(name='a', href=True, string=HOUSE_MEASURE)),
+    ("cbo listing", lambda key: key.startswith(COST_ESTIMATES_URL + "?"),
+     lambda page: cbo_listing(page, CBO_BILL_FINDER), lambda soup: soup.find_all('a', href=True, string=CBO_BILL_FINDER)),
+    ("cbo estimate", lambda key: key.startswith(HOME_URL + "/publication/"), estimate_page,
+     lambda soup: soup.find_all(name='p'))]
+
+#Recorded pages and pdfs kept with the tests, replayed by default
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "data")
+RECORDED_CACHE = os.path.join(FIXTURES, "recorded")
+FIXTURE_PDFS = os.path.join(FIXTURES, "pdfs")
+#What record_fixtures keeps besides the HTML pages of PAGE_TYPES
+RECORDED_TYPES = [("roll call xml", lambda key: key.endswith(".xml")),
+                  ("cbo pdf", lambda key: key.lower().endswith(".pdf"))]
+#Share of the synthetic estimates whose summary is only in the pdf
+PDF_SHARE = 0.1
+
+def _cache_keys(cache):
+    """Return the key of every entry in a page cache"""
+    keys = list()
+    for filename in os.listdir(os.path.join(cache.directory, "entries")):
+        with open(os.path.join(cache.directory, "entries", filename)) as f:
+            keys.append(json.load(f).get("key", ''))
+    return keys
+
+def fixture_pdfs(cache=None):
+    """Return the bytes of the CBO pdfs in tests/data/pdfs and of every pdf
+    saved in a page cache"""
+    pdfs = list()
+    for path in sorted(glob.glob(os.path.join(FIXTURE_PDFS, "*.pdf"))):
+        with open(path, 'rb') as f:
+            pdfs.append(f.read())
+    if cache is not None:
+        pdfs += [cache.read_bytes(key) for key in sorted(_cache_keys(cache)) if key.lower().endswith(".pdf")]
+    return pdfs
+
+def record_fixtures(source, destination=RECORDED_CACHE, per_type=3, seed=0):
+    """Copy a few pages of every kind from a page cache recorded by a real run
+    into a small one that can be kept with the tests
+
+    Parameters:
+        source (PageCache): cache of a real run
+        destination (str): directory of the new cache
+        per_type (int): pages of each kind to keep, picked at random
+
+    Returns:
+        (dict): kind of page -> how many were copied
+    """
+    rng = random.Random(seed)
+    fixtures = PageCache(destination)
+    keys = sorted(_cache_keys(source))
+    copied = dict()
+    for kind, matches in [page_type[:2] for page_type in PAGE_TYPES] + RECORDED_TYPES:
+        found = [key for key in keys if matches(key)]
+        for key in rng.sample(found, min(per_type, len(found))):
+            fixtures.store(key, source.read_bytes(key), encoding=source.entry(key).get("encoding"))
+        copied[kind] = min(per_type, len(found))
+    return copied
+
+def _last_name(i):
+    """Return a unique last name made of letters for member i"""
+    letters = ''
+    i += 26*26
+    while i:
+        i, letter = divmod(i, 26)
+        letters = chr(ord('a') + letter) + letters
+    return letters.capitalize()
+
+def _first_year(session):
+    return 2*(session - 102) + 1991
+
+def _summary(bill, year, rng):
+    """Return a CBO summary paragraph with a cost and usually a revenue"""
+    text = ("CBO estimates that implementing %s would cost $%d million over the %d-%d period, "
+            "assuming appropriation of the necessary amounts." % (bill, rng.randint(1, 900), year, year+4))
+    if rng.random() < 0.7:
+        text += (" Enacting the bill would increase revenues by $%d million over the %d-%d period."
+                 % (rng.randint(1, 900), year, year+9))
+    return text
+
+def write_synthetic_corpus(directory, sessions=(110, 111), representatives=435, senators=100, bills=100, seed=0,
+                           pdfs=None):
+    """Write every page the scraper reads for the given sessions into a page
+    cache, made up but laid out like the real websites
+
+    Parameters:
+        directory (str): where to write the page cache
+        sessions (tuple): sessions of Congress
+        representatives, senators (int): members of each chamber, serving in
+            every session
+        bills (int): public laws per session, half from each chamber
+        seed (int): seed of the random votes, parties and amounts
+        pdfs (list): bytes of CBO pdfs, fixture_pdfs() by default. About
+            PDF_SHARE of the estimates have no dollar amounts on their page
+            and link to one of them, so the pdf path is timed too.
+
+    Returns:
+        (list): every CBO summary written, for timing the parser on its own
+    """
+    rng = random.Random(seed)
+    cache = PageCache(directory)
+    if pdfs is None:
+        pdfs = fixture_pdfs()
+    members = list()
+    for i in range(representatives + senators):
+        position = "Representative" if i < representatives else "Senator"
+        party = rng.choice("DDRRI" if i % 50 == 0 else "DR")
+        members.append((_last_name(i), position, party, STATES[i % len(STATES)], "R%06d" % i, "S%03d" % i))
+    summaries = list()
+    facets = list()
+    for session in sessions:
+        year = _first_year(session)
+        #The bioguide search results, one row per member
+        rows = ''.join('<tr><td><a href="/scripts/biodisplay.pl?index=%s">%s, John</a></td><td>1950-</td>\n'
+                       '<td>%s</td><td>%s</td><td>%s</td></tr>' % (member_id, last.upper(), position, PARTIES[party], state)
+                       for last, position, party, state, member_id, lis_id in members)
+        cache.store(MEMBER_SEARCH_URL + "?congress=" + str(session),
+                    '<html><table>%s</table><a href="/">Search again</a></html>' % rows)
+        #The public laws
+        names = ["H.R.%d" % (i+1) if i % 2 == 0 else "S.%d" % (i+1) for i in range(bills)]
+        cache.store(PUBLIC_LAWS_URL + str(session), "<html>%s</html>" % ''.join("<a>%s</a>" % name for name in names))
+        #A House roll call for every bill, all in the first year
+        house_pages = list()
+        for page_start in range(0, bills, ROWS_PER_PAGE):
+            rows = list()
+            for number in range(page_start, min(page_start + ROWS_PER_PAGE, bills)):
+                url = HOUSE_VOTES_URL + "%d/roll%03d.xml" % (year, number)
+                measure = names[number].replace("H.R.", "H R ").replace("S.", "S ")
+                rows.append('<tr><td><a href="%s">%d</a></td><td>d</td><td>e</td><td>f</td>'
+                            '<td><a href="/b">%s</a></td><td>On Passage</td></tr>' % (url, number, measure))
+                cache.store(url, ("<rollcall-vote><vote-data>%s</vote-data></rollcall-vote>" % ''.join(
+                    '<recorded-vote><legislator name-id="%s" party="%s" state="%s" unaccented-name="%s">%s</legislator>'
+                    '<vote>%s</vote></recorded-vote>' % (member_id, party, state, last, last, rng.choice(VOTES))
+                    for last, position, party, state, member_id, lis_id in members
+                    if position == "Representative")).encode("utf-8"))
+            house_pages.append("ROLL_%d.asp" % page_start)
+            cache.store(HOUSE_VOTES_URL + "%d/ROLL_%d.asp" % (year, page_start), "<html><table>%s</table></html>" % ''.join(rows))
+        cache.store(HOUSE_VOTES_URL + "%d/index.asp" % year,
+                    "<html>%s</html>" % ''.join('<a href="%s">Roll Calls %d</a>' % (page, i) for i, page in enumerate(house_pages)))
+        cache.store(HOUSE_VOTES_URL + "%d/index.asp" % (year+1), "<html></html>")
+        #A Senate roll call for every bill, all in the first year
+        menu = list()
+        for number, name in enumerate(names):
+            issue = name.replace("H.R.", "H.R. ").replace("S.", "S. ")
+            menu.append("<vote><vote_number>%05d</vote_number><issue>%s</issue><result>Passed</result></vote>" % (number, issue))
+            cache.store(SENATE_VOTE_URL % (session, 1, session, 1, "%05d" % number), ("<roll_call_vote><members>%s</members></roll_call_vote>" % ''.join(
+                "<member><last_name>%s</last_name><party>%s</party><state>%s</state><vote_cast>%s</vote_cast>"
+                "<lis_member_id>%s</lis_member_id></member>" % (last, party, state, rng.choice(VOTES), lis_id)
+                for last, position, party, state, member_id, lis_id in members
+                if position == "Senator")).encode("utf-8"))
+        cache.store(SENATE_MENU_URL % (session, 1), ("<vote_summary><votes>%s</votes></vote_summary>" % ''.join(menu)).encode("utf-8"))
+        cache.store(SENATE_MENU_URL % (session, 2), b"<vote_summary><votes></votes></vote_summary>")
+        #A CBO estimate for most bills, listed a page at a time
+        facet_url = COST_ESTIMATES_URL + "?congress=%d" % session
+        facets.append('<a href="%s"><span class="facet-item__value">%s Congress</span></a>' % (facet_url, ordinal(session)))
+        estimated = [name for name in names if rng.random() < 0.8]
+        for page_start in range(0, len(estimated), ROWS_PER_PAGE):
+            entries = list()
+            for name in estimated[page_start:page_start + ROWS_PER_PAGE]:
+                url = HOME_URL + "/publication/%d-%s" % (session, name)
+                title = name.replace("H.R.", "H.R. ").replace("S.", "S. ")
+                entries.append('<div><a href="%s">%s, An Act</a><time datetime="%d-03-01">March 1, %d</time></div>' % (url, title, year, year))
+                if pdfs and rng.random() < PDF_SHARE:
+                    pdf_url = HOME_URL + "/sites/default/files/%d-%s.pdf" % (session, name)
+                    cache.store(pdf_url, rng.choice(pdfs))
+                    cache.store(url, '<html><time>March 1, %d</time><p>%s, An Act</p><a href="%s">View Document</a>'
+                                '</html>' % (year, title, pdf_url[len(HOME_URL):]))
+                    continue
+                summary = _summary(title, year, rng)
+                summaries.append((summary, year))
+                cache.store(url, "<html><time>March 1, %d</time><p>%s</p></html>" % (year, summary))
+            page_url = facet_url if page_start == 0 else facet_url + "&page=%d" % (page_start//ROWS_PER_PAGE)
+            if page_start + ROWS_PER_PAGE < len(estimated):
+                entries.append('<a rel="next" href="%s&page=%d">Next</a>' % (facet_url, page_start//ROWS_PER_PAGE + 1))
+            cache.store(page_url, "<html>%s</html>" % ''.join(entries))
+    cache.store(COST_ESTIMATES_URL, "<html><ul>%s</ul></html>" % ''.join("<li>%s</li>" % facet for facet in facets))
+    return summaries
+
+def recorded_summaries(cache):
+    """Return the summary of every pdf whose text a real run saved in the
+    cache, with the year the summary is parsed for"""
+    summaries = list()
+    for key in _cache_keys(cache):
+        if key.startswith("pdf-text:"):
+            try:
+                summaries.append((pdf_summary(cache.read(key)), None))
+            except IndexError:
+                continue
+    return summaries
+
+def measure(stage, run, items):
+    """Run one stage with its prints hidden and return what it returned along
+    with its running time, throughput and peak memory
+
+    Parameters:
+        stage (str): name of the stage in the results
+        run (callable): takes no arguments and runs the stage
+        items (callable): takes what run returned and returns how many items
+            (members, votes, bills...) the stage handled
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    count = items(result)
+    return result, {"stage":stage, "items":count, "seconds":seconds,
+                    "per_second":count/seconds if seconds else None, "peak_mb":peak/2**20}
+
+def _parse_worker(directory, keys, kind, parser):
+    """Parse saved pages of one kind in a fresh process of parse_benchmarks
+    and return the time it took and how much the peak RSS grew, in MB"""
+    cache = PageCache(directory, offline=True)
+    pages = [cache.read(key) for key in keys]
+    name, matches, parse, legacy = next(page_type for page_type in PAGE_TYPES if page_type[0] == kind)
+    if parser == "bs4":
+        #What the scraper kept: the tags it read, and the tree behind them
+        parse = lambda page: legacy(BeautifulSoup(page, 'html.parser'))
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    results = [parse(page) for page in pages]
+    seconds = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return seconds, (after - before)/1024, len(results)
+
+def parse_benchmarks(cache, label):
+    """Parse every kind of HTML page saved in a cache with BeautifulSoup the
+    way the scraper used to and with page_parsers.py, each in a fresh process
+    so their peak RSS can be compared
+
+    Returns:
+        (list): one row of results per kind of page and parser
+    """
+    keys = _cache_keys(cache)
+    results = list()
+    context = multiprocessing.get_context("spawn")
+    for kind, matches, parse, legacy in PAGE_TYPES:
+        pages = sorted(key for key in keys if matches(key))
+        if not pages:
+            continue
+        for parser in ("bs4", "page_parsers"):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                seconds, peak, count = executor.submit(_parse_worker, cache.directory, pages, kind, parser).result()
+            results.append({"corpus":label, "stage":"parse %s (%s)" % (kind, parser), "items":count,
+                            "seconds":seconds, "per_second":count/seconds if seconds else None, "peak_mb":peak})
+    return results
+
+def run_benchmarks(cache, sessions, summaries, label):
+    """Run every stage on an offline page cache
+
+    Parameters:
+        cache (PageCache): the recorded or synthetic pages, in offline mode
+        sessions (list): sessions of Congress in the cache
+        summaries (list): (CBO summary, year) for the parser on its own
+        label (str): name of the corpus in the results
+
+    Returns:
+        (list): one row of results per stage
+    """
+    results = list()
+    def run(stage, function, items):
+        try:
+            result, row = measure(stage, function, items)
+        except KeyError as e:
+            #CacheMiss: the recorded corpus doesn't have every page
+            print(label, stage, "skipped, not in the cache:", e)
+            return None
+        except ImportError as e:
+            #Neither pdftotext nor pdfminer is installed
+            print(label, stage, "skipped:", e)
+            return None
+        row["corpus"] = label
+        results.append(row)
+        return result
+    #Extracted without the page cache, so every pdf is really extracted
+    pdfs = fixture_pdfs(cache)
+    if pdfs:
+        run("pdf extraction", lambda: [PdfTextExtractor().summary(pdf) for pdf in pdfs], len)
+    catalogue = BillCatalogue(cache)
+    members = run("members", lambda: quick_members_of_congress(sessions, cache),
+                  lambda chambers: sum(len(member["Sessions"]) for chamber in chambers for member in chamber.values()))
+    bill_names = run("public laws", lambda: catalogue.all_bills(sessions), len)
+    if members is None or bill_names is None:
+        return results
+    Representatives, Senators = members
+    backend = HttpBackend(cache)
+    house_votes = run("house votes", lambda: get_representative_voting_records(Representatives, sessions, cache, catalogue, backend), len)
+    senate_votes = run("senate votes", lambda: get_senator_voting_records(Senators, sessions, cache, catalogue, backend), len)
+    estimates = run("cbo estimates", lambda: get_cost_estimates(bill_names, cache, backend, index=CboIndex(cache)),
+                    lambda estimates: len(bill_names))
+    run("cbo parser", lambda: [parse_cbo_summary(summary, year or 2000) for summary, year in summaries], len)
+    if house_votes is None or senate_votes is None or estimates is None:
+        return results
+    run("assign_scores", lambda: assign_scores(Representatives, Senators, estimates[0], house_votes, senate_votes),
+        lambda result: len(Representatives) + len(Senators))
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            run("create_csv", lambda: create_csv(Representatives, Senators), lambda result: len(Representatives) + len(Senators))
+        finally:
+            os.chdir(cwd)
+    return results
+
+def synthetic_benchmarks(scales=(1, 10), sessions=(110, 111), representatives=435, senators=100, bills=100):
+    """Run every stage on synthetic corpora: the base sizes, then each scale
+    applied to the bills alone and to the members alone
+
+    Returns:
+        (list): one row of results per stage and corpus
+    """
+    results = list()
+    sizes = [(1, 1)] + [(scale, 1) for scale in scales if scale != 1] + [(1, scale) for scale in scales if scale != 1]
+    for bill_scale, member_scale in sizes:
+        label = "synthetic bills x%d members x%d" % (bill_scale, member_scale)
+        with tempfile.TemporaryDirectory() as directory:
+            summaries = write_synthetic_corpus(directory, sessions, representatives*member_scale,
+                                               senators*member_scale, bills*bill_scale)
+            cache = PageCache(directory, offline=True)
+            results += run_benchmarks(cache, list(sessions), summaries, label)
+            results += parse_benchmarks(cache, label)
+    return results
+
+def print_results(results):
+    print("%-34s %-38s %10s %10s %12s %9s" % ("corpus", "stage", "items", "seconds", "items/s", "peak MB"))
+    for row in results:
+        print("%-34s %-38s %10d %10.2f %12.0f %9.1f" % (row["corpus"], row["stage"], row["items"], row["seconds"],
+                                                       row["per_second"] or 0, row["peak_mb"]))
+
+def save_results(results, path):
+    """Write the results to a .json file, or a .csv file"""
+    if path.endswith(".csv"):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, ["corpus", "stage", "items", "seconds", "per_second", "peak_mb"])
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the scraper offline")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="also replay a page cache recorded by a real run")
+    parser.add_argument("--sessions", type=int, nargs=2, default=[110, 111], metavar=("FIRST", "LAST"),
+                        help="sessions of Congress to run on (default: 110 111)")
+    parser.add_argument("--scales", type=int, nargs='+', default=[1, 10],
+                        help="how many times more bills, then members, than the base synthetic corpus (default: 1 10)")
+    parser.add_argument("--bills", type=int, default=100, help="public laws per session in the base corpus")
+    parser.add_argument("--output", metavar="PATH", help="save the results to a .json or .csv file")
+    parser.add_argument("--record", action="store_true",
+                        help="copy a few pages of every kind from --cache into tests/data/recorded and stop")
+    args = parser.parse_args()
+    sessions = list(range(args.sessions[0], args.sessions[1]+1))
+    if args.record:
+        print(record_fixtures(PageCache(args.cache, offline=True)))
+        raise SystemExit
+    results = list()
+    #The recorded fixtures are replayed along with any cache given
+    for directory in [args.cache] + [RECORDED_CACHE]*os.path.isdir(RECORDED_CACHE):
+        if directory:
+            cache = PageCache(directory, offline=True)
+            results += run_benchmarks(cache, sessions, recorded_summaries(cache), "recorded " + directory)
+            results += parse_benchmarks(cache, "recorded " + directory)
+    results += synthetic_benchmarks(args.scales, sessions, bills=args.bills)
+    print_results(results)
+    if args.output:
+        save_results(results, args.output)
@@ -0,0 +1,143 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: bill_catalogue.py
+Purpose: *Find the bills signed into law during each session of Congress once
+          and share them between every stage of the scraper
+         *Save the bill names to disk so later runs don't have to crawl
+          congress.gov again
+"""
+import os
+import re
+import json
+import threading
+from page_cache import PageCache
+from page_parsers import link_strings
+from metrics import METRICS
+
+PUBLIC_LAWS_URL = "https://www.congress.gov/public-laws/"
+
+#Bills initiated in the Senate start with "S." followed by numbers
+#Bills initiated in the House of Rep. start with "H.R." followed by numbers
+SENATE_BILL_FINDER = re.compile(r"^S\.\d+$")
+HOUSE_BILL_FINDER = re.compile(r"^H.R.\d+$")
+
+def fetch_public_laws(session, cache, ttl=None):
+    """Find the names of the bills signed into law during one session of
+    Congress on congress.gov
+
+    Parameters:
+        session (int): session of Congress
+        cache (PageCache): where to save and reuse the public law page
+        ttl (float): ask congress.gov again if the saved page is older than
+            this many seconds, instead of the cache's ttl
+
+    Returns:
+        house_bills (list): names of bills initiated in H.R. signed into law
+        senate_bills (list): names of bills initiated in Senate signed into law
+    """
+    house_bills, senate_bills = [], []
+    #Congress.gov requires a wait time of 2 seconds while crawling, which the
+    #   cache's PoliteSession takes care of
+    page = cache.get(PUBLIC_LAWS_URL+str(session), ttl)
+    with METRICS.timer("parse"):
+        names = link_strings(page)
+    for name in names:
+        if bool(SENATE_BILL_FINDER.search(name)):
+            senate_bills.append(name+'-'+str(session)+"th")
+        if bool(HOUSE_BILL_FINDER.search(name)):
+            house_bills.append(name+'-'+str(session)+"th")
+    return house_bills, senate_bills
+
+class BillCatalogue:
+    """The bills signed into law during each session of Congress. Each session
+    is fetched from congress.gov the first time it's asked for and kept after
+    that.
+
+    Attributes:
+        cache (PageCache): where the public law pages are downloaded through
+        path (str): JSON file the catalogue is saved to, or None
+        sessions (dict): session -> {"House": [bill names], "Senate": [...]}
+    """
+    def __init__(self, cache=None, path=None):
+        """
+        Parameters:
+            cache (PageCache): where to download the public law pages through
+            path (str): JSON file to load the catalogue from and save it to
+        """
+        self.cache = cache
+        self.path = path
+        self.sessions = dict()
+        #The House and Senate stages share the catalogue from different threads
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def bills(self, session):
+        """Return the names of the bills signed into law during a session
+
+        Parameters:
+            session (int): session of Congress
+
+        Returns:
+            house_bills (list): names of bills initiated in H.R.
+            senate_bills (list): names of bills initiated in the Senate
+        """
+        with self.lock:
+            if session not in self.sessions:
+                if self.cache is None:
+                    self.cache = PageCache()
+                house_bills, senate_bills = fetch_public_laws(session, self.cache)
+                self.sessions[session] = {"House":house_bills, "Senate":senate_bills}
+        return self.sessions[session]["House"], self.sessions[session]["Senate"]
+
+    def refresh(self, session, ttl=0):
+        """Look up the public laws for a session again and return the bills
+        that weren't in the catalogue before
+
+        Parameters:
+            session (int): session of Congress
+            ttl (float): ask congress.gov again if the saved page is older than
+                this many seconds
+
+        Returns:
+            (list): names of the new bills, House bills first
+        """
+        with self.lock:
+            if self.cache is None:
+                self.cache = PageCache()
+            house_bills, senate_bills = fetch_public_laws(session, self.cache, ttl)
+            old = self.sessions.get(session, {"House":[], "Senate":[]})
+            known = set(old["House"] + old["Senate"])
+            self.sessions[session] = {"House":house_bills, "Senate":senate_bills}
+        return [name for name in house_bills + senate_bills if name not in known]
+
+    def bill_names(self, sessions):
+        """Same as get_bill_names: the House bills and the Senate bills for the
+        given sessions, most recent session first"""
+        house_bills, senate_bills = [], []
+        for session in sessions[::-1]:
+            house, senate = self.bills(session)
+            house_bills += house
+            senate_bills += senate
+        return house_bills, senate_bills
+
+    def all_bills(self, sessions):
+        """Return the House bills followed by the Senate bills for the given
+        sessions in one list"""
+        house_bills, senate_bills = self.bill_names(sessions)
+        return house_bills + senate_bills
+
+    def load(self, path=None):
+        """Read sessions saved by save, keeping any already in the catalogue"""
+        with open(path or self.path) as f:
+            saved = json.load(f)
+        for session, bills in saved.items():
+            self.sessions.setdefault(int(session), bills)
+
+    def save(self, path=None):
+        """Write every session in the catalogue to a JSON file"""
+        path = path or self.path
+        with open(path + ".tmp", 'w') as f:
+            json.dump({str(session):bills for session, bills in sorted(self.sessions.items())}, f, indent=1)
+        os.replace(path + ".tmp", path)
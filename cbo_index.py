@@ -0,0 +1,182 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: cbo_index.py
+Purpose: *Crawl cbo.gov's cost estimate listing once for each session of
+          Congress instead of searching the site for every bill
+         *Look up the estimate page, pdf and publication date of a bill in a
+          dictionary, so bills without an estimate need no network call
+         *Save the index to disk so later runs don't have to crawl it again
+"""
+import os
+import re
+import json
+import threading
+from urllib.parse import urljoin
+from page_cache import PageCache
+from metrics import METRICS
+from page_parsers import cbo_facet_href, cbo_listing
+
+HOME_URL = "https://www.cbo.gov"
+COST_ESTIMATES_URL = "https://www.cbo.gov/cost-estimates"
+
+#cbo.gov writes bills as "H.R. 1234" or "S. 1582", usually followed by the
+#   title of the act
+CBO_BILL_FINDER = re.compile(r"^\s*(H\.R\.|S\.)\s?(\d+)\b")
+
+def ordinal(session):
+    """Return how cbo.gov writes a session of Congress, e.g. "110th" """
+    if session % 100 in (11, 12, 13):
+        return str(session) + "th"
+    return str(session) + {1:"st", 2:"nd", 3:"rd"}.get(session % 10, "th")
+
+def bill_key(bill_name):
+    """Return (bill number without spaces, session) for a bill name, e.g.
+    ("H.R.1234", 110) for "H.R.1234-110th" """
+    name, session = bill_name.split(sep='-')
+    return name, int(re.match(r"\d+", session).group())
+
+def session_listing_url(page, session):
+    """Find the link to a session's cost estimates in the Congress facet of
+    the cost estimates page
+
+    Parameters:
+        page (str): HTML of the cost estimates page
+        session (int): session of Congress
+
+    Returns:
+        (str): URL of the first listing page of the session, or None if the
+               facet has no such session
+    """
+    href = cbo_facet_href(page, re.compile(ordinal(session)))
+    return urljoin(HOME_URL, href) if href is not None else None
+
+def index_listing_page(page, url, session, index):
+    """Add every estimate on one listing page to an index of a session
+
+    Parameters:
+        page (str): HTML of the listing page
+        url (str): where the page was loaded from, for its relative links
+        session (int): session of Congress the page lists
+        index (dict): bill name -> {"url", "pdf", "date"}; a bill with more
+            than one estimate keeps the first one listed, like the site search
+            this replaces
+
+    Returns:
+        (str): URL of the next listing page, or None on the last page
+    """
+    with METRICS.timer("parse"):
+        entries, next_href = cbo_listing(page, CBO_BILL_FINDER)
+    for entry in entries:
+        chamber, number = CBO_BILL_FINDER.match(entry.title).groups()
+        bill_name = chamber + number + '-' + str(session) + "th"
+        if bill_name not in index:
+            index[bill_name] = {"url":urljoin(url, entry.href), "pdf":None, "date":entry.date}
+    return urljoin(url, next_href) if next_href is not None else None
+
+def fetch_session_index(session, cache, ttl=None):
+    """Crawl every listing page of a session's cost estimates on cbo.gov
+
+    Parameters:
+        session (int): session of Congress
+        cache (PageCache): where to save and reuse the listing pages
+        ttl (float): ask cbo.gov again if a saved page is older than this many
+            seconds, instead of the cache's ttl
+
+    Returns:
+        (dict): bill name, e.g. "H.R.1234-110th" -> {"url": estimate page,
+                "pdf": None until the estimate page is read, "date": shown
+                publication date or None}
+    """
+    index = dict()
+    url = session_listing_url(cache.get(COST_ESTIMATES_URL, ttl), session)
+    seen = set()
+    while url is not None and url not in seen:
+        seen.add(url)
+        url = index_listing_page(cache.get(url, ttl), url, session, index)
+    return index
+
+class CboIndex:
+    """Every cost estimate on cbo.gov by bill, one session of Congress at a
+    time. Each session is crawled the first time one of its bills is looked
+    up and kept after that.
+
+    Attributes:
+        cache (PageCache): where the listing pages are downloaded through
+        path (str): JSON file the index is saved to, or None
+        sessions (dict): session -> {bill name: {"url", "pdf", "date"}}
+    """
+    def __init__(self, cache=None, path=None, sessions=None):
+        """
+        Parameters:
+            cache (PageCache): where to download the listing pages through
+            path (str): JSON file to load the index from and save it to
+            sessions (dict): sessions already crawled, e.g. handed to a worker
+                process
+        """
+        self.cache = cache
+        self.path = path
+        self.sessions = dict(sessions or {})
+        #The CBO workers of one process share the index between threads
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def session(self, session):
+        """Return the index of one session, crawling it if it's new"""
+        with self.lock:
+            if session not in self.sessions:
+                if self.cache is None:
+                    self.cache = PageCache()
+                self.sessions[session] = fetch_session_index(session, self.cache)
+        return self.sessions[session]
+
+    def lookup(self, bill_name):
+        """Return {"url", "pdf", "date"} of a bill's cost estimate, or None if
+        cbo.gov lists no estimate for it
+
+        Parameters:
+            bill_name (str): bill name including the session it passed in
+        """
+        name, session = bill_key(bill_name)
+        return self.session(session).get(bill_name)
+
+    def set_pdf(self, bill_name, pdf_url):
+        """Remember the pdf of a bill's estimate once its page has been read"""
+        entry = self.lookup(bill_name)
+        if entry is not None:
+            entry["pdf"] = pdf_url
+
+    def refresh(self, session, ttl=0):
+        """Crawl a session's listing again and return the bills that got an
+        estimate since it was last crawled
+
+        Parameters:
+            session (int): session of Congress
+            ttl (float): ask cbo.gov again if a saved page is older than this
+                many seconds
+        """
+        with self.lock:
+            if self.cache is None:
+                self.cache = PageCache()
+            old = self.sessions.get(session, {})
+            new = fetch_session_index(session, self.cache, ttl)
+            for bill_name, entry in new.items():
+                if bill_name in old and old[bill_name]["url"] == entry["url"]:
+                    entry["pdf"] = old[bill_name]["pdf"]
+            self.sessions[session] = new
+        return [bill_name for bill_name in new if bill_name not in old]
+
+    def load(self, path=None):
+        """Read sessions saved by save, keeping any already in the index"""
+        with open(path or self.path) as f:
+            saved = json.load(f)
+        for session, index in saved.items():
+            self.sessions.setdefault(int(session), index)
+
+    def save(self, path=None):
+        """Write every session in the index to a JSON file"""
+        path = path or self.path
+        with open(path + ".tmp", 'w') as f:
+            json.dump({str(session):index for session, index in sorted(self.sessions.items())}, f, indent=1)
+        os.replace(path + ".tmp", path)
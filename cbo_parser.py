@@ -0,0 +1,273 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: cbo_parser.py
+Purpose: *Find the costs and revenues in the summary of a CBO cost estimate
+         *Compile every regular expression once instead of once per dollar
+          amount, and find the dollar amounts, keywords and years in each
+          sentence by their position
+"""
+import re
+from datetime import date
+
+#Dollar amounts like $5, $1,200, $3.5 billion. The first one allows the amount
+#   and "million" to be split over two lines like in the pdfs.
+DOLLAR_FINDER = re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?\n? ?(?:billion|million)?", re.IGNORECASE)
+SAME_LINE_DOLLAR_FINDER = re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?(?: billion| million)?", re.IGNORECASE)
+DIGIT_FINDER = re.compile(r"\d+(?:,\d+)?(?:\.\d+)?")
+SENTENCE_SPLITTER = re.compile(r"\. [A-Z]|\.\n[A-Z]")
+
+#textract takes the dash out of year ranges like 1999-2000
+YEAR_RANGE_FIXER = re.compile(r"(\d{4}) ?(\d{4})")
+#The summary is the second section of the pdf, between two all-caps headings
+PDF_SUMMARY_FINDER = re.compile(r"[A-Z ]{7,}.*?[A-Z ]{12,}", re.DOTALL)
+
+#Words that say a dollar amount later in the sentence is a cost. Each entry is
+#   one alternative; the earliest any of them can end is all that matters.
+COST_KEYWORDS = [re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+    r"cost", r"provides", r"(?:additional|increase|resul).*?(?:spending|outlay)",
+    r"discretion.*?spending", r"(?:decrease|reduc).*?revenue", r"and premium payments",
+    r"revenue.*?(?:lower|losses)")]
+#Words that say a dollar amount later in the sentence is a revenue or savings
+REVENUE_KEYWORDS = [re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+    r"(?:additional|increase|resul).*?(?:sav|revenue|collection|assessments)",
+    r"(?:reduc|decrease).*?(?:cost|spend|outlay)", r"(?:cost|spend|outlay).*?(?:decrease|lower)",
+    r"(?:offsetting|rais).*?(?:collect|receipts)")]
+#Revenue words with no other dollar amount between them and the dollar amount
+STRICT_REVENUE_KEYWORDS = re.compile(r"(?:(?:additional|increase|resul)[^\$]+(?:sav|revenue|collection|assessments)|(?:reduc|decrease)[^\$]+(?:cost|spend|outlay)|(?:cost|spend|outlay)[^\$]+(?:decrease|lower)|(?:offsetting|rais)[^\$]+(?:collect|receipts))", re.IGNORECASE | re.DOTALL)
+
+#What can follow a dollar amount to give the years it covers,
+#   e.g. "$5 million over the 2019-2023 period"
+FIRST_YEAR_SPAN = re.compile(r"[^\$-]+?\d{4}[^\.]+?\d{4}")
+FIRST_YEAR = re.compile(r"[^\$-]+?\d{4}")
+LAST_YEAR = re.compile(r"[^\$]+(?:\d{4}-)?\d{4}")
+#Annual amounts, e.g. "$5 million a year" or "annually ... $5 million"
+ANNUAL_AFTER = re.compile(r".*?(?:each[ a-z]{1,25}year|a year|annually)")
+ANNUAL_BEFORE = re.compile(r"(?:each[ a-z]{1,25}year|annually)")
+
+#Used to compare dollar amounts without regard to case, like re.IGNORECASE,
+#   without changing the length of the sentence
+_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def dollar_value(dollar_string):
+    """Convert a dollar string like "$3.5 billion" to a number"""
+    dollar = float(DIGIT_FINDER.findall(dollar_string)[0].replace(',', ''))
+    if "billion" in dollar_string:
+        dollar *= 1000000000
+    elif "million" in dollar_string:
+        dollar *= 1000000
+    return dollar
+
+def pdf_sections(text):
+    """Split the text of a CBO cost estimate pdf into its sections, each
+    starting and ending with an all-caps heading"""
+    #Put the dash back in the 1999-2000 that textract accidentally takes out.
+    text = YEAR_RANGE_FIXER.sub(r"\1-\2", text)
+    return PDF_SUMMARY_FINDER.findall(text)
+
+def pdf_summary(text):
+    """Find the summary section in the text of a CBO cost estimate pdf
+
+    Parameters:
+        text (str): all the text extracted from the pdf
+
+    Returns:
+        (str): the summary
+
+    Raises:
+        IndexError: if the pdf doesn't have a summary section
+    """
+    return pdf_sections(text)[1]
+
+def _min_end(patterns, sentence):
+    """Return the earliest position any of the keyword patterns can end at in
+    the sentence, or None if none of them are in it"""
+    ends = [match.end() for match in (pattern.search(sentence) for pattern in patterns) if match]
+    return min(ends) if ends else None
+
+class _Sentence:
+    """Positions of the keywords, dollar signs and parentheses in one sentence,
+    found once and shared by every dollar amount in the sentence."""
+    def __init__(self, sentence):
+        self.text = sentence
+        self.lower = sentence.translate(_LOWER)
+        self.cost_end = _min_end(COST_KEYWORDS, sentence)
+        self.revenue_end = _min_end(REVENUE_KEYWORDS, sentence)
+        self.occurrences = dict()
+        self.windows = dict()
+
+    def find(self, amount, ignore_case=False):
+        """Return every position the amount is written at in the sentence"""
+        key = (amount, ignore_case)
+        if key not in self.occurrences:
+            text = self.lower if ignore_case else self.text
+            if ignore_case:
+                amount = amount.translate(_LOWER)
+            positions = list()
+            position = text.find(amount)
+            while position != -1:
+                positions.append(position)
+                position = text.find(amount, position + 1)
+            self.occurrences[key] = positions
+        return self.occurrences[key]
+
+    def after_keyword(self, amount, keyword_end):
+        """Return True if the amount comes after a keyword ending at keyword_end"""
+        if keyword_end is None:
+            return False
+        positions = self.find(amount, ignore_case=True)
+        return bool(positions) and positions[-1] >= keyword_end
+
+    def _window(self, dollar_sign):
+        """Return where the text between the previous dollar amount and the
+        dollar sign at the given position starts"""
+        return self.text.rfind('$', 0, dollar_sign) + 1
+
+    def keyword_before(self, amount, pattern, ignore_case):
+        """Return True if the pattern appears between the previous dollar sign
+        and "$" + amount, with at least one character before the "$" """
+        for dollar_sign in self.find('$' + amount, ignore_case):
+            key = (pattern.pattern, dollar_sign)
+            if key not in self.windows:
+                self.windows[key] = pattern.search(self.text, self._window(dollar_sign), dollar_sign - 1) is not None
+            if self.windows[key]:
+                return True
+        return False
+
+    def in_parentheses(self, amount):
+        """Return True if the amount is inside an open parenthesis"""
+        for position in self.find(amount):
+            if self.text.rfind('(', 0, position) > self.text.rfind(')', 0, position):
+                return True
+        return False
+
+    def first_year(self, amount):
+        """Return the first year of a range of years written after the amount,
+        e.g. 2019 in "$5 million over the 2019-2023 period", or None"""
+        for position in self.find(amount):
+            span = FIRST_YEAR_SPAN.match(self.text, position + len(amount))
+            if span:
+                return int(FIRST_YEAR.match(self.text, position + len(amount), span.end()).group()[-4:])
+        return None
+
+    def last_year(self, amount):
+        """Return the last year written after the amount and before the next
+        dollar amount, or None"""
+        for position in self.find(amount):
+            match = LAST_YEAR.match(self.text, position + len(amount))
+            if match:
+                return int(match.group()[-4:])
+        return None
+
+    def annual(self, amount):
+        """Return True if the amount is a yearly amount"""
+        for position in self.find(amount):
+            if ANNUAL_AFTER.match(self.text, position + len(amount)):
+                return True
+        return self.keyword_before(amount, ANNUAL_BEFORE, ignore_case=False)
+
+def _add_estimate(total, sentence, amount, dollar, year, current_year, previous, check_overlap):
+    """Add a cost or revenue to the running total
+
+    Sometimes there is an estimate that overlaps another estimate e.g. $X from
+    2000-2003 and $Y from 2000-2010, so $X is taken back out of the total.
+    If the amount is yearly, it's cumulated according to the number of years
+    that have occurred since the year after the passing of the bill (or as is
+    specified in the text).
+
+    Parameters:
+        total (float): costs or revenues so far
+        sentence (_Sentence): sentence the amount is in
+        amount (str): dollar string without the "$"
+        dollar (float): value of the dollar string
+        year (int): year the estimate was published
+        current_year (int): last year for yearly amounts with no end year
+        previous (tuple): value, first year and last year of the previous
+            dollar amount
+        check_overlap (bool): whether the previous amount can be taken out
+
+    Returns:
+        (float): the new total
+        (int): first year the amount covers, or None
+        (int): last year the amount covers, or None
+    """
+    last_dollar, last_first_year, last_last_year = previous
+    total += dollar
+    first_year = sentence.first_year(amount)
+    last_year = sentence.last_year(amount)
+    if last_year is not None and last_last_year is not None and check_overlap:
+        if first_year is not None and last_first_year is not None:
+            if first_year <= last_first_year and last_year >= last_last_year:
+                total -= last_dollar
+        else:
+            if last_last_year > year and last_year > last_last_year:
+                total -= last_dollar
+    if sentence.annual(amount):
+        end_year = last_year if last_year is not None else current_year
+        begin_year = first_year if first_year is not None else year+1
+        #Add one to include the endpoints
+        total += (1+end_year - begin_year)*dollar - dollar
+    return total, first_year, last_year
+
+def parse_cbo_summary(text, year, current_year=None):
+    """Find the total costs and revenues in the summary of a CBO cost estimate
+
+    In each sentence, a dollar amount is a cost if a cost keyword comes before
+    it and no revenue keyword comes right before it, and a revenue if a revenue
+    keyword comes before it and the sentence's last dollar amount doesn't
+    follow a cost keyword. Amounts in parentheses are skipped. Dollar amounts
+    are matched as written.
+
+    Parameters:
+        text (str): summary from the estimate's web page or pdf
+        year (int): year the estimate was published
+        current_year (int): last year for yearly amounts with no end year,
+            this year by default
+
+    Returns:
+        (dict): "cost" and "revenue" totals, and "costs" and "revenues", the
+                dollar strings counted toward each
+    """
+    if current_year is None:
+        current_year = date.today().year
+    cost, revenue, dollar = 0, 0, 0
+    costs, revenues = list(), list()
+    first_year, last_year = None, None
+    for sentence_text in SENTENCE_SPLITTER.split(text):
+        sentence = _Sentence(sentence_text)
+        found_cost = False
+        dollar_strings = DOLLAR_FINDER.findall(sentence_text)
+        #First for costs
+        for dollar_string in dollar_strings:
+            amount = dollar_string[1:]
+            previous = (dollar, first_year, last_year)
+            first_year, last_year = None, None
+            dollar = dollar_value(dollar_string)
+            #The cost keyword or revenue keyword can come at the beginning of
+            #   the sentence with multiple listed costs or revenues. But
+            #   sometimes both occur in the same sentence, so the most recent
+            #   keyword must not be a revenue keyword.
+            if sentence.after_keyword(amount, sentence.cost_end) and not sentence.keyword_before(amount, STRICT_REVENUE_KEYWORDS, ignore_case=True):
+                #If the dollar_string is nested in parentheses, don't count it
+                if sentence.in_parentheses(amount):
+                    continue
+                found_cost = True
+                costs.append(dollar_string)
+                cost, first_year, last_year = _add_estimate(cost, sentence, amount, dollar, year, current_year, previous, True)
+        if not dollar_strings:
+            continue
+        #A revenue can't follow a cost keyword that the sentence's last dollar
+        #   amount also follows
+        last_is_cost = sentence.after_keyword(dollar_strings[-1][1:], sentence.cost_end)
+        #Now for revenues
+        for dollar_string in SAME_LINE_DOLLAR_FINDER.findall(sentence_text):
+            amount = dollar_string[1:]
+            previous = (dollar, first_year, last_year)
+            first_year, last_year = None, None
+            dollar = dollar_value(dollar_string)
+            if sentence.after_keyword(amount, sentence.revenue_end) and not last_is_cost:
+                if sentence.in_parentheses(amount):
+                    continue
+                revenues.append(dollar_string)
+                revenue, first_year, last_year = _add_estimate(revenue, sentence, amount, dollar, year, current_year, previous, not found_cost)
+    return {"cost":cost, "revenue":revenue, "costs":costs, "revenues":revenues}
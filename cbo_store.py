@@ -0,0 +1,201 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: cbo_store.py
+Purpose: *Keep the summary of every bill's CBO cost estimate, where it came
+          from and what parse_cbo_summary found in it, so the costs can be
+          parsed again without crawling cbo.gov
+         *Reparse every stored summary in parallel after the regexes in
+          cbo_parser.py change, and show which bills came out differently
+"""
+import os
+import gzip
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from cbo_parser import parse_cbo_summary
+
+def net_cost(estimate):
+    """Return the net cost estimate of a bill the way get_cost_estimates
+    scores it: revenue minus cost, with negative totals counted as zero
+
+    Parameters:
+        estimate (dict): what parse_cbo_summary returned
+    """
+    return max(estimate["revenue"], 0) - max(estimate["cost"], 0)
+
+class CboStore:
+    """Every summary parsed by get_cost_estimates, by bill
+
+    Attributes:
+        path (str): gzipped JSON file the store is saved to, or None
+        records (dict): bill name -> {"text": summary from the web page's <p>
+            tags or the pdf, "source": "from_summary" or "from_pdf", "year":
+            year the estimate was published, "current_year": last year of
+            yearly amounts when it was parsed, "url": estimate page, "cost",
+            "revenue", "costs", "revenues": what parse_cbo_summary found,
+            "net": net_cost of it}
+    """
+    def __init__(self, path=None, records=None):
+        """
+        Parameters:
+            path (str): file to load the store from and save it to
+            records (dict): records to start with, e.g. from a worker process
+        """
+        self.path = path
+        self.records = dict(records or {})
+        #CBO workers of one process record from several threads
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, bill_name):
+        return bill_name in self.records
+
+    def record(self, bill_name, text, source, year, current_year, estimate, url=None):
+        """Save a parsed summary
+
+        Parameters:
+            bill_name (str): bill name including the session it passed in
+            text (str): the summary that was parsed
+            source (str): "from_summary" or "from_pdf"
+            year (int): year the estimate was published
+            current_year (int): what parse_cbo_summary used as the current year
+            estimate (dict): what parse_cbo_summary returned
+            url (str): the estimate page
+        """
+        with self.lock:
+            self.records[bill_name] = dict(text=text, source=source, year=year, current_year=current_year,
+                                           url=url, net=net_cost(estimate), **estimate)
+
+    def update(self, records):
+        """Add records of another store, e.g. from a worker process"""
+        with self.lock:
+            self.records.update(records)
+
+    def bill_costs(self):
+        """Return bill name -> net cost estimate of every stored bill"""
+        return {bill_name:record["net"] for bill_name, record in self.records.items()}
+
+    def load(self, path=None):
+        """Read records saved by save, keeping any already in the store"""
+        with gzip.open(path or self.path, 'rt', encoding="utf-8") as f:
+            saved = json.load(f)
+        for bill_name, record in saved.items():
+            self.records.setdefault(bill_name, record)
+
+    def save(self, path=None):
+        """Write every record to a gzipped JSON file"""
+        path = path or self.path
+        with self.lock:
+            records = dict(self.records)
+        temp_path = "%s.%d.tmp" % (path, os.getpid())
+        with gzip.open(temp_path, 'wt', encoding="utf-8") as f:
+            json.dump(records, f)
+        os.replace(temp_path, path)
+
+def _reparse(summaries):
+    """Parse a chunk of (bill name, text, year, current year) in a worker
+    process of reparse"""
+    return [(bill_name, parse_cbo_summary(text, year, current_year))
+            for bill_name, text, year, current_year in summaries]
+
+def reparse(store, bill_names=None, workers=None, current_year=None):
+    """Parse the stored summaries again with the regexes in cbo_parser.py as
+    they are now
+
+    Parameters:
+        store (CboStore): the summaries from the last crawl
+        bill_names (list): bills to reparse, every stored bill by default
+        workers (int): processes to parse with, one per CPU by default
+        current_year (int): last year of yearly amounts with no end year; by
+            default the one each summary was parsed with, so only changes to
+            the parser show up in the diff
+
+    Returns:
+        (dict): bill name -> what parse_cbo_summary returned, with its "net"
+                cost
+    """
+    if bill_names is None:
+        bill_names = list(store.records)
+    summaries = [(bill_name, store.records[bill_name]["text"], store.records[bill_name]["year"],
+                  current_year or store.records[bill_name].get("current_year")) for bill_name in bill_names]
+    workers = min(workers or os.cpu_count() or 1, max(len(summaries), 1))
+    if workers <= 1:
+        parsed = _reparse(summaries)
+    else:
+        #A few large chunks per worker, since each summary takes milliseconds
+        chunk = -(-len(summaries)//(4*workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = [result for results in executor.map(_reparse, [summaries[i:i+chunk] for i in range(0, len(summaries), chunk)])
+                      for result in results]
+    estimates = dict()
+    for bill_name, estimate in parsed:
+        estimate["net"] = net_cost(estimate)
+        estimates[bill_name] = estimate
+    return estimates
+
+def diff(store, estimates):
+    """Compare reparsed estimates with the ones in the store
+
+    Parameters:
+        store (CboStore): the estimates of the last run
+        estimates (dict): what reparse returned
+
+    Returns:
+        (list): for every bill whose net cost or counted dollar strings
+                changed, a dictionary of "bill", the "old" and "new" net cost,
+                and the dollar strings that were "added" to or "removed" from
+                the costs and revenues
+    """
+    changes = list()
+    for bill_name, estimate in estimates.items():
+        old = store.records[bill_name]
+        change = {"bill":bill_name, "old":old["net"], "new":estimate["net"]}
+        for kind in ("costs", "revenues"):
+            change[kind + "_added"] = [amount for amount in estimate[kind] if amount not in old[kind]]
+            change[kind + "_removed"] = [amount for amount in old[kind] if amount not in estimate[kind]]
+        if change["old"] != change["new"] or any(change[kind + part] for kind in ("costs", "revenues")
+                                                  for part in ("_added", "_removed")):
+            changes.append(change)
+    return changes
+
+def apply(store, estimates):
+    """Replace the estimates in the store with reparsed ones, keeping the
+    summaries, so the next diff is against this run"""
+    with store.lock:
+        for bill_name, estimate in estimates.items():
+            store.records[bill_name].update(estimate)
+
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+    parser = argparse.ArgumentParser(description="Parse the stored CBO summaries again and show what changed")
+    parser.add_argument("--store", default="cbo_store.json.gz", help="store written by the last crawl")
+    parser.add_argument("--workers", type=int, default=None, help="processes, one per CPU by default")
+    parser.add_argument("--output", default=None, help="csv to write the changed bills to")
+    parser.add_argument("--save", action="store_true",
+                        help="keep the new estimates in the store and the checkpoints and rescore the members, "
+                             "like web_scraping.py --reparse-only")
+    parser.add_argument("--sessions", type=int, nargs=2, default=[105, 115], metavar=("FIRST", "LAST"),
+                        help="sessions of Congress the last run scored, for --save (default: 105 115)")
+    parser.add_argument("--checkpoints", default="checkpoints", help="checkpoints of the last run, for --save")
+    args = parser.parse_args()
+    store = CboStore(args.store)
+    estimates = reparse(store, workers=args.workers)
+    changes = pd.DataFrame(diff(store, estimates), columns=["bill", "old", "new", "costs_added", "costs_removed",
+                                                             "revenues_added", "revenues_removed"])
+    print(len(estimates), "bills reparsed,", len(changes), "changed")
+    if len(changes):
+        print(changes.to_string(index=False))
+    if args.output is not None:
+        changes.to_csv(args.output, index=False)
+    if args.save:
+        #The checkpoints, bill_costs.json and scores_data.csv are updated
+        #   too, or the next run would restore the old estimates
+        from web_scraping import reparse_pipeline
+        reparse_pipeline(list(range(args.sessions[0], args.sessions[1]+1)), args.checkpoints, store=store,
+                         estimates=estimates)
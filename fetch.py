@@ -0,0 +1,82 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: fetch.py
+Purpose: *Load static pages with plain HTTP requests instead of starting Chrome
+         *Keep a browser only for the pages that need JavaScript or a form
+          submission
+"""
+from urllib.parse import urlparse
+from page_cache import PageCache, LazyBrowser
+from metrics import METRICS
+
+class HttpBackend:
+    """Load pages with pooled, keep-alive HTTP requests through the page cache.
+    This is the right backend for any page whose HTML is served as is."""
+    def __init__(self, cache=None, ttl=None):
+        """
+        Parameters:
+            cache (PageCache): where to save and reuse pages
+            ttl (float): revalidate pages older than this many seconds instead
+                of the cache's ttl, e.g. to look for new roll calls
+        """
+        self.cache = cache if cache is not None else PageCache()
+        self.ttl = ttl
+
+    def page(self, url):
+        """Return the HTML (or XML) of a page"""
+        return self.cache.get(url, self.ttl)
+
+    def page_bytes(self, url):
+        """Return the body of a page as it was sent, e.g. for an XML parser
+        that reads the encoding from the document itself"""
+        return self.cache.get_bytes(url, self.ttl)[0]
+
+    def close(self):
+        """Nothing to clean up; connections are reused by the PoliteSession"""
+
+class BrowserBackend:
+    """Load pages in Chrome through the page cache. Chrome is only started the
+    first time a page isn't in the cache."""
+    def __init__(self, cache=None, factory=None):
+        """
+        Parameters:
+            cache (PageCache): where to save and reuse pages
+            factory (callable): returns a new WebDriver, webdriver.Chrome by
+                default
+        """
+        self.cache = cache if cache is not None else PageCache()
+        self.browser = LazyBrowser(factory)
+
+    def page(self, url):
+        """Return browser.page_source for a page"""
+        return self.cache.browser_page(self.browser, url)
+
+    def submit_form(self, key, url, submit):
+        """Return the page reached by filling in and submitting a form
+
+        The result is cached under key, since the URL of the form doesn't say
+        what was searched for.
+
+        Parameters:
+            key (str): cache key for the result, e.g. the form URL plus the
+                search terms
+            url (str): page with the form on it
+            submit (callable): takes the browser, fills in and submits the
+                form. Anything it raises is passed on to the caller.
+
+        Returns:
+            (str): browser.page_source after submitting the form
+        """
+        page_source = self.cache.lookup(key)
+        if page_source is None:
+            self.cache.session.wait(url)
+            with METRICS.timer("request", host=urlparse(url).netloc):
+                self.browser.get(url)
+                submit(self.browser)
+                page_source = self.browser.page_source
+            self.cache.store(key, page_source)
+        return page_source
+
+    def close(self):
+        self.browser.close()
@@ -0,0 +1,235 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: fri_models.py
+Purpose: *Compare the models of data_analysis.ipynb on the FRI dataset with
+          the same 7 folds and preprocessing for every model
+         *Fit the whole ridge path of every fold from one SVD and the lasso
+          path with warm starts, instead of refitting for every lambda
+         *Run folds and grid points on every core and return one table of
+          cross-validated MSEs
+"""
+import os
+import time
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from output import load_scores
+
+#Features of the full model, without "Democrat"
+FEATURES = ["Senator", "Republican", "Division_East South Central", "Division_Middle Atlantic", "Division_Mountain",
+            "Division_New England", "Division_Pacific", "Division_South Atlantic", "Division_West North Central",
+            "Division_West South Central", "Tenure", "Tenure_sq", "YOB"]
+#Features with the best AIC and BIC (see model_selection.py)
+FEW_FEATURES = ["Senator", "Republican", "Tenure", "Tenure_sq", "YOB"]
+#Lambdas of the ridge and lasso sweeps
+LAMBDAS = [10.0**k for k in range(-5, 6)]
+#Grid of the random forest and XGBoost searches
+TREE_GRID = {"n_estimators":[1000], "max_depth":[3, 4, 5, 6, 7, 8]}
+
+def load_fri(path="scores_data.parquet"):
+    """Read the FRI dataset and add the features the models use, the same
+    way data_analysis.ipynb does
+
+    Parameters:
+        path (str): scores table written by output.py, with the region and
+            division of every state
+
+    Returns:
+        (DataFrame): one row per Democrat or Republican with "Score" and the
+                     columns of FEATURES
+    """
+    df = load_scores(path, columns=["Position", "Party", "Tenure", "Score", "YOB", "Region", "Division"])
+    #Leave out members from states without a region, like the merge with regions.csv did
+    df = df[df["Region"].notna()]
+    df["Republican"] = 1*(df["Party"] == "R")
+    df["Senator"] = 1*(df["Position"] == "Sen")
+    df = pd.get_dummies(df, drop_first=True, columns=["Region", "Division"], dtype=int)
+    df["Tenure_sq"] = df["Tenure"] ** 2
+    return df[df["Party"] != "I"].reset_index(drop=True)
+
+def make_folds(n, k=7):
+    """Return the (train, test) indices of k folds of n rows, the folds
+    cross_val_score(cv=k) uses for a regression: consecutive and unshuffled"""
+    bounds = np.cumsum([0] + [n//k + (i < n % k) for i in range(k)])
+    rows = np.arange(n)
+    return [(np.concatenate([rows[:start], rows[stop:]]), rows[start:stop]) for start, stop in zip(bounds, bounds[1:])]
+
+class Fold:
+    """One fold with its training data centered, shared by every linear model
+
+    Attributes:
+        X, y (ndarray): centered training features and responses
+        X_mean, y_mean: what was subtracted, to put back the intercept
+        X_test, y_test (ndarray): test features and responses
+    """
+    def __init__(self, X, y, train, test):
+        self.X_mean, self.y_mean = X[train].mean(axis=0), y[train].mean()
+        self.X, self.y = X[train] - self.X_mean, y[train] - self.y_mean
+        self.X_test, self.y_test = X[test], y[test]
+        self._svd = None
+
+    def svd(self):
+        if self._svd is None:
+            self._svd = np.linalg.svd(self.X, full_matrices=False)
+        return self._svd
+
+    def mse(self, coefficients):
+        """Return the test MSE of each column of coefficients
+
+        Parameters:
+            coefficients (ndarray): p x m coefficients of m fits
+        """
+        intercepts = self.y_mean - self.X_mean @ coefficients
+        predictions = self.X_test @ coefficients + intercepts
+        return ((predictions - self.y_test[:, None])**2).mean(axis=0)
+
+def ridge_path(fold, lambdas):
+    """Return the p x m ridge coefficients of a fold for every lambda, the
+    same as sklearn's Ridge(lmbda), from one SVD of the fold"""
+    U, s, Vt = fold.svd()
+    Uty = U.T @ fold.y
+    shrink = s[:, None]/(s[:, None]**2 + np.asarray(lambdas)[None, :])
+    return Vt.T @ (shrink*Uty[:, None])
+
+def lasso_path_(fold, lambdas):
+    """Return the p x m lasso coefficients of a fold for every lambda, the
+    same as sklearn's Lasso(lmbda), fitting from the largest lambda down
+    and starting each fit from the last"""
+    from sklearn.linear_model import lasso_path
+    order = np.argsort(lambdas)[::-1]
+    alphas, coefficients, gaps = lasso_path(fold.X, fold.y, alphas=np.asarray(lambdas)[order])
+    path = np.empty_like(coefficients)
+    path[:, order] = coefficients
+    return path
+
+def ols(fold):
+    """Return the p x 1 least squares coefficients of a fold"""
+    return np.linalg.lstsq(fold.X, fold.y, rcond=None)[0][:, None]
+
+def cross_validate_path(X, y, folds, fit, workers=None):
+    """Return the mean test MSE of a path of linear models over the folds
+
+    Parameters:
+        X, y (ndarray): features and responses
+        folds (list): what make_folds returned, or Folds of X and y
+        fit (function): Fold -> p x m coefficients
+        workers (int): threads to fit the folds with
+
+    Returns:
+        (ndarray): m mean squared errors, like -cross_val_score(...).mean()
+    """
+    folds = [fold if isinstance(fold, Fold) else Fold(X, y, *fold) for fold in folds]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        errors = list(executor.map(lambda fold: fold.mse(fit(fold)), folds))
+    return np.mean(errors, axis=0)
+
+def _grid(param_grid):
+    """Return every combination of a GridSearchCV parameter grid, in its
+    order"""
+    from sklearn.model_selection import ParameterGrid
+    return list(ParameterGrid(param_grid))
+
+def grid_search(estimator, param_grid, X, y, folds, workers=None):
+    """Cross validate an estimator at every point of a grid, running every
+    (point, fold) at once instead of one fit at a time like GridSearchCV
+
+    Parameters:
+        estimator: sklearn style regressor
+        param_grid (dict): parameter -> values to try
+        X, y (ndarray): features and responses
+        folds (list): what make_folds returned
+        workers (int): threads to fit with; forests and XGBoost release the
+            GIL while they fit
+
+    Returns:
+        (list): (parameters, mean test MSE, mean test R^2) of every point of
+                the grid. GridSearchCV's default scorer is the R^2, so pick
+                the best point by it to get the same best_params_
+    """
+    from sklearn.base import clone
+    from sklearn.metrics import r2_score
+    points = _grid(param_grid)
+    def fit(task):
+        params, (train, test) = task
+        model = clone(estimator).set_params(**params).fit(X[train], y[train])
+        predictions = model.predict(X[test])
+        return np.mean((predictions - y[test])**2), r2_score(y[test], predictions)
+    tasks = [(params, fold) for params in points for fold in folds]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        scores = np.array(list(executor.map(fit, tasks))).reshape(len(points), len(folds), 2)
+    errors, r2s = scores.mean(axis=1).T
+    return list(zip(points, errors, r2s))
+
+def compare_models(df, features=FEATURES, few_features=FEW_FEATURES, lambdas=LAMBDAS, tree_grid=TREE_GRID,
+                   k=7, trees=True, workers=None, random_state=0):
+    """Cross validate every model of data_analysis.ipynb on the same folds
+
+    Parameters:
+        df (DataFrame): what load_fri returned
+        features (list): features of the full models
+        few_features (list): features of the smaller OLS
+        lambdas (list): lambdas of the ridge and lasso sweeps
+        tree_grid (dict): grid of the random forest and XGBoost searches
+        k (int): number of folds
+        trees (bool): whether to include the random forest and XGBoost
+        workers (int): threads, every core by default
+        random_state (int): seed of the random forest and XGBoost
+
+    Returns:
+        (DataFrame): "model", "params", "features", "mse" and "seconds" of the
+                     best settings of every model
+    """
+    workers = workers or os.cpu_count()
+    X = df[list(features)].to_numpy(dtype=float)
+    y = df["Score"].to_numpy(dtype=float)
+    folds = make_folds(len(y), k)
+    #Center every fold once for OLS, ridge and lasso
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        shared = list(executor.map(lambda fold: Fold(X, y, *fold), folds))
+    rows = list()
+    def add(model, params, model_features, mse, start):
+        rows.append({"model":model, "params":params, "features":list(model_features), "mse":float(mse),
+                     "seconds":time.perf_counter() - start})
+
+    start = time.perf_counter()
+    add("OLS", {}, features, cross_validate_path(X, y, shared, ols, workers)[0], start)
+    start = time.perf_counter()
+    few = [list(features).index(feature) for feature in few_features]
+    add("OLS", {}, few_features, cross_validate_path(X[:, few], y, folds, ols, workers)[0], start)
+    for name, path, model in (("Ridge", ridge_path, "Ridge"), ("Lasso", lasso_path_, "Lasso")):
+        start = time.perf_counter()
+        errors = cross_validate_path(X, y, shared, lambda fold: path(fold, lambdas), workers)
+        best = int(np.argmin(errors))
+        #Refit on every row for the features the best lambda keeps
+        whole = Fold(X, y, np.arange(len(y)), np.arange(0))
+        coefficients = path(whole, [lambdas[best]])[:, 0]
+        add(name, {"alpha":lambdas[best]}, np.asarray(features)[coefficients != 0], errors[best], start)
+
+    if trees:
+        from sklearn.ensemble import RandomForestRegressor
+        #Seeded so the same max_depth is picked on every run
+        estimators = [("Random Forest", RandomForestRegressor(random_state=random_state))]
+        if importlib.util.find_spec("xgboost") is not None:
+            from xgboost import XGBRegressor
+            estimators.append(("XGBoost", XGBRegressor(n_jobs=1, random_state=random_state)))
+        for name, estimator in estimators:
+            start = time.perf_counter()
+            #Best mean R^2 like gs.best_params_ in the notebook, reported by its MSE
+            params, mse, r2 = max(grid_search(estimator, tree_grid, X, y, folds, workers), key=lambda result: result[2])
+            add(name, params, features, mse, start)
+    return pd.DataFrame(rows, columns=["model", "params", "features", "mse", "seconds"])
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Cross validate the FRI models")
+    parser.add_argument("--data", default="scores_data.parquet", help="scores table written by output.py")
+    parser.add_argument("--no-trees", action="store_true", help="skip the random forest and XGBoost")
+    parser.add_argument("--workers", type=int, default=None, help="threads, every core by default")
+    parser.add_argument("--output", default=None, help="csv to write the comparison table to")
+    args = parser.parse_args()
+    table = compare_models(load_fri(args.data), trees=not args.no_trees, workers=args.workers)
+    print(table.to_string(index=False))
+    if args.output is not None:
+        table.to_csv(args.output, index=False)
@@ -0,0 +1,165 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: member_index.py
+Purpose: *Look up members of Congress from the rows of a roll call vote without
+          scanning every member for every row
+         *Keep track of the rows that can't be matched to exactly one member
+"""
+from collections import defaultdict, namedtuple
+from vote_store import VoteStore
+from metrics import METRICS
+
+#How each chamber writes a vote on a roll call page and the vote type it is
+#   stored as
+VOTE_TYPES = {"Yea":"Yeas", "Nay":"Nays", "Not Voting":"Not Voting"}
+
+#One member of Congress serving in one session, as the bioguide search lists
+#   them. position is 'Rep' or 'Sen' and member_id is the bioguide id.
+MemberRecord = namedtuple("MemberRecord", ["key", "position", "state", "party", "birth", "session", "member_id"])
+
+def add_member(members, record):
+    """Add a MemberRecord to a Representatives or Senators dictionary, or add
+    its session to the member already there
+
+    Parameters:
+        members (dict): member key -> State, Party, Sessions, ID, Position and
+            Birth, like quick_members_of_congress returns
+        record (MemberRecord): one member serving in one session
+    """
+    if record.key in members:
+        members[record.key]["Sessions"].append(record.session)
+    else:
+        members[record.key] = {"State":record.state, "Party":record.party, "Sessions":[record.session],
+                               "ID":record.member_id, "Position":record.position, "Birth":record.birth}
+
+def last_name(key):
+    """Return the normalized last name from a member key or a roll call name
+
+    Parameters:
+        key (str): "Last Name, First Name, Title" or just "Last Name"
+
+    Returns:
+        (str): the last name in lowercase, so that "Van Hollen" from a roll
+               call matches "Van hollen" from the bioguide search
+    """
+    return key.split(sep=',')[0].strip().lower()
+
+class MemberIndex:
+    """Index the members returned by quick_members_of_congress so each row of a
+    roll call can be matched to a member in constant time.
+
+    Members are indexed by their bioguide id when they have one, and by (last
+    name, party, state, session). There is a second index by (last name,
+    party, session) for rows without a state.
+
+    Attributes:
+        members (dict): the Representatives or Senators dictionary
+        votes (VoteStore): where the votes of the roll call rows are recorded
+        ids (dict): bioguide id -> member key
+        index (dict): (last name, party, state, session) -> member keys
+        fallback (dict): (last name, party, session) -> member keys
+        unresolved (list): (bill, session, row) for rows matching no member
+        ambiguous (list): (bill, session, row, keys) for rows matching more
+            than one member
+    """
+    def __init__(self, members, votes=None):
+        self.members = members
+        self.votes = votes if votes is not None else VoteStore()
+        self.ids = dict()
+        self.index = defaultdict(list)
+        self.fallback = defaultdict(list)
+        self.unresolved = list()
+        self.ambiguous = list()
+        for key, member in members.items():
+            self.add(key, member)
+
+    def add(self, key, member):
+        """Add a member of Congress to the index
+
+        Parameters:
+            key (str): "Last Name, First Name, Title"
+            member (dict): must include State, Party and Sessions, and may
+                include the bioguide ID
+        """
+        if member.get("ID"):
+            self.ids[member["ID"]] = key
+        last = last_name(key)
+        for session in member["Sessions"]:
+            keys = self.index[(last, member["Party"], member["State"], session)]
+            if key not in keys:
+                keys.append(key)
+            keys = self.fallback[(last, member["Party"], session)]
+            if key not in keys:
+                keys.append(key)
+
+    def resolve(self, name, party, session, state=None, bill=None, row=None):
+        """Find the member of Congress for one row of a roll call vote
+
+        Parameters:
+            name (str): last name as written on the roll call
+            party (str): 'D', 'R' or 'I'
+            session (int): session of Congress the vote was held in
+            state (str): two letter state code, or None if the row has none
+            bill (str): bill name the vote was for, used in the report
+            row (str): raw text of the row, used in the report
+
+        Returns:
+            (str): key of the member in the members dict, or None if the row
+                   matches no member or more than one member
+        """
+        if state is None:
+            keys = self.fallback.get((last_name(name), party, session), [])
+        else:
+            keys = self.index.get((last_name(name), party, state, session), [])
+        if len(keys) == 1:
+            return keys[0]
+        if len(keys) == 0:
+            self.unresolved.append((bill, session, row))
+            METRICS.count("members_unresolved")
+        else:
+            self.ambiguous.append((bill, session, row, keys))
+            METRICS.count("members_ambiguous")
+        return None
+
+    def record_vote(self, key, vote, bill):
+        """Record a member's Yea, Nay or Not Voting on a bill in the VoteStore
+
+        Parameters:
+            key (str): member key returned by resolve
+            vote (str): "Yea", "Nay" or "Not Voting"; anything else is ignored
+            bill (str): bill name including the session it passed in
+        """
+        if key is not None and vote in VOTE_TYPES:
+            self.votes.add(key, bill, VOTE_TYPES[vote])
+
+    def record(self, record):
+        """Find the member of a VoteRecord and record their vote
+
+        Parameters:
+            record (VoteRecord): one member's vote on a roll call. House
+                records are matched by bioguide id; Senate records carry an
+                LIS id instead, so they're matched by name, party and state.
+
+        Returns:
+            (str): key of the member, or None if the record matches no member
+                   or more than one
+        """
+        key = self.ids.get(record.member_id)
+        if key is None:
+            key = self.resolve(record.name, record.party, record.session, record.state, record.bill, record)
+            if key is not None:
+                METRICS.count("members_matched_by_name")
+        else:
+            METRICS.count("members_matched_by_id")
+        self.record_vote(key, record.vote, record.bill)
+        return key
+
+    def report(self, chamber):
+        """Print how many roll call rows couldn't be matched to one member
+
+        Parameters:
+            chamber (str): "House" or "Senate", used in the printout
+        """
+        print(chamber, "roll call rows with no matching member:", len(self.unresolved))
+        print(chamber, "roll call rows matching several members:", len(self.ambiguous))
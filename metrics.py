@@ -0,0 +1,304 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: metrics.py
+Purpose: *Time every stage of the scraper: requests to each website, parsing,
+          regexes and pdf extraction, in histograms instead of one total
+         *Count bytes fetched, cache hits and how many members and bills were
+          matched or missed
+         *Export everything as JSON or CSV, and profile a run with cProfile,
+          including the stage threads and worker processes
+"""
+import io
+import csv
+import json
+import time
+import pstats
+import cProfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+#Upper bounds in seconds of the histogram buckets. The last bucket holds
+#   everything slower than a minute.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+class Histogram:
+    """How many times something took each amount of time
+
+    Attributes:
+        counts (list): number of observations in each of BUCKETS
+        count (int): number of observations
+        total, low, high (float): sum, minimum and maximum in seconds
+    """
+    def __init__(self):
+        self.counts = [0]*len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.low, self.high = float("inf"), 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.low = min(self.low, seconds)
+        self.high = max(self.high, seconds)
+
+    def merge(self, other):
+        """Add the observations of another Histogram"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.low = min(self.low, other.low)
+        self.high = max(self.high, other.high)
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket holding the q-th quantile, or
+        the maximum if that's smaller"""
+        if self.count == 0:
+            return None
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= q*self.count:
+                return min(bound, self.high)
+        return self.high
+
+    def to_dict(self):
+        return {"count":self.count, "total":self.total,
+                "min":self.low if self.count else None, "max":self.high if self.count else None,
+                "p50":self.quantile(0.5), "p90":self.quantile(0.9), "p99":self.quantile(0.99),
+                "buckets":self.counts}
+
+    @classmethod
+    def from_dict(cls, saved):
+        histogram = cls()
+        histogram.counts = list(saved["buckets"])
+        histogram.count = saved["count"]
+        histogram.total = saved["total"]
+        if histogram.count:
+            histogram.low, histogram.high = saved["min"], saved["max"]
+        return histogram
+
+class Metrics:
+    """Timings and counters of a run, each kept per stage and per website.
+
+    The stage is whatever the current thread is running (see stage), so
+    functions deep in the scraper don't need to be told which stage they're
+    in. Safe to share between threads; worker processes keep their own and
+    send it back with to_dict to be merged.
+
+    Attributes:
+        timings (dict): (name, stage, host) -> Histogram
+        counters (dict): (name, stage, host) -> int
+    """
+    def __init__(self):
+        self.timings = dict()
+        self.counters = dict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def current_stage(self):
+        return getattr(self.local, "stage", None)
+
+    def set_stage(self, name):
+        """Attribute everything this thread records from now on to a stage,
+        e.g. in a worker process doing part of a stage"""
+        self.local.stage = name
+
+    @contextmanager
+    def stage(self, name):
+        """Attribute everything recorded by this thread inside the with block
+        to a stage, e.g. "House" or "CBO" """
+        previous = self.current_stage()
+        self.local.stage = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.local.stage = previous
+            self.observe("stage", time.perf_counter() - start, stage=name)
+
+    def _key(self, name, stage, host):
+        return (name, stage if stage is not None else self.current_stage(), host)
+
+    def observe(self, name, seconds, stage=None, host=None):
+        """Record how long something took
+
+        Parameters:
+            name (str): what was timed, e.g. "request", "parse", "regex" or
+                "pdf"
+            seconds (float): how long it took
+            stage (str): the stage, the current thread's stage by default
+            host (str): the website, if it was a request
+        """
+        key = self._key(name, stage, host)
+        with self.lock:
+            if key not in self.timings:
+                self.timings[key] = Histogram()
+            self.timings[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, name, stage=None, host=None):
+        """Time the with block, like observe"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, stage, host)
+
+    def count(self, name, n=1, stage=None, host=None):
+        """Add n to a counter, e.g. "cache_hits", "bytes" or "bills_no_report" """
+        key = self._key(name, stage, host)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def merge(self, saved):
+        """Add the metrics of another process, as returned by its to_dict"""
+        with self.lock:
+            for row in saved["timings"]:
+                key = (row["name"], row["stage"], row["host"])
+                histogram = Histogram.from_dict(row)
+                if key in self.timings:
+                    self.timings[key].merge(histogram)
+                else:
+                    self.timings[key] = histogram
+            for row in saved["counters"]:
+                key = (row["name"], row["stage"], row["host"])
+                self.counters[key] = self.counters.get(key, 0) + row["value"]
+
+    def reset(self):
+        with self.lock:
+            self.timings.clear()
+            self.counters.clear()
+
+    def to_dict(self):
+        """Return every timing and counter as lists json can write"""
+        with self.lock:
+            timings = [dict(name=name, stage=stage, host=host, **histogram.to_dict())
+                       for (name, stage, host), histogram in sorted(self.timings.items(), key=_sort_key)]
+            counters = [{"name":name, "stage":stage, "host":host, "value":value}
+                        for (name, stage, host), value in sorted(self.counters.items(), key=_sort_key)]
+        return {"timings":timings, "counters":counters}
+
+    def save(self, path):
+        """Write the metrics to a .json file, or a .csv file with one row per
+        timing or counter"""
+        saved = self.to_dict()
+        if path.endswith(".csv"):
+            columns = ["kind", "name", "stage", "host", "value", "count", "total", "min", "max", "p50", "p90", "p99"]
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, columns, extrasaction="ignore")
+                writer.writeheader()
+                for row in saved["timings"]:
+                    writer.writerow(dict(row, kind="timing"))
+                for row in saved["counters"]:
+                    writer.writerow(dict(row, kind="counter"))
+        else:
+            with open(path, 'w') as f:
+                json.dump(saved, f, indent=1)
+
+    def report(self):
+        """Print the total time and count of every timing, slowest first, and
+        every counter"""
+        with self.lock:
+            timings = sorted(self.timings.items(), key=lambda item: -item[1].total)
+            counters = sorted(self.counters.items(), key=_sort_key)
+        for (name, stage, host), histogram in timings:
+            print("%-10s %-8s %-24s %8d  %10.1fs  p50 %.3fs  p99 %.3fs" %
+                  (name, stage or '', host or '', histogram.count, histogram.total,
+                   histogram.quantile(0.5), histogram.quantile(0.99)))
+        for (name, stage, host), value in counters:
+            print("%-20s %-8s %-24s %10d" % (name, stage or '', host or '', value))
+
+def _sort_key(item):
+    return tuple(part or '' for part in item[0])
+
+#The metrics every module records into
+METRICS = Metrics()
+
+class _SavedStats:
+    """cProfile stats sent back by another process, in the form
+    pstats.Stats.add reads"""
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+class Profiles:
+    """cProfile stats of every thread and process of a profiled run
+
+    cProfile only traces the thread that enables it, so while a run is
+    profiled each stage thread and worker process profiles itself and adds
+    its stats here.
+
+    Attributes:
+        enabled (bool): whether a profiled run is going on
+        stats (Stats): pstats of everything added so far, or None
+    """
+    def __init__(self):
+        self.enabled = False
+        self.stats = None
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def thread(self):
+        """Profile the with block in this thread if a run is being profiled"""
+        if not self.enabled:
+            yield None
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            self.add(profiler)
+
+    def add(self, profiler):
+        """Add the stats of a cProfile.Profile, or of another process as
+        returned by its to_dict"""
+        if isinstance(profiler, dict):
+            profiler = _SavedStats(profiler)
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+    def to_dict(self):
+        """Return the stats to send to another process"""
+        with self.lock:
+            return self.stats.stats if self.stats is not None else dict()
+
+    def reset(self):
+        with self.lock:
+            self.stats = None
+
+#The profiles of every thread of this process
+PROFILES = Profiles()
+
+@contextmanager
+def profile(path=None, top=30):
+    """Run the with block under cProfile, along with every stage run by
+    run_stages and every CBO worker process it starts
+
+    Parameters:
+        path (str): file to dump the merged stats to for pstats or snakeviz,
+            or None
+        top (int): how many functions to print, by cumulative time
+    """
+    PROFILES.reset()
+    PROFILES.enabled = True
+    try:
+        with PROFILES.thread() as profiler:
+            yield profiler
+    finally:
+        PROFILES.enabled = False
+        if path is not None:
+            PROFILES.stats.dump_stats(path)
+        output = io.StringIO()
+        PROFILES.stats.stream = output
+        PROFILES.stats.sort_stats("cumulative").print_stats(top)
+        print(output.getvalue())
@@ -0,0 +1,135 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: model_selection.py
+Purpose: *Find the subsets of features with the best AIC and BIC for an OLS
+          regression of the FRI without fitting a statsmodels OLS for every
+          subset
+         *Compute the residual sum of squares of every subset from the Gram
+          matrix X'X and X'y, solving all subsets of the same size in one batch
+"""
+from itertools import combinations
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+def gram(X, y):
+    """Return the centered Gram matrix X'X, X'y and y'y
+
+    Every model has an intercept, so centering the columns gives the same
+    residuals as adding a constant and keeps the matrix well conditioned
+    when the columns are on very different scales (dummies, years, FRIs in
+    the trillions).
+
+    Parameters:
+        X (ndarray): n x p matrix of features
+        y (ndarray): n responses
+
+    Returns:
+        (ndarray): p x p matrix X'X of the centered features
+        (ndarray): p vector X'y
+        (float): y'y of the centered response
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    X = X - X.mean(axis=0)
+    y = y - y.mean()
+    return X.T @ X, X.T @ y, float(y @ y)
+
+def subset_rss(XtX, Xty, yty, subsets):
+    """Return the residual sum of squares of the OLS regression with an
+    intercept on each subset of features
+
+    Parameters:
+        XtX, Xty, yty: what gram returned
+        subsets (ndarray): m x k column indices, all subsets the same size
+
+    Returns:
+        (ndarray): m residual sums of squares
+    """
+    subsets = np.asarray(subsets)
+    G = XtX[subsets[:, :, None], subsets[:, None, :]]
+    b = Xty[subsets]
+    #Collinear subsets are solved by least squares like statsmodels' pinv, so
+    #   they still get the smallest residuals they can
+    if (np.linalg.matrix_rank(G) == subsets.shape[1]).all():
+        coefficients = np.linalg.solve(G, b[:, :, None])[:, :, 0]
+    else:
+        coefficients = np.stack([np.linalg.lstsq(G_i, b_i, rcond=None)[0] for G_i, b_i in zip(G, b)])
+    return yty - np.einsum("ij,ij->i", coefficients, b)
+
+def information_criteria(rss, n, k):
+    """Return statsmodels' OLS AIC and BIC for residual sums of squares
+
+    Parameters:
+        rss (ndarray): residual sums of squares
+        n (int): number of observations
+        k (int): number of features, not counting the intercept
+    """
+    llf = -n/2*np.log(2*np.pi) - n/2*np.log(rss/n) - n/2
+    return -2*llf + 2*(k + 1), -2*llf + np.log(n)*(k + 1)
+
+def all_subsets(X, y, features=None, workers=None):
+    """Compute the RSS, AIC and BIC of the OLS regression on every non-empty
+    subset of the features, in the order itertools.combinations gives them
+    one size at a time
+
+    Parameters:
+        X (DataFrame or ndarray): n x p features
+        y (Series or ndarray): n responses
+        features (list): names of the columns, X.columns by default
+        workers (int): threads to solve the subset sizes with
+
+    Returns:
+        (DataFrame): "features" (tuple), "size", "rss", "aic" and "bic" of
+                     every subset
+    """
+    if features is None:
+        features = list(X.columns) if hasattr(X, "columns") else list(range(np.shape(X)[1]))
+    features = np.asarray(features).tolist()
+    n = len(y)
+    XtX, Xty, yty = gram(X, y)
+    def evaluate(size):
+        subsets = np.array(list(combinations(range(len(features)), size)))
+        rss = subset_rss(XtX, Xty, yty, subsets)
+        aic, bic = information_criteria(rss, n, size)
+        return subsets, rss, aic, bic
+    sizes = range(1, len(features) + 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(evaluate, sizes))
+    rows = list()
+    for size, (subsets, rss, aic, bic) in zip(sizes, results):
+        for subset, subset_rss_, subset_aic, subset_bic in zip(subsets, rss, aic, bic):
+            rows.append((tuple(features[i] for i in subset), size, subset_rss_, subset_aic, subset_bic))
+    return pd.DataFrame(rows, columns=["features", "size", "rss", "aic", "bic"])
+
+def best_subsets(X, y, features=None, smallest_aic=np.inf, smallest_bic=np.inf, workers=None):
+    """Find the subsets of features with the smallest AIC and BIC
+
+    Ties go to the subset that comes first in the order of all_subsets, and
+    a subset only wins if it beats the starting AIC or BIC, the same as the
+    exhaustive search in data_analysis.ipynb.
+
+    Parameters:
+        X (DataFrame or ndarray): n x p features
+        y (Series or ndarray): n responses
+        features (list): names of the columns, X.columns by default
+        smallest_aic, smallest_bic (float): what a subset has to beat; every
+            feature is the best subset if nothing does
+        workers (int): threads to solve the subset sizes with
+
+    Returns:
+        (dict): "aic_subset", "aic", "bic_subset", "bic" and "table", what
+                all_subsets returned
+    """
+    table = all_subsets(X, y, features, workers)
+    every_feature = list(table["features"].iloc[-1])
+    best = {"table":table}
+    for criterion, smallest in (("aic", smallest_aic), ("bic", smallest_bic)):
+        #argmin returns the first of equal values, like a strict < in a loop
+        i = int(np.argmin(table[criterion].values))
+        if table[criterion].iloc[i] < smallest:
+            best[criterion + "_subset"], best[criterion] = list(table["features"].iloc[i]), table[criterion].iloc[i]
+        else:
+            best[criterion + "_subset"], best[criterion] = every_feature, smallest
+    return best
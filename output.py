@@ -0,0 +1,168 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: output.py
+Purpose: *Build the scores table in one pass over the members, with a fixed
+          schema and a stable id for every member
+         *Join the region and division of each state from regions.csv once,
+          when the scores are written, instead of in every notebook
+         *Write Parquet (and scores_data.csv as before), update only the rows
+          of an incremental run, and load only the columns that are needed
+         *Save the votes and net cost estimates behind the scores, for
+          score_service.py
+"""
+import os
+import json
+import importlib.util
+import pandas as pd
+
+#Columns of scores_data.csv, in the order create_csv has always written them
+CSV_COLUMNS = ["Name", "Position", "Party", "State", "Tenure", "Score", "YOB"]
+#Every column of the scores table and its pandas type
+SCHEMA = {"member_id":"string", "Name":"string", "Position":"category", "Party":"category",
+          "State":"category", "Tenure":"int16", "Score":"float64", "YOB":"int16",
+          "Region":"category", "Division":"category"}
+#Rows are the same member when these match
+PARQUET_KEYS = ["member_id"]
+CSV_KEYS = ["Name", "Position"]
+#Where write_votes saves each chamber's VoteStore and the net cost estimates
+HOUSE_VOTES_PATH = "house_votes.npz"
+SENATE_VOTES_PATH = "senate_votes.npz"
+BILL_COSTS_PATH = "bill_costs.json"
+
+def member_id(key, member):
+    """Return the id of a member that stays the same from run to run: their
+    bioguide id, or their position and key for members found before the ids
+    were saved"""
+    return member.get("ID") or member["Position"] + ':' + key
+
+def have_pyarrow():
+    """Return whether Parquet files can be written"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+def arrow_schema():
+    """Return the Parquet schema of the scores table"""
+    import pyarrow as pa
+    category = pa.dictionary(pa.int8(), pa.string())
+    return pa.schema([("member_id", pa.string()), ("Name", pa.string()), ("Position", category),
+                      ("Party", category), ("State", category), ("Tenure", pa.int16()),
+                      ("Score", pa.float64()), ("YOB", pa.int16()), ("Region", category),
+                      ("Division", category)])
+
+def load_regions(path="regions.csv"):
+    """Return state code -> (region, division) from regions.csv, or an empty
+    dictionary if there's no such file"""
+    if not os.path.exists(path):
+        return dict()
+    regions = pd.read_csv(path, usecols=["State Code", "Region", "Division"])
+    return {code:(region, division) for code, region, division in regions.itertuples(index=False)}
+
+def scores_frame(Representatives, Senators, regions="regions.csv", affected=None):
+    """Build the scores table from the members, scored by assign_scores
+
+    Parameters:
+        Representatives (dict): dictionary of Representatives with scores
+        Senators (dict): dictionary of Senators with scores
+        regions (str or dict): regions.csv, or what load_regions returned
+        affected (set): only include these (name, position), or everyone if
+            None
+
+    Returns:
+        (DataFrame): one row per member with the columns of SCHEMA, House
+                     first like scores_data.csv
+    """
+    if not isinstance(regions, dict):
+        regions = load_regions(regions)
+    rows = list()
+    for members in (Representatives, Senators):
+        for key, member in members.items():
+            if affected is not None and (key, member["Position"]) not in affected:
+                continue
+            region, division = regions.get(member["State"], (None, None))
+            rows.append((member_id(key, member), key, member["Position"], member["Party"], member["State"],
+                         len(member["Sessions"]), member["score"], member["Birth"], region, division))
+    return pd.DataFrame.from_records(rows, columns=list(SCHEMA)).astype(SCHEMA)
+
+def write_scores(frame, path):
+    """Write the scores table to a .parquet file with the full schema, or to a
+    .csv file with the columns of scores_data.csv"""
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(frame[list(SCHEMA)], schema=arrow_schema(), preserve_index=False)
+        pq.write_table(table, path)
+    else:
+        frame[CSV_COLUMNS].to_csv(path, index=False)
+
+def load_scores(path="scores_data.parquet", columns=None, regions="regions.csv"):
+    """Read the scores table, only reading the columns asked for
+
+    The .parquet file is only written when the scraper runs, so if it's
+    missing the scores_data.csv next to it is read instead. A csv has no
+    regions, so they are joined from regions.csv by state.
+
+    Parameters:
+        path (str): a .parquet file written by write_scores, or a csv
+        columns (list): columns to read, or every column if None
+        regions (str or dict): regions.csv, or what load_regions returned
+
+    Returns:
+        (DataFrame)
+    """
+    csv_path = os.path.splitext(path)[0] + ".csv"
+    if path.endswith(".parquet") and (os.path.exists(path) or not os.path.exists(csv_path)):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns).to_pandas()
+    wanted = list(SCHEMA) if columns is None else columns
+    joined = [column for column in ("Region", "Division") if column in wanted]
+    #scores_data.csv from before write_scores starts with the unnamed index
+    #   pandas wrote
+    frame = pd.read_csv(csv_path, usecols=lambda column: column in wanted or (joined and column == "State"))
+    joined = [column for column in joined if column not in frame.columns]
+    if joined:
+        if not isinstance(regions, dict):
+            regions = load_regions(regions)
+        for i, column in enumerate(("Region", "Division")):
+            if column in joined:
+                frame[column] = frame["State"].map({state:region[i] for state, region in regions.items()})
+    if columns is not None:
+        frame = frame[columns]
+    return frame.astype({column:SCHEMA[column] for column in frame.columns if column != "member_id"})
+
+def upsert_scores(frame, path):
+    """Replace the rows of the members in frame and add the members who
+    aren't in the file yet, keeping every other row where it is
+
+    Parameters:
+        frame (DataFrame): rows from scores_frame
+        path (str): .parquet file matched on member_id, or csv matched on
+            name and position
+    """
+    if not os.path.exists(path):
+        write_scores(frame, path)
+        return
+    keys = PARQUET_KEYS if path.endswith(".parquet") else CSV_KEYS
+    columns = list(SCHEMA) if path.endswith(".parquet") else CSV_COLUMNS
+    #Compare and copy plain values, then put the schema back when writing
+    old = load_scores(path)[columns].astype(object).set_index(keys)
+    new = frame[columns].astype(object).set_index(keys)
+    common = new.index.intersection(old.index)
+    old.loc[common, new.columns] = new.loc[common]
+    added = new.loc[~new.index.isin(old.index)]
+    result = pd.concat([old, added]).reset_index()[columns]
+    write_scores(result.astype({column:SCHEMA[column] for column in columns}), path)
+
+def write_votes(house_votes, senate_votes, bill_costs, house_path=HOUSE_VOTES_PATH, senate_path=SENATE_VOTES_PATH,
+                bill_costs_path=BILL_COSTS_PATH):
+    """Save the votes of both chambers and the net cost estimate of every bill,
+    so the scores can be broken down by bill without running the scraper
+
+    Parameters:
+        house_votes, senate_votes (VoteStore): each chamber's votes
+        bill_costs (dict): bill name -> net cost estimate
+    """
+    house_votes.save(house_path)
+    senate_votes.save(senate_path)
+    with open(bill_costs_path + ".tmp", 'w') as f:
+        json.dump(bill_costs, f)
+    os.replace(bill_costs_path + ".tmp", bill_costs_path)
@@ -0,0 +1,278 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: page_cache.py
+Purpose: *Keep a copy on disk of every page the scrapers download so a rerun
+          doesn't have to crawl congress.gov, senate.gov, clerk.house.gov and
+          cbo.gov again
+         *Revalidate stale pages with ETag/Last-Modified instead of
+          downloading them again
+         *Serve pages only from disk in offline mode so the parsers can be run
+          without a network connection
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+import requests
+from scheduler import PoliteSession
+from metrics import METRICS
+
+#Pages older than this are revalidated with the server before they are used
+DEFAULT_TTL = 30*24*60*60
+
+class CacheMiss(KeyError):
+    """Raised in offline mode when a page was never saved to the cache"""
+
+def _digest(data):
+    """Return the sha256 hex digest of a str or bytes"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+class PageCache:
+    """Content-addressed page cache on disk.
+
+    The body of every page is saved once under objects/ by the sha256 of its
+    content, and entries/ maps each URL (or form search key) to the body along
+    with when it was fetched and the ETag and Last-Modified headers the server
+    sent.
+
+    Attributes:
+        directory (str): where the cache lives on disk
+        ttl (float): seconds a page is used without asking the server again
+        offline (bool): only serve pages from the cache
+        session (PoliteSession): downloads pages at each website's polite rate
+        hits, misses (int): how many pages came from disk or the network
+    """
+    def __init__(self, directory="page_cache", ttl=DEFAULT_TTL, offline=False, session=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.offline = offline
+        self.session = session if session is not None else PoliteSession()
+        self.hits, self.misses = 0, 0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "entries"), exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, "entries", _digest(key) + ".json")
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.directory, "objects", content_hash[:2], content_hash)
+
+    def entry(self, key):
+        """Return the saved metadata for a key, or None if it isn't cached"""
+        try:
+            with open(self._entry_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_entry(self, key, entry):
+        path = self._entry_path(key)
+        #Write to a temporary file first so a crash never leaves half an entry.
+        #   Stages run in parallel threads and processes, so each thread gets
+        #   its own temporary file.
+        temp_path = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+        with open(temp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+
+    def _count(self, hit, key):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        METRICS.count("cache_hits" if hit else "cache_misses", host=urlparse(key).netloc)
+
+    def read_bytes(self, key):
+        """Return the cached body for a key as bytes whether or not it is
+        fresh, or None if it isn't cached"""
+        entry = self.entry(key)
+        if entry is None:
+            return None
+        try:
+            with open(self._object_path(entry["hash"]), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def read(self, key):
+        """Return the cached body for a key as text whether or not it is fresh,
+        or None if it isn't cached"""
+        entry = self.entry(key)
+        content = self.read_bytes(key)
+        if content is None:
+            return None
+        return content.decode(entry.get("encoding") or "utf-8", errors="replace")
+
+    def store(self, key, content, etag=None, last_modified=None, encoding=None):
+        """Save a page to the cache
+
+        Parameters:
+            key (str): URL of the page, or a made-up key for pages reached by
+                submitting a form
+            content (str or bytes): body of the page
+            etag (str): ETag header sent with the page
+            last_modified (str): Last-Modified header sent with the page
+            encoding (str): how to decode the bytes back into text
+        """
+        if isinstance(content, str):
+            content, encoding = content.encode("utf-8"), "utf-8"
+        content_hash = _digest(content)
+        path = self._object_path(content_hash)
+        #Identical pages are only written once
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+            with open(temp_path, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        self._save_entry(key, {"key":key, "hash":content_hash, "fetched":time.time(),
+                               "etag":etag, "last_modified":last_modified,
+                               "encoding":encoding})
+
+    def is_fresh(self, entry, ttl=None):
+        """Return True if a cached entry is young enough to use as is
+
+        Parameters:
+            entry (dict): saved metadata from entry()
+            ttl (float): seconds to use instead of the cache's ttl, e.g. to
+                check an index page for new links more often
+        """
+        return time.time() - entry["fetched"] < (self.ttl if ttl is None else ttl)
+
+    def lookup(self, key):
+        """Return the cached text for a key if it can be used without the
+        network, or None if it has to be fetched again
+
+        Raises:
+            CacheMiss: in offline mode if the key was never cached
+        """
+        entry = self.entry(key)
+        if entry is not None and (self.offline or self.is_fresh(entry)):
+            text = self.read(key)
+            if text is not None:
+                self._count(True, key)
+                return text
+        if self.offline:
+            raise CacheMiss(key)
+        return None
+
+    def get_bytes(self, url, ttl=None):
+        """Download a page through the cache
+
+        Fresh pages come straight from disk. Stale pages are revalidated with an
+        If-None-Match/If-Modified-Since request, and only downloaded again if
+        the server says they changed.
+
+        Parameters:
+            url (str): page to download
+            ttl (float): seconds to use instead of the cache's ttl
+
+        Returns:
+            (bytes): body of the page
+            (str): encoding of the body
+
+        Raises:
+            CacheMiss: in offline mode if the page was never cached
+            requests.HTTPError: if the server answered with anything but the
+                page, after the retries of PoliteSession
+        """
+        entry = self.entry(url)
+        if entry is not None and (self.offline or self.is_fresh(entry, ttl)):
+            content = self.read_bytes(url)
+            if content is not None:
+                self._count(True, url)
+                return content, entry.get("encoding")
+        if self.offline:
+            raise CacheMiss(url)
+        headers = dict()
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        host = urlparse(url).netloc
+        with METRICS.timer("request", host=host):
+            response = self.session.get(url, headers=headers, timeout=60)
+        self._count(False, url)
+        if response.status_code == 304 and entry is not None:
+            content = self.read_bytes(url)
+            if content is not None:
+                METRICS.count("not_modified", host=host)
+                entry["fetched"] = time.time()
+                self._save_entry(url, entry)
+                return content, entry.get("encoding")
+            with METRICS.timer("request", host=host):
+                response = self.session.get(url, timeout=60)
+        METRICS.count("bytes", len(response.content), host=host)
+        #An error page is never parsed or kept around
+        if response.status_code != 200:
+            METRICS.count("http_errors", host=host)
+            raise requests.HTTPError("%d response from %s" % (response.status_code, url), response=response)
+        encoding = response.encoding or response.apparent_encoding
+        self.store(url, response.content, response.headers.get("ETag"),
+                   response.headers.get("Last-Modified"), encoding)
+        return response.content, encoding
+
+    def get(self, url, ttl=None):
+        """Same as get_bytes, but return the page as text"""
+        content, encoding = self.get_bytes(url, ttl)
+        return content.decode(encoding or "utf-8", errors="replace")
+
+    def browser_page(self, browser, url):
+        """Return browser.page_source for a URL through the cache
+
+        Selenium can't send conditional requests, so stale pages are simply
+        loaded again, after waiting for the website's turn like any other
+        request.
+
+        Parameters:
+            browser (LazyBrowser or WebDriver): browser to load the page with
+            url (str): page to load
+
+        Raises:
+            CacheMiss: in offline mode if the page was never cached
+        """
+        text = self.lookup(url)
+        if text is not None:
+            return text
+        self.session.wait(url)
+        with METRICS.timer("request", host=urlparse(url).netloc):
+            browser.get(url)
+            text = browser.page_source
+        METRICS.count("bytes", len(text.encode("utf-8")), host=urlparse(url).netloc)
+        self._count(False, url)
+        self.store(url, text)
+        return text
+
+class LazyBrowser:
+    """Stand-in for webdriver.Chrome() that only starts Chrome the first time a
+    page actually has to be loaded, so a run served from the cache never opens
+    a browser."""
+    def __init__(self, factory=None):
+        """
+        Parameters:
+            factory (callable): returns a new WebDriver, webdriver.Chrome by
+                default
+        """
+        self.factory = factory
+        self.driver = None
+
+    def __getattr__(self, name):
+        if self.driver is None:
+            if self.factory is None:
+                from selenium import webdriver
+                self.factory = webdriver.Chrome
+            self.driver = self.factory()
+        return getattr(self.driver, name)
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.close()
+            self.driver = None
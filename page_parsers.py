@@ -0,0 +1,254 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: page_parsers.py
+Purpose: *Read each kind of HTML page the scraper loads (bioguide search
+          results, public law lists, clerk.house.gov roll call lists, CBO
+          listings and estimate pages) into small records instead of keeping
+          a BeautifulSoup tree of the whole page
+         *Parse with lxml's C parser, or with Python's html.parser into an
+          ElementTree if lxml isn't installed
+         *Find things by where they sit in a table row instead of by long
+          .next.next... chains
+"""
+from collections import namedtuple
+from html.parser import HTMLParser
+import xml.etree.ElementTree as ElementTree
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+#One row of the bioguide search results, as written on the page, e.g.
+#   ("ABERCROMBIE, Neil", "1938", "A000014", "Representative", "Democrat", "HI")
+MemberRow = namedtuple("MemberRow", ["name", "birth", "member_id", "position", "party", "state"])
+#One bill on a clerk.house.gov roll call list, e.g. ("H R 1234",
+#   "http://clerk.house.gov/evs/2007/roll123.xml", "On Passage")
+RollCallRow = namedtuple("RollCallRow", ["measure", "roll_call_url", "question"])
+#One cost estimate on a cbo.gov listing page
+ListingEntry = namedtuple("ListingEntry", ["title", "href", "date"])
+#What get_cost_estimates reads from a cbo.gov estimate page: the text of the
+#   first <time>, the text of every <p> (None for a paragraph with tags in it)
+#   and the link to the pdf
+EstimatePage = namedtuple("EstimatePage", ["time", "paragraphs", "pdf_href"])
+
+#Tags html.parser never sees closed
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source",
+             "track", "wbr"}
+
+class _TreeParser(HTMLParser):
+    """Builds an ElementTree from html.parser's events, closing tags the page
+    left open and ignoring end tags that were never opened"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.builder = ElementTree.TreeBuilder()
+        self.builder.start("document", {})
+        self.open = list()
+
+    def handle_starttag(self, tag, attrs):
+        self.builder.start(tag, {name:value or '' for name, value in attrs})
+        if tag in VOID_TAGS:
+            self.builder.end(tag)
+        else:
+            self.open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.builder.start(tag, {name:value or '' for name, value in attrs})
+        self.builder.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.open:
+            while self.open:
+                opened = self.open.pop()
+                self.builder.end(opened)
+                if opened == tag:
+                    break
+
+    def handle_data(self, data):
+        self.builder.data(data)
+
+    def root(self):
+        self.close()
+        while self.open:
+            self.builder.end(self.open.pop())
+        self.builder.end("document")
+        return self.builder.close()
+
+def parse_html(page):
+    """Return the root element of an HTML page
+
+    Parameters:
+        page (str or bytes): the page; bytes are read as UTF-8
+    """
+    if isinstance(page, bytes):
+        page = page.decode("utf-8", errors="replace")
+    if etree is not None:
+        root = etree.fromstring(page.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+        return root if root is not None else etree.Element("html")
+    parser = _TreeParser()
+    parser.feed(page)
+    return parser.root()
+
+def string(element):
+    """Return the text of an element the way BeautifulSoup's .string does:
+    its text if that's all it holds, the string of its only child, or None"""
+    children = list(element)
+    if not children:
+        return element.text
+    if len(children) == 1 and element.text is None and children[0].tail is None:
+        return string(children[0])
+    return None
+
+def _links(root):
+    """Yield every <a> with an href"""
+    for tag in root.iter('a'):
+        if tag.get('href') is not None:
+            yield tag
+
+def _has_class(element, name):
+    return name in (element.get('class') or '').split()
+
+def member_search_rows(page):
+    """Read the bioguide search results into a MemberRow for every member
+
+    Each member is a table row: a link to their biography (ending in their
+    bioguide id), then their birth and death years, position, party and
+    state.
+
+    Parameters:
+        page (str): HTML of the search results
+    """
+    rows = list()
+    for row in parse_html(page).iter('tr'):
+        cells = row.findall('td')
+        if len(cells) < 5:
+            continue
+        link = next((tag for tag in _links(cells[0]) if "index=" in tag.get('href')), None)
+        birth = string(cells[1])
+        if link is None or not string(link) or birth is None:
+            continue
+        rows.append(MemberRow(string(link), birth[:4],
+                              link.get('href').split(sep="index=")[-1], string(cells[2]), string(cells[3]),
+                              string(cells[4])))
+    return rows
+
+def link_strings(page):
+    """Return the string of every link on a page that has one, e.g. the bill
+    names on a congress.gov public law list"""
+    return [text for text in (string(tag) for tag in parse_html(page).iter('a')) if text is not None]
+
+def links(page, pattern):
+    """Return the href of every link whose string the pattern finds, e.g. the
+    "Roll Calls ..." pages of a clerk.house.gov year
+
+    Parameters:
+        page (str): HTML of the page
+        pattern (Pattern): compiled regular expression searched for
+    """
+    return [tag.get('href') for tag in _links(parse_html(page)) if string(tag) is not None and pattern.search(string(tag))]
+
+def roll_call_rows(page, pattern):
+    """Read a clerk.house.gov roll call list into a RollCallRow for every bill
+
+    Each roll call is a table row: a link to its XML, a few other columns, a
+    link whose string is the measure and then the question voted on.
+
+    Parameters:
+        page (str): HTML of one of the ROLL_*.asp pages of a year
+        pattern (Pattern): what a measure looks like, e.g. "H R 1234"
+    """
+    rows = list()
+    for row in parse_html(page).iter('tr'):
+        cells = row.findall('td')
+        for i, cell in enumerate(cells[:-1]):
+            measure = next((string(tag) for tag in _links(cell)
+                            if string(tag) is not None and pattern.search(string(tag))), None)
+            if measure is None:
+                continue
+            roll_call_url = next((tag.get('href') for before in cells[:i] for tag in _links(before)), None)
+            rows.append(RollCallRow(measure, roll_call_url, string(cells[i+1])))
+            break
+    return rows
+
+def _previous(parents, element):
+    """Return the element right before another in the page, or None if
+    that's text"""
+    parent = parents.get(element)
+    if parent is None:
+        return None
+    siblings = list(parent)
+    position = siblings.index(element)
+    if position == 0:
+        return parent if parent.text is None else None
+    previous = siblings[position-1]
+    if previous.tail is not None:
+        return None
+    while len(previous):
+        if previous[-1].tail is not None:
+            return None
+        previous = previous[-1]
+    return previous if previous.text is None else None
+
+def cbo_facet_href(page, pattern):
+    """Return the href of the link around the first Congress facet of the
+    cbo.gov cost estimates page whose string the pattern finds, e.g. "110th",
+    or None"""
+    root = parse_html(page)
+    parents = {child:parent for parent in root.iter() for child in parent}
+    for span in root.iter('span'):
+        if _has_class(span, "facet-item__value") and string(span) is not None and pattern.search(string(span)):
+            previous = _previous(parents, span)
+            return previous.get('href') if previous is not None else None
+    return None
+
+def cbo_listing(page, pattern):
+    """Read a cbo.gov cost estimate listing page
+
+    The date of an entry is the first <time> in the smallest element around
+    its link that doesn't also hold another estimate's link.
+
+    Parameters:
+        page (str): HTML of the listing page
+        pattern (Pattern): what the string of an estimate's link starts with
+
+    Returns:
+        (list): a ListingEntry for every estimate, in order
+        (str): href of the next listing page, or None on the last page
+    """
+    root = parse_html(page)
+    parents = {child:parent for parent in root.iter() for child in parent}
+    entries = [tag for tag in _links(root) if string(tag) is not None and pattern.search(string(tag))]
+    #How many estimate links and which first <time> each element holds,
+    #   filled in from the entries up
+    counts, times = dict(), dict()
+    for tag in entries:
+        element = parents.get(tag)
+        while element is not None:
+            counts[element] = counts.get(element, 0) + 1
+            element = parents.get(element)
+    listing = list()
+    for tag in entries:
+        date = None
+        element = parents.get(tag)
+        while element is not None and counts[element] <= 1:
+            if element not in times:
+                times[element] = next(element.iter('time'), None)
+            if times[element] is not None:
+                date = times[element].get('datetime') or ''.join(times[element].itertext()).strip()
+                break
+            element = parents.get(element)
+        listing.append(ListingEntry(string(tag), tag.get('href'), date))
+    next_link = next((tag for tag in _links(root) if "next" in (tag.get('rel') or '').split()), None)
+    if next_link is None:
+        next_link = next((tag for item in root.iter('li') if _has_class(item, "pager__item--next")
+                          for tag in _links(item)), None)
+    return listing, next_link.get('href') if next_link is not None else None
+
+def estimate_page(page):
+    """Read the year, summary paragraphs and pdf link of a cbo.gov cost
+    estimate page into an EstimatePage"""
+    root = parse_html(page)
+    time = next(root.iter('time'), None)
+    pdf = next((tag for tag in root.iter('a') if string(tag) == "View Document"), None)
+    return EstimatePage(string(time) if time is not None else None, [string(tag) for tag in root.iter('p')],
+                        pdf.get('href') if pdf is not None else None)
@@ -0,0 +1,112 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: pdf_text.py
+Purpose: *Extract the text of CBO cost estimate pdfs in memory, without
+          writing each one to pdfs/temp.pdf, with the same pdftotext program
+          textract ran
+         *Only read the first pages of a pdf when the summary is on them
+         *Save the extracted text in the page cache so a pdf is never
+          extracted twice
+"""
+import shutil
+import hashlib
+import importlib.util
+import subprocess
+from io import BytesIO
+from cbo_parser import pdf_sections
+from metrics import METRICS
+
+#The summary is almost always on the first page or two of the estimate
+SUMMARY_PAGES = 2
+
+def pdf_method():
+    """Return how pdfs are extracted here: "pdftotext", the program textract
+    runs for a pdf, or "pdfminer" if it isn't installed
+
+    The regular expressions in cbo_parser.py were written for pdftotext's
+    output. pdfminer lays out the text differently, so its summaries can
+    parse to different costs; test_pdf_text.py compares the two on the pdfs
+    in tests/data/pdfs.
+    """
+    if shutil.which("pdftotext") is not None:
+        return "pdftotext"
+    if importlib.util.find_spec("pdfminer") is None:
+        raise ImportError("extracting pdfs needs pdftotext (poppler-utils) or pdfminer.six")
+    return "pdfminer"
+
+def extract_text(pdf_bytes, max_pages=None, method=None):
+    """Extract the text of a pdf held in memory
+
+    pdftotext reads the pdf from stdin and writes its text to stdout, the same
+    text textract.process(path) got from it, without a temporary file.
+
+    Parameters:
+        pdf_bytes (bytes): the pdf
+        max_pages (int): only read this many pages from the start, or every
+            page if None
+        method (str): "pdftotext" or "pdfminer", pdf_method() by default
+
+    Returns:
+        (str): the text of the pdf
+    """
+    method = method or pdf_method()
+    if method == "pdfminer":
+        from pdfminer.high_level import extract_text as pdfminer_extract_text
+        page_numbers = range(max_pages) if max_pages is not None else None
+        return pdfminer_extract_text(BytesIO(pdf_bytes), page_numbers=page_numbers)
+    #The same command textract runs, with the last page to read
+    pages = ["-l", str(max_pages)] if max_pages is not None else []
+    output = subprocess.run(["pdftotext"] + pages + ["-", "-"], input=pdf_bytes, capture_output=True, check=True).stdout
+    return output.decode("utf-8")
+
+class PdfTextExtractor:
+    """Extract the text of pdfs through the page cache. The text is saved
+    under the sha256 of the pdf, so the same pdf is only ever extracted once
+    no matter which bill or URL it came from.
+
+    Attributes:
+        cache (PageCache): where the extracted text is saved, or None to not
+            save it
+        method (str): "pdftotext" or "pdfminer", pdf_method() by default
+    """
+    def __init__(self, cache=None, method=None):
+        self.cache = cache
+        self.method = method
+
+    def _key(self, pdf_bytes, max_pages):
+        #Text from one method is never reused for the other
+        return "pdf-text:%s:%s:%s" % (self.method or pdf_method(), hashlib.sha256(pdf_bytes).hexdigest(),
+                                      max_pages or "all")
+
+    def text(self, pdf_bytes, max_pages=None):
+        """Return the text of a pdf, extracting it only if it isn't cached
+
+        Parameters:
+            pdf_bytes (bytes): the pdf
+            max_pages (int): only read this many pages, or every page if None
+        """
+        key = self._key(pdf_bytes, max_pages)
+        text = self.cache.read(key) if self.cache is not None else None
+        if text is None:
+            with METRICS.timer("pdf"):
+                text = extract_text(pdf_bytes, max_pages, self.method)
+            if self.cache is not None:
+                self.cache.store(key, text)
+        return text
+
+    def summary(self, pdf_bytes):
+        """Return the summary section of a CBO cost estimate pdf
+
+        Only the first SUMMARY_PAGES pages are read unless the summary runs
+        past them, in which case the whole pdf is read.
+
+        Raises:
+            IndexError: if the pdf doesn't have a summary section
+        """
+        #The summary is the second section. If a third section starts within
+        #   the first pages, the summary ends there just like in the whole pdf.
+        sections = pdf_sections(self.text(pdf_bytes, SUMMARY_PAGES))
+        if len(sections) > 2:
+            return sections[1]
+        return pdf_sections(self.text(pdf_bytes))[1]
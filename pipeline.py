@@ -0,0 +1,171 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: pipeline.py
+Purpose: *Save the output of every stage of the scraper to disk as it finishes
+          so a crash doesn't throw away hours of crawling
+         *Resume from the last stage or session that finished, and only redo
+          the stages whose inputs changed
+"""
+import os
+import json
+import gzip
+import hashlib
+import threading
+
+def fingerprint(inputs):
+    """Return a short hash that changes whenever the inputs of a stage change
+
+    Parameters:
+        inputs: anything json can write, e.g. the sessions and bill names a
+            stage is run on
+    """
+    text = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class Checkpoints:
+    """Outputs of finished stages saved as gzipped JSON, one file per stage
+    (or per session of a stage), along with a fingerprint of the inputs the
+    stage was run on.
+
+    Attributes:
+        directory (str): where the checkpoints are saved
+        loaded, computed (list): names of the stages that were resumed from
+            disk or run this time
+    """
+    def __init__(self, directory="checkpoints"):
+        self.directory = directory
+        self.loaded, self.computed = list(), list()
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name + ".json.gz")
+
+    def load(self, name, inputs):
+        """Return (True, output) if the stage was saved with the same inputs,
+        otherwise (False, None)"""
+        try:
+            with gzip.open(self.path(name), 'rt', encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+        if saved.get("inputs") != fingerprint(inputs):
+            return False, None
+        return True, saved["output"]
+
+    def _write(self, name, saved):
+        path = self.path(name)
+        #Write to a temporary file first so a crash never leaves half a
+        #   checkpoint. Stages run in parallel, so each thread gets its own.
+        temp_path = "%s.%d.tmp" % (path, threading.get_ident())
+        with gzip.open(temp_path, 'wt', encoding="utf-8") as f:
+            json.dump(saved, f)
+        os.replace(temp_path, path)
+
+    def save(self, name, inputs, output):
+        """Save the output of a stage along with the fingerprint of its inputs"""
+        self._write(name, {"name":name, "inputs":fingerprint(inputs), "output":output})
+
+    def replace(self, name, output):
+        """Save a new output for a stage that was saved before, keeping the
+        fingerprint of the inputs it was run on, e.g. after its pages were
+        parsed again without downloading them
+
+        Raises:
+            KeyError: if the stage was never saved
+        """
+        try:
+            with gzip.open(self.path(name), 'rt', encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            raise KeyError(name)
+        saved["output"] = output
+        self._write(name, saved)
+
+    def previous(self, name):
+        """Return the saved output of a stage whatever its inputs were, or None
+        if it was never saved"""
+        try:
+            with gzip.open(self.path(name), 'rt', encoding="utf-8") as f:
+                return json.load(f)["output"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def run(self, name, inputs, compute):
+        """Return the saved output of a stage, or run it and save the output
+
+        Parameters:
+            name (str): name of the stage, e.g. "house-votes-110"
+            inputs: everything the stage's output depends on
+            compute (callable): takes no arguments and returns the output,
+                which must be something json can write
+
+        Returns:
+            the output as it was read back from JSON, so tuples come back as
+            lists and dictionary keys as strings
+        """
+        return self.update(name, inputs, lambda previous: compute())
+
+    def update(self, name, inputs, compute):
+        """Same as run, but when the inputs changed, compute is given the
+        output saved last time (or None) so it only has to redo what's new"""
+        found, output = self.load(name, inputs)
+        if found:
+            with self.lock:
+                self.loaded.append(name)
+            return output
+        output = compute(self.previous(name))
+        self.save(name, inputs, output)
+        with self.lock:
+            self.computed.append(name)
+        #Read it back the same way a resumed run would
+        return json.loads(json.dumps(output))
+
+    def report(self):
+        print("Checkpoints: resumed", len(self.loaded), "stages, ran", len(self.computed))
+
+def merge_members(chambers):
+    """Combine the members found one session at a time into the dictionaries
+    quick_members_of_congress returns for all the sessions
+
+    Parameters:
+        chambers (list): (Representatives, Senators) for each session, in order
+
+    Returns:
+        (dict): Representatives for all the sessions
+        (dict): Senators for all the sessions
+    """
+    Representatives, Senators = dict(), dict()
+    for session_members in chambers:
+        for members, session_chamber in zip((Representatives, Senators), session_members):
+            for key, member in session_chamber.items():
+                if key in members:
+                    members[key]["Sessions"] += member["Sessions"]
+                else:
+                    members[key] = dict(member, Sessions=list(member["Sessions"]))
+    return Representatives, Senators
+
+def merge_estimates(estimates):
+    """Combine what get_cost_estimates returned for different bills
+
+    Parameters:
+        estimates (list): (bill_costs, no_report, from_summary, from_pdf,
+            no_estimate) for each group of bills
+
+    Returns:
+        (tuple): the same five things for all the bills
+    """
+    bill_costs, no_report, from_summary, from_pdf, no_estimate = dict(), list(), list(), list(), list()
+    for estimate in estimates:
+        bill_costs.update(estimate[0])
+        no_report += estimate[1]
+        from_summary += estimate[2]
+        from_pdf += estimate[3]
+        no_estimate += estimate[4]
+    return bill_costs, no_report, from_summary, from_pdf, no_estimate
+
+def estimated_bills(estimate):
+    """Return every bill get_cost_estimates already looked at, whether or not
+    it found an estimate"""
+    return set(estimate[0]) | set(estimate[1]) | set(estimate[4])
@@ -0,0 +1,152 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: roll_calls.py
+Purpose: *Read each senate.gov vote menu and clerk.house.gov roll call list
+          once into a dictionary from measure to roll call, instead of
+          searching the whole page again for every bill
+         *Read the official XML of each roll call with a streaming parser into
+          VoteRecords with the member's id, instead of walking the HTML
+"""
+import re
+from io import BytesIO
+from collections import namedtuple
+try:
+    from lxml import etree
+except ImportError:
+    import xml.etree.ElementTree as etree
+from metrics import METRICS
+from page_parsers import roll_call_rows
+
+SENATE_MENU_URL = "https://www.senate.gov/legislative/LIS/roll_call_lists/vote_menu_%d_%d.xml"
+SENATE_VOTE_URL = "https://www.senate.gov/legislative/LIS/roll_call_votes/vote%d%d/vote_%d_%d_%s.xml"
+
+HOUSE_MEASURE = re.compile(r"^(?:H R|S) \d+$")
+
+#One member's vote on one roll call. member_id is the bioguide id in the House
+#   and the LIS id in the Senate; name is the member's last name.
+VoteRecord = namedtuple("VoteRecord", ["bill", "session", "member_id", "name", "party", "state", "vote"])
+
+def senate_measure(bill_name):
+    """Return how senate.gov writes a bill, e.g. "S. 1582" for "S.1582-110th"
+
+    senate.gov has strings as S. 1582 rather than S.1582 so we must add a space
+    to match the text
+    """
+    split = bill_name.split(sep='-')[0].split(sep='.')
+    if len(split) < 3:
+        return split[0] + '. ' + split[1]
+    return split[0] + '.' + split[1] + '. ' + split[2]
+
+def house_measure(page_string):
+    """Return the bill name without its session for how clerk.house.gov writes
+    a bill, e.g. "H.R.1234" for "H R 1234" """
+    return '.'.join(page_string.split())
+
+def _add(index, measure, roll_call, result, wanted):
+    """Keep the first roll call of a measure with the wanted result, or else
+    the first roll call of the measure"""
+    if measure not in index or (index[measure][1] != wanted and result == wanted):
+        index[measure] = (roll_call, result)
+
+def _iterparse(xml, tag):
+    """Yield every element with the given tag as soon as it has been parsed,
+    and free it once the caller is done with it
+
+    Parameters:
+        xml (bytes): the XML document
+        tag (str): name of the elements to yield
+    """
+    for event, element in etree.iterparse(BytesIO(xml), events=("end",)):
+        if element.tag == tag:
+            yield element
+            element.clear()
+
+def index_senate_vote_menu(xml, session, year):
+    """Read a senate.gov vote menu (one year of a session) into a dictionary
+
+    Parameters:
+        xml (bytes): vote_menu_<session>_<year>.xml
+        session (int): session of Congress
+        year (int): 1 or 2, the year of the session
+
+    Returns:
+        (dict): measure, e.g. "S. 1582" -> (roll call XML URL, result of the
+                vote). A measure voted on more than once keeps its first
+                "Passed" vote.
+    """
+    index = dict()
+    with METRICS.timer("parse"):
+        for vote in _iterparse(xml, "vote"):
+            issue = (vote.findtext("issue") or "").strip()
+            if issue:
+                url = SENATE_VOTE_URL % (session, year, session, year, vote.findtext("vote_number").strip())
+                _add(index, issue, url, (vote.findtext("result") or "").strip(), "Passed")
+    return index
+
+def senate_votes(xml, bill, session):
+    """Yield a VoteRecord for every Senator on a senate.gov roll call
+
+    Parameters:
+        xml (bytes): vote_<session>_<year>_<number>.xml
+        bill (str): name of the bill the roll call was for
+        session (int): session of Congress the vote was held in
+    """
+    for member in _iterparse(xml, "member"):
+        yield VoteRecord(bill, session, member.findtext("lis_member_id"), member.findtext("last_name"),
+                         member.findtext("party"), member.findtext("state"), member.findtext("vote_cast"))
+
+def house_votes(xml, bill, session):
+    """Yield a VoteRecord for every Rep on a clerk.house.gov roll call
+
+    Parameters:
+        xml (bytes): roll<number>.xml
+        bill (str): name of the bill the roll call was for
+        session (int): session of Congress the vote was held in
+    """
+    for recorded_vote in _iterparse(xml, "recorded-vote"):
+        legislator = recorded_vote.find("legislator")
+        #The clerk adds the state, e.g. "Smith (NJ)", when two Reps share a
+        #   last name. The state is also an attribute, so it's dropped.
+        name = (legislator.get("unaccented-name") or legislator.text or "").split(sep='(')[0].strip()
+        yield VoteRecord(bill, session, legislator.get("name-id"), name, legislator.get("party"),
+                         legislator.get("state"), recorded_vote.findtext("vote"))
+
+def index_house_roll_call_list(page):
+    """Read one clerk.house.gov "Roll Calls" list page into a dictionary
+
+    Parameters:
+        page (str): HTML of one of the ROLL_*.asp pages of a year
+
+    Returns:
+        (dict): bill name without the session, e.g. "H.R.1234" -> (roll call
+                xml URL, question voted on) for the first row of each bill on
+                the page. Later rows of a bill on the same page are ignored,
+                like the page-by-page search this replaces.
+    """
+    index = dict()
+    with METRICS.timer("parse"):
+        rows = roll_call_rows(page, HOUSE_MEASURE)
+    for row in rows:
+        measure = house_measure(row.measure)
+        if measure not in index:
+            index[measure] = (row.roll_call_url, row.question)
+    return index
+
+def merge_indexes(indexes, wanted):
+    """Merge the indexes of several pages, in order, keeping the first roll
+    call of each measure with the wanted result
+
+    Parameters:
+        indexes (list): dictionaries from index_senate_vote_menu or
+            index_house_roll_call_list
+        wanted (str): "Passed" for the Senate, "On Passage" for the House
+
+    Returns:
+        (dict): measure -> (roll call URL, result)
+    """
+    merged = dict()
+    for index in indexes:
+        for measure, (roll_call, result) in index.items():
+            _add(merged, measure, roll_call, result, wanted)
+    return merged
@@ -0,0 +1,238 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: roster.py
+Purpose: *Load every member of Congress for a range of sessions in one pass
+          from the congress-legislators bulk data files, instead of
+          submitting the bioguide search form once per session
+         *Keep each member once, by bioguide id, with their name normalized
+          when they're added, and index them by session so a session's
+          members are a dictionary lookup
+         *Name members the way the bioguide search does whenever they were
+          searched for, so their keys match scores_data.csv and the
+          checkpoints
+         *Save the roster to disk so later runs don't download it again
+"""
+import os
+import json
+import threading
+from datetime import date, timedelta
+from member_index import MemberRecord, add_member
+from metrics import METRICS
+
+#Every member of Congress since 1789 and the ones serving now, from the
+#   unitedstates/congress-legislators project
+LEGISLATORS_URLS = ["https://theunitedstates.io/congress-legislators/legislators-historical.json",
+                    "https://theunitedstates.io/congress-legislators/legislators-current.json"]
+#How the bioguide search and the bulk data write a party, and how it's stored
+PARTIES = {"Democrat":'D', "Republican":'R', "Independent":'I'}
+POSITIONS = {"rep":'Rep', "sen":'Sen'}
+
+def normalize_name(name):
+    """Return a member's name from the bioguide as it's used for a key
+
+    The bioguide writes the last name in all-caps, e.g. "ABERCROMBIE, Neil",
+    so every letter after the first is put in lowercase ("Abercrombie, Neil").
+    A last name starting with a lowercase letter, e.g. "de la GARZA, Eligio",
+    keeps everything up to and including its first capital ("de la Garza").
+    """
+    last, *rest = name.split(sep=',')
+    if last[:1].islower():
+        capital = next((i for i in range(1, len(last)) if last[i].isupper()), None)
+        if capital is not None:
+            last = last[:capital+1] + last[capital+1:].lower()
+    else:
+        last = last[:1] + last[1:].lower()
+    return ','.join([last] + rest)
+
+def congress_of(day):
+    """Return the session of Congress sitting on a day, e.g. 110 for
+    "2008-05-01". Sessions have started on January 3rd since 1935."""
+    year = int(day[:4])
+    if day[5:] < "01-03":
+        year -= 1
+    return (year - 1789)//2 + 1
+
+def term_sessions(term):
+    """Return the sessions of Congress a term of office overlaps
+
+    Parameters:
+        term (dict): term from the bulk data with "start" and "end" dates
+    """
+    #A term ends on the day the next session starts
+    last_day = (date.fromisoformat(term["end"]) - timedelta(days=1)).isoformat()
+    return range(congress_of(term["start"]), congress_of(last_day) + 1)
+
+def bioguide_name(name):
+    """Return the name of a member of the bulk data as the bioguide search
+    writes it, e.g. "ABERCROMBIE, Neil" or "SMITH, John Adam, Jr." """
+    first = ' '.join(part for part in (name.get("first"), name.get("middle")) if part)
+    parts = [name["last"].upper(), ' ' + first]
+    if name.get("suffix"):
+        parts.append(' ' + name["suffix"])
+    return ','.join(parts)
+
+class Roster:
+    """Every member of Congress found so far, by bioguide id
+
+    Attributes:
+        path (str): JSON file the roster is saved to, or None
+        members (dict): bioguide id -> {"key": normalized name, "birth": year
+            of birth, "sessions": {session: [[position, state, party], ...]}}
+        by_session (dict): session -> bioguide ids of its members, in the
+            order they were added
+        bulk_sessions (set): sessions loaded from the bulk data and not
+            searched for since. The bulk data has full middle names where the
+            search has initials, so their members can have other keys.
+    """
+    def __init__(self, path=None):
+        """
+        Parameters:
+            path (str): JSON file to load the roster from and save it to
+        """
+        self.path = path
+        self.members = dict()
+        self.by_session = dict()
+        self.bulk_sessions = set()
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def add(self, record):
+        """Add one member serving in one session
+
+        The name from the search replaces one made from the bulk data, in
+        every session of the member, matched by bioguide id.
+
+        Parameters:
+            record (MemberRecord): the member, from iter_members_of_congress
+        """
+        self._add(record.member_id, record.key, record.birth, record.session,
+                  [record.position, record.state, record.party], rename=True)
+
+    def _add(self, member_id, key, birth, session, service, rename=False):
+        with self.lock:
+            member = self.members.setdefault(member_id, {"key":key, "birth":birth, "sessions":dict()})
+            if rename:
+                member["key"] = key
+            services = member["sessions"].setdefault(session, [])
+            if not services:
+                self.by_session.setdefault(session, []).append(member_id)
+            if service not in services:
+                services.append(service)
+
+    def add_legislators(self, legislators, sessions):
+        """Add every member of the bulk data who served in the given sessions
+
+        Members already in the roster keep their names, e.g. the ones from
+        the bioguide search.
+
+        Parameters:
+            legislators (list): contents of legislators-*.json
+            sessions (list): sessions of Congress to keep
+
+        Returns:
+            (int): how many members were skipped for having no bioguide id or
+                   birthday
+        """
+        wanted = set(sessions)
+        found, skipped = list(), 0
+        for legislator in legislators:
+            member_id = legislator.get("id", {}).get("bioguide")
+            birthday = legislator.get("bio", {}).get("birthday")
+            terms = [(session, term) for term in legislator.get("terms", [])
+                     for session in term_sessions(term) if session in wanted and term.get("type") in POSITIONS]
+            if not terms:
+                continue
+            if member_id is None or birthday is None:
+                skipped += 1
+                continue
+            key = normalize_name(bioguide_name(legislator["name"]))
+            for session, term in terms:
+                found.append((session, key, member_id, int(birthday[:4]), [POSITIONS[term["type"]], term["state"],
+                              PARTIES.get(term.get("party"), (term.get("party") or '?')[:1])]))
+        #Each session lists its members alphabetically, like the bioguide search
+        for session, key, member_id, birth, service in sorted(found, key=lambda row: (row[0], row[1])):
+            self._add(member_id, key, birth, session, service)
+        #Sessions with no members are still known to have been loaded
+        for session in wanted:
+            self.by_session.setdefault(session, [])
+        self.bulk_sessions |= wanted
+        METRICS.count("roster_skipped", skipped)
+        return skipped
+
+    def has(self, session, bulk=True):
+        """Return whether a session's members have been loaded
+
+        Parameters:
+            session (int): session of Congress
+            bulk (bool): whether members loaded from the bulk data count, or
+                only members found with the bioguide search
+        """
+        return session in self.by_session and (bulk or session not in self.bulk_sessions)
+
+    def searched(self, sessions):
+        """Mark sessions as searched for on the bioguide, after their records
+        were added"""
+        with self.lock:
+            for session in sessions:
+                self.by_session.setdefault(session, [])
+            self.bulk_sessions.difference_update(sessions)
+
+    def records(self, sessions):
+        """Yield a MemberRecord for every member serving in each session, like
+        iter_members_of_congress"""
+        for session in sessions:
+            for member_id in self.by_session.get(session, []):
+                member = self.members[member_id]
+                for position, state, party in member["sessions"][session]:
+                    yield MemberRecord(member["key"], position, state, party, member["birth"], session, member_id)
+
+    def chambers(self, sessions):
+        """Return the Representatives and Senators of the given sessions, the
+        same dictionaries quick_members_of_congress returns"""
+        Representatives, Senators = dict(), dict()
+        for record in self.records(sessions):
+            add_member(Representatives if record.position == 'Rep' else Senators, record)
+        return Representatives, Senators
+
+    def load(self, path=None):
+        """Read members saved by save, keeping any already in the roster"""
+        with open(path or self.path) as f:
+            saved = json.load(f)
+        for member_id, member in saved["members"].items():
+            if member_id not in self.members:
+                member["sessions"] = {int(session):services for session, services in member["sessions"].items()}
+                self.members[member_id] = member
+        for session, member_ids in saved["sessions"].items():
+            self.by_session.setdefault(int(session), member_ids)
+        #Rosters saved before the sessions were told apart were loaded from
+        #   the bulk data
+        self.bulk_sessions |= set(saved.get("bulk_sessions", map(int, saved["sessions"])))
+
+    def save(self, path=None):
+        """Write the roster to a JSON file"""
+        path = path or self.path
+        with self.lock:
+            saved = {"members":self.members,
+                     "sessions":{str(session):member_ids for session, member_ids in sorted(self.by_session.items())},
+                     "bulk_sessions":sorted(self.bulk_sessions)}
+            with open(path + ".tmp", 'w') as f:
+                json.dump(saved, f)
+        os.replace(path + ".tmp", path)
+
+def fetch_legislators(cache, urls=LEGISLATORS_URLS):
+    """Download the congress-legislators bulk data through a page cache
+
+    Parameters:
+        cache (PageCache): where to save and reuse the files
+        urls (list): the JSON files to read
+
+    Returns:
+        (list): every legislator in the files
+    """
+    legislators = list()
+    for url in urls:
+        content, encoding = cache.get_bytes(url)
+        legislators += json.loads(content.decode(encoding or "utf-8"))
+    return legislators
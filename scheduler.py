@@ -0,0 +1,147 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: scheduler.py
+Purpose: *Crawl each website at its own polite rate instead of sleeping a fixed
+          2 seconds after every request
+         *Retry failed requests with exponential backoff
+         *Run the House, Senate and CBO stages of the scraper at the same time,
+          since they crawl different websites
+"""
+import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import METRICS, PROFILES
+
+#Requests per second allowed for each website. Congress.gov requires a wait
+#   time of 2 seconds while crawling.
+DEFAULT_RATES = {"www.congress.gov":0.5, "www.senate.gov":1.0,
+                 "clerk.house.gov":1.0, "bioguide.congress.gov":0.5,
+                 "www.cbo.gov":1.0}
+#Status codes that mean the server might answer if we ask again later
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class TokenBucket:
+    """Allow at most `rate` requests per second on average, with bursts of up
+    to `capacity` requests. Safe to share between threads."""
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request is allowed"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now-self.updated)*self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class PoliteSession:
+    """Drop-in replacement for requests.get that waits for the website's token
+    bucket before every request and retries connection errors and 429/5xx
+    responses with exponential backoff.
+
+    Every thread gets its own requests.Session so connections are kept alive
+    without sharing a session between threads.
+
+    Attributes:
+        rates (dict): host -> requests per second
+        default_rate (float): requests per second for hosts not in rates
+        retries (int): how many times to retry a request
+        backoff (float): seconds to wait before the first retry, doubled after
+            each one
+        pool_size (int): keep-alive connections kept open per website
+    """
+    def __init__(self, rates=DEFAULT_RATES, default_rate=1.0, retries=3, backoff=1.0, pool_size=4):
+        self.rates = dict(rates)
+        self.default_rate = default_rate
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.buckets = dict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def bucket(self, url):
+        """Return the token bucket for the website a URL is on"""
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rates.get(host, self.default_rate))
+            return self.buckets[host]
+
+    def wait(self, url):
+        """Block until the website a URL is on can be sent another request.
+        Use this before loading a page in a browser."""
+        self.bucket(url).acquire()
+
+    def session(self):
+        """Return this thread's requests.Session"""
+        if not hasattr(self.local, "session"):
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(self.rates) + 1, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self.local.session = session
+        return self.local.session
+
+    def get(self, url, **kwargs):
+        """Send a GET request like requests.get, politely and with retries
+
+        Returns:
+            (Response): the last response received
+
+        Raises:
+            requests.RequestException: if the last try couldn't connect
+        """
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            self.wait(url)
+            try:
+                response = self.session().get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                #Respect the server if it says how long to wait
+                retry_after = response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            time.sleep(delay)
+            delay *= 2
+
+def _run_stage(name, stage):
+    #Everything the stage's thread times or counts is recorded under its name,
+    #   and it's profiled in its own thread if the run is
+    with METRICS.stage(name), PROFILES.thread():
+        return stage()
+
+def run_stages(stages, max_workers=None):
+    """Run independent stages of the scraper at the same time
+
+    Parameters:
+        stages (dict): stage name -> function taking no arguments
+        max_workers (int): most stages to run at once, all of them by default
+
+    Returns:
+        (dict): stage name -> what the stage's function returned
+
+    Raises:
+        The first exception raised by a stage, after every stage has finished
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages)) as executor:
+        futures = {name:executor.submit(_run_stage, name, stage) for name, stage in stages.items()}
+    return {name:future.result() for name, future in futures.items()}
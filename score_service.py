@@ -0,0 +1,375 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: score_service.py
+Purpose: *Load the scores, votes and net cost estimates of a run into memory
+          once and answer questions about them in milliseconds: a member's
+          score bill by bill, leaderboards by state, region, division, party
+          and session, and group averages
+         *Index every member and group when the data is loaded and keep the
+          answers to recent questions in an LRU cache
+         *Serve the same questions as JSON over HTTP for other programs
+"""
+import os
+import json
+from functools import lru_cache
+from collections import namedtuple
+import numpy as np
+from output import (load_scores, load_regions, member_id, BILL_COSTS_PATH, HOUSE_VOTES_PATH,
+                    SENATE_VOTES_PATH)
+from vote_store import VoteStore, VOTE_NAMES
+from cbo_store import CboStore
+from cbo_index import bill_key
+from scoring import YEAS_ONLY
+
+#One member's score, overall or in one session
+MemberScore = namedtuple("MemberScore", ["member_id", "name", "position", "party", "state", "region", "division",
+                                         "tenure", "score"])
+#One bill's part of a member's score: the member's vote on it, its net cost
+#   estimate and how much it added to the score (the estimate for a Yea)
+BillContribution = namedtuple("BillContribution", ["bill", "session", "vote", "net_cost", "contribution"])
+#Average, lowest and highest score of the members of a group
+GroupScore = namedtuple("GroupScore", ["group", "members", "mean", "median", "low", "high"])
+
+#One chamber's votes ready to break down by member: the VoteStore, the
+#   session and net cost of every bill id, and the votes sorted by the row of
+#   the member who cast them with where each row's votes start
+Chamber = namedtuple("Chamber", ["votes", "bill_sessions", "bill_costs", "order", "starts"])
+
+#How much a vote of each VOTE_CODES value counts, the way assign_scores
+#   scores them by default
+WEIGHTS = np.array([YEAS_ONLY.get(VOTE_NAMES.get(code), 0) for code in range(max(VOTE_NAMES) + 1)], dtype=float)
+
+#Fields a leaderboard can be narrowed down by, and the column each one is in
+FILTERS = {"state":"State", "region":"Region", "division":"Division", "party":"Party", "position":"Position"}
+
+class ScoreService:
+    """Read only view of the scores of a run, safe to share between threads
+
+    Attributes:
+        rows (int): number of members
+        columns (dict): column of the scores table -> ndarray, one row per
+            member
+        ids (dict): member_id -> row
+        names (dict): (name, position) -> row
+        masks (dict): (column, value) -> boolean ndarray of the members with
+            that value
+        sessions (dict): session -> boolean ndarray of the members who served
+            in it
+        session_scores (dict): session -> ndarray of each member's score from
+            the bills of that session, NaN for members who didn't serve
+        chambers (dict): "Rep" or "Sen" -> Chamber
+        order (ndarray): rows from the highest score to the lowest
+    """
+    def __init__(self, scores="scores_data.parquet", house_votes=HOUSE_VOTES_PATH, senate_votes=SENATE_VOTES_PATH,
+                 bill_costs=BILL_COSTS_PATH, roster="roster.json", regions="regions.csv", cache_size=4096):
+        """
+        Parameters:
+            scores (str): scores_data.parquet, or scores_data.csv
+            house_votes, senate_votes (str): VoteStore files from write_votes,
+                or None to go without the breakdowns by bill
+            bill_costs (str): net cost estimates from write_votes, or the
+                cbo_store.json.gz of the crawl if there's no such file
+            roster (str): roster.json, for the sessions each member served
+                in; without it they're found from the bills voted on
+            regions (str): regions.csv, joined to a csv that has no regions
+            cache_size (int): how many answers of each kind to keep
+        """
+        if not os.path.exists(scores) and scores.endswith(".parquet"):
+            scores = scores[:-len(".parquet")] + ".csv"
+        frame = load_scores(scores)
+        if "Region" not in frame.columns:
+            known = load_regions(regions)
+            frame["Region"] = [known.get(state, (None, None))[0] for state in frame["State"]]
+            frame["Division"] = [known.get(state, (None, None))[1] for state in frame["State"]]
+        if "member_id" not in frame.columns:
+            frame["member_id"] = [member_id(name, {"Position":position})
+                                  for name, position in zip(frame["Name"], frame["Position"])]
+        self.rows = len(frame)
+        self.columns = {column:frame[column].astype(object).where(frame[column].notna(), None).to_numpy()
+                        for column in ("member_id", "Name", "Position", "Party", "State", "Region", "Division")}
+        self.columns["Tenure"] = frame["Tenure"].to_numpy(dtype=int)
+        self.columns["Score"] = frame["Score"].to_numpy(dtype=float)
+        self.ids = {member:row for row, member in enumerate(self.columns["member_id"])}
+        self.names = {(name, position):row for row, (name, position)
+                      in enumerate(zip(self.columns["Name"], self.columns["Position"]))}
+        self.masks = dict()
+        for column in FILTERS.values():
+            for value in set(self.columns[column]):
+                self.masks[(column, value)] = self.columns[column] == value
+        self.order = np.argsort(-self.columns["Score"], kind="stable")
+
+        self.votes = {"Rep":_load_votes(house_votes), "Sen":_load_votes(senate_votes)}
+        self.bill_costs = dict()
+        if bill_costs is not None and os.path.exists(bill_costs):
+            with open(bill_costs) as f:
+                self.bill_costs = json.load(f)
+        elif os.path.exists("cbo_store.json.gz"):
+            self.bill_costs = CboStore("cbo_store.json.gz").bill_costs()
+        self._index_sessions(roster)
+        #Every query is answered from the arrays above, so the answers can be
+        #   kept until the service is reloaded
+        self.member = lru_cache(maxsize=cache_size)(self.member)
+        self.breakdown = lru_cache(maxsize=cache_size)(self.breakdown)
+        self.leaderboard = lru_cache(maxsize=cache_size)(self.leaderboard)
+        self.groups = lru_cache(maxsize=cache_size)(self.groups)
+
+    def _index_sessions(self, roster):
+        """Find the sessions every member served in, their score from the
+        bills of each session and where each member's votes are"""
+        served = dict()
+        if roster is not None and os.path.exists(roster):
+            with open(roster) as f:
+                members = json.load(f)["members"]
+            for row, member in enumerate(self.columns["member_id"]):
+                if member in members:
+                    served[row] = {int(session) for session in members[member]["sessions"]}
+        in_roster = set(served)
+        totals = dict()
+        self.chambers = dict()
+        for position, votes in self.votes.items():
+            if votes is None or not len(votes):
+                continue
+            #Each vote's row in the table, its session and what it adds to the
+            #   score; votes of members who aren't in the table are left out
+            row_of = np.array([self.names.get((key, position), -1) for key in votes.member_keys], dtype=np.int64)
+            session_of = np.array([bill_key(bill)[1] for bill in votes.bill_names], dtype=np.int64)
+            cost_of = np.array([self.bill_costs.get(bill, 0) for bill in votes.bill_names], dtype=float)
+            rows, sessions = row_of[votes.members], session_of[votes.bills]
+            order = np.argsort(rows, kind="stable")
+            self.chambers[position] = Chamber(votes, session_of, cost_of, order,
+                                              np.searchsorted(rows[order], np.arange(self.rows + 1)))
+            keep = rows >= 0
+            values = WEIGHTS[votes.codes]*cost_of[votes.bills]
+            for session in np.unique(sessions[keep]):
+                in_session = keep & (sessions == session)
+                np.add.at(totals.setdefault(int(session), np.zeros(self.rows)), rows[in_session], values[in_session])
+                for row in np.unique(rows[in_session]):
+                    if int(row) not in in_roster:
+                        served.setdefault(int(row), set()).add(int(session))
+        self.sessions = dict()
+        for row, member_sessions in served.items():
+            for session in member_sessions:
+                self.sessions.setdefault(session, np.zeros(self.rows, dtype=bool))[row] = True
+        self.session_scores = dict()
+        for session, mask in self.sessions.items():
+            scores = totals.get(session, np.zeros(self.rows)).copy()
+            scores[~mask] = np.nan
+            self.session_scores[session] = scores
+
+    def _score(self, row, session=None):
+        score = self.columns["Score"][row] if session is None else self.session_scores[session][row]
+        return MemberScore(self.columns["member_id"][row], self.columns["Name"][row], self.columns["Position"][row],
+                           self.columns["Party"][row], self.columns["State"][row], self.columns["Region"][row],
+                           self.columns["Division"][row], int(self.columns["Tenure"][row]), float(score))
+
+    def find(self, member=None, name=None, position=None):
+        """Return the row of a member by bioguide id, or by name and position
+        ("Rep" or "Sen"), or None"""
+        if member is not None:
+            return self.ids.get(member)
+        return self.names.get((name, position))
+
+    def member(self, member=None, name=None, position=None, session=None):
+        """Return a member's MemberScore, or None if there's no such member
+
+        Parameters:
+            member (str): bioguide id, or the member_id of the scores table
+            name, position (str): the member's key and "Rep" or "Sen" instead
+            session (int): their score from the bills of one session instead
+                of every session
+        """
+        row = self.find(member, name, position)
+        if row is None or (session is not None and not self._served(row, session)):
+            return None
+        return self._score(row, session)
+
+    def _served(self, row, session):
+        return session in self.sessions and bool(self.sessions[session][row])
+
+    def breakdown(self, member=None, name=None, position=None, session=None):
+        """Return how every bill a member voted on added to their score,
+        largest first
+
+        Parameters:
+            member, name, position: which member, like member
+            session (int): only the bills of one session
+
+        Returns:
+            (tuple): a BillContribution for every vote, by how much it moved
+                     the score; their contributions add up to the score
+        """
+        row = self.find(member, name, position)
+        if row is None or self.columns["Position"][row] not in self.chambers:
+            return tuple()
+        chamber = self.chambers[self.columns["Position"][row]]
+        votes = chamber.order[chamber.starts[row]:chamber.starts[row+1]]
+        bills = chamber.votes.bills[votes]
+        if session is not None:
+            in_session = chamber.bill_sessions[bills] == session
+            votes, bills = votes[in_session], bills[in_session]
+        codes = chamber.votes.codes[votes]
+        net_costs = chamber.bill_costs[bills]
+        contributions = net_costs*WEIGHTS[codes]
+        #Largest first, ties in the order the votes were recorded
+        ranked = np.argsort(-np.abs(contributions), kind="stable")
+        return tuple(BillContribution(chamber.votes.bill_names[bill], int(chamber.bill_sessions[bill]), VOTE_NAMES[code],
+                                      float(net_cost), float(contribution))
+                     for bill, code, net_cost, contribution in zip(bills[ranked].tolist(), codes[ranked].tolist(),
+                                                                   net_costs[ranked], contributions[ranked]))
+
+    def _mask(self, state=None, region=None, division=None, party=None, position=None, session=None):
+        """Return which members match every filter given, or None for all"""
+        mask = None
+        for field, value in (("state", state), ("region", region), ("division", division), ("party", party),
+                             ("position", position)):
+            if value is None:
+                continue
+            values = self.masks.get((FILTERS[field], value))
+            if values is None:
+                return np.zeros(self.rows, dtype=bool)
+            mask = values if mask is None else mask & values
+        if session is not None:
+            served = self.sessions.get(session, np.zeros(self.rows, dtype=bool))
+            mask = served if mask is None else mask & served
+        return mask
+
+    def leaderboard(self, top=10, lowest=False, state=None, region=None, division=None, party=None, position=None,
+                    session=None):
+        """Return the members with the highest (most fiscally responsible) or
+        lowest scores
+
+        Parameters:
+            top (int): how many members, or None for all of them
+            lowest (bool): start from the lowest score instead
+            state, region, division, party, position: only members with these
+                values, e.g. state="UT", party="R", position="Sen"
+            session (int): only members who served in it, ranked by their
+                score from the bills of that session
+
+        Returns:
+            (tuple): MemberScores in order
+        """
+        mask = self._mask(state, region, division, party, position, session)
+        if session is None:
+            order = self.order[::-1] if lowest else self.order
+        else:
+            scores = self.session_scores.get(session, np.full(self.rows, np.nan))
+            order = np.argsort(scores if lowest else -scores, kind="stable")
+        if mask is not None:
+            order = order[mask[order]]
+        return tuple(self._score(row, session) for row in order[:top])
+
+    def groups(self, by="state", session=None, party=None, position=None):
+        """Return the members and average score of every state, region,
+        division, party or position, highest average first
+
+        Parameters:
+            by (str): "state", "region", "division", "party" or "position"
+            session (int): only members who served in it, with their score
+                from its bills
+            party, position: only members with these values
+
+        Returns:
+            (tuple): GroupScores in order
+        """
+        column = FILTERS[by]
+        mask = self._mask(party=party, position=position, session=session)
+        scores = self.columns["Score"] if session is None else self.session_scores.get(session, np.full(self.rows, np.nan))
+        result = list()
+        for (name, value), members in self.masks.items():
+            if name != column or value is None:
+                continue
+            if mask is not None:
+                members = members & mask
+            if members.any():
+                values = scores[members]
+                result.append(GroupScore(value, int(members.sum()), float(values.mean()), float(np.median(values)),
+                                         float(values.min()), float(values.max())))
+        result.sort(key=lambda group: -group.mean)
+        return tuple(result)
+
+    def cache_info(self):
+        """Return the hits and misses of the LRU cache of every kind of query"""
+        return {name:getattr(self, name).cache_info()._asdict() for name in ("member", "breakdown", "leaderboard", "groups")}
+
+def _load_votes(path):
+    if path is None or not os.path.exists(path):
+        return None
+    return VoteStore.load(path)
+
+def _json(value):
+    """Turn the namedtuples a query returns into what json can write"""
+    if isinstance(value, tuple) and hasattr(value, "_asdict"):
+        return {key:_json(item) for key, item in value._asdict().items()}
+    if isinstance(value, (tuple, list)):
+        return [_json(item) for item in value]
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+def serve(service, host="127.0.0.1", port=8000):
+    """Answer queries as JSON over HTTP until interrupted, one thread per
+    request
+
+    GET /member?id=A000014 (or name=...&position=Rep), /breakdown?id=...,
+    /leaderboard?state=UT&party=R&session=110&top=10&lowest=1 and
+    /groups?by=division&session=110. Every query takes the parameters of
+    the method of the same name.
+    """
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+
+    def arguments(query):
+        values = {key:value[-1] for key, value in parse_qs(query).items()}
+        if "id" in values:
+            values["member"] = values.pop("id")
+        for key in ("session", "top"):
+            if key in values:
+                values[key] = int(values[key])
+        if "lowest" in values:
+            values["lowest"] = values["lowest"] not in ('', '0', "false")
+        return values
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = url.path.strip('/')
+            if query not in ("member", "breakdown", "leaderboard", "groups"):
+                return self.reply(404, {"error":"unknown query " + url.path})
+            try:
+                answer = getattr(service, query)(**arguments(url.query))
+            except (TypeError, ValueError, KeyError) as e:
+                return self.reply(400, {"error":str(e)})
+            if answer is None:
+                return self.reply(404, {"error":"no such member"})
+            self.reply(200, _json(answer))
+
+        def reply(self, status, body):
+            content = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print("Serving scores on http://%s:%d" % (host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the Fiscal Responsibility scores as JSON")
+    parser.add_argument("--scores", default="scores_data.parquet", help="scores_data.parquet or scores_data.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    serve(ScoreService(args.scores), args.host, args.port)
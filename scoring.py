@@ -0,0 +1,122 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: scoring.py
+Purpose: *Store every member's votes as sparse member x bill matrices
+         *Compute Fiscal Responsibility Scores as matrix-vector products with
+          the CBO cost estimate of each bill
+"""
+import numpy as np
+from scipy import sparse
+
+#Each vote is stored as a small integer so a whole roll call fits in an int8
+#   column. 0 means the member has no vote recorded for the bill.
+VOTE_CODES = {"Yeas":1, "Nays":2, "Not Voting":3}
+
+#The original Fiscal Responsibility Score only counts the bills a member voted
+#   for
+YEAS_ONLY = {"Yeas":1}
+#Also hold members responsible for voting against bills that save money
+PENALIZE_NAYS = {"Yeas":1, "Nays":-1}
+
+class VoteMatrix:
+    """Yea, nay and not voting matrices with a row for every member and a column
+    for every bill.
+
+    Attributes:
+        members (list): member keys in row order
+        bills (list): bill names in column order
+        bill_ids (dict): bill name -> column
+        tenures (ndarray): number of sessions served by each member
+        matrices (dict): "Yeas", "Nays", "Not Voting" -> csr_matrix of 0s and 1s
+    """
+    def __init__(self, members, bills, rows, cols, codes, tenures=None):
+        """
+        Parameters:
+            members (list): member keys in row order
+            bills (list): bill names in column order
+            rows (ndarray): member row of every vote
+            cols (ndarray): bill column of every vote
+            codes (ndarray): VOTE_CODES value of every vote
+            tenures (ndarray): number of sessions served by each member
+        """
+        self.members = list(members)
+        self.bills = list(bills)
+        self.bill_ids = {bill:i for i, bill in enumerate(self.bills)}
+        if tenures is None:
+            tenures = np.ones(len(self.members))
+        self.tenures = np.asarray(tenures, dtype=float)
+        rows, cols, codes = np.asarray(rows), np.asarray(cols), np.asarray(codes)
+        shape = (len(self.members), len(self.bills))
+        self.matrices = dict()
+        for vote_type, code in VOTE_CODES.items():
+            mask = codes == code
+            matrix = sparse.csr_matrix((np.ones(mask.sum()), (rows[mask], cols[mask])), shape=shape)
+            #A bill listed twice for the same member still only counts once
+            matrix.sum_duplicates()
+            matrix.data[:] = 1
+            self.matrices[vote_type] = matrix
+
+    @classmethod
+    def from_store(cls, members, votes, bills):
+        """Build the vote matrices from a chamber's VoteStore
+
+        Parameters:
+            members (dict): Representatives or Senators, used for the row
+                order and each member's tenure
+            votes (VoteStore): the chamber's votes
+            bills (iterable): bill names to use as columns. Votes on any other
+                bill are left out.
+
+        Returns:
+            (VoteMatrix)
+        """
+        keys = list(members.keys())
+        bills = list(bills)
+        bill_ids = {bill:i for i, bill in enumerate(bills)}
+        #Translate the store's ids to rows and columns; -1 is left out
+        rows_by_key = {key:row for row, key in enumerate(keys)}
+        row_of = np.array([rows_by_key.get(key, -1) for key in votes.member_keys], dtype=np.int64)
+        col_of = np.array([bill_ids.get(bill, -1) for bill in votes.bill_names], dtype=np.int64)
+        rows = row_of[votes.members] if len(votes) else np.zeros(0, dtype=np.int64)
+        cols = col_of[votes.bills] if len(votes) else np.zeros(0, dtype=np.int64)
+        keep = (rows >= 0) & (cols >= 0)
+        tenures = [len(members[key]["Sessions"]) for key in keys]
+        return cls(keys, bills, rows[keep], cols[keep], votes.codes[keep], tenures)
+
+    def cost_vector(self, bill_costs):
+        """Line up the net cost estimates with the columns of the matrices
+
+        Parameters:
+            bill_costs (dict): bill name -> net cost estimate from
+                get_cost_estimates. Bills without an estimate count as 0.
+
+        Returns:
+            (ndarray): net cost estimate of every bill in column order
+        """
+        return np.array([bill_costs.get(bill, 0) for bill in self.bills], dtype=float)
+
+    def score(self, bill_costs, weights=YEAS_ONLY, per_session=False):
+        """Compute the Fiscal Responsibility Score of every member
+
+        Parameters:
+            bill_costs (dict or ndarray): bill name -> net cost estimate, or
+                the vector returned by cost_vector
+            weights (dict): how much each vote type counts toward the score,
+                e.g. YEAS_ONLY or PENALIZE_NAYS. Each vote type is one sparse
+                matrix-vector product.
+            per_session (bool): divide each score by the number of sessions the
+                member served
+
+        Returns:
+            (ndarray): score of every member in row order
+        """
+        if isinstance(bill_costs, dict):
+            bill_costs = self.cost_vector(bill_costs)
+        scores = np.zeros(len(self.members))
+        for vote_type, weight in weights.items():
+            if weight != 0:
+                scores += weight * self.matrices[vote_type].dot(bill_costs)
+        if per_session:
+            scores /= np.maximum(self.tenures, 1)
+        return scores
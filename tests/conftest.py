@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import pytest
+
+#The modules are scripts in the repository root, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class StubHandler(BaseHTTPRequestHandler):
+    """GET /ok answers 200, /fail?status=503&times=2 answers the status the
+    first given number of times it's asked for and 200 after that, and
+    /slow?seconds=0.3 answers 200 after a pause"""
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key:value[-1] for key, value in parse_qs(url.query).items()}
+        with self.server.lock:
+            self.server.requests.append((time.monotonic(), self.path))
+            asked = sum(1 for _, path in self.server.requests if path == self.path)
+        status = 200
+        if url.path == "/fail" and asked <= int(query.get("times", 1)):
+            status = int(query["status"])
+        elif url.path == "/slow":
+            time.sleep(float(query["seconds"]))
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests, server.lock = list(), threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
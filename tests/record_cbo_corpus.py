@@ -0,0 +1,156 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: record_cbo_corpus.py
+Purpose: *Record CBO summaries with the costs and revenues the original
+          get_cost_estimates found in them, for test_cbo_parser.py to compare
+          parse_cbo_summary against
+         *Add the summaries of a crawl from its cbo_store.json.gz, or record
+          the corpus again after editing its texts
+
+The parser below is the loop from the first version of get_cost_estimates,
+unchanged except that "this year" is a parameter instead of
+date.today().year, so the recorded results don't depend on when they were
+recorded.
+"""
+import os
+import re
+import json
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cbo_summaries.json")
+
+def baseline_parse(summary, year, current_year):
+    """Return (cost, revenue) of a summary the way the original
+    get_cost_estimates found them"""
+    cost, revenue, dollar = 0, 0, 0
+    #Split the summary into sentences
+    sentences = re.compile(r"\. [A-Z]|\.\n[A-Z]").split(summary)
+    first_year, last_year = None, None
+    for i, sentence in enumerate(sentences):
+        found_cost = False
+        try:
+            dollar_strings = re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?\n? ?(?:billion|million)?", re.IGNORECASE).findall(sentence)
+        except:
+            continue
+        for dollar_string in dollar_strings:
+            cost_keyword_finder = re.compile(r"(?:cost|provides|(?:additional|increase|resul).*(?:spending|outlay)|discretion.*spending|(?:decrease|reduc).*revenue|and premium payments|revenue.*(?:lower|losses)).*"+dollar_string[1:], re.IGNORECASE | re.DOTALL)
+            strict_revenue_finder = re.compile(r"(?:(?:additional|increase|resul)[^\$]+(?:sav|revenue|collection|assessments)|(?:reduc|decrease)[^\$]+(?:cost|spend|outlay)|(?:cost|spend|outlay)[^\$]+(?:decrease|lower)|(?:offsetting|rais)[^\$]+(?:collect|receipts))[^\$]+"+r"\$"+dollar_string[1:], re.IGNORECASE | re.DOTALL)
+            last_dollar, last_last_year, last_first_year = dollar, last_year, first_year
+            first_year, last_year = None, None
+            digits = re.compile(r"\d+(?:,\d+)?(?:\.\d+)?").findall(dollar_string)[0].replace(',','').replace('\n',' ')
+            dollar = float(digits)
+            if bool(re.compile("billion").search(dollar_string)):
+                dollar *= 1000000000
+            elif bool(re.compile("million").search(dollar_string)):
+                dollar *= 1000000
+            if bool(cost_keyword_finder.search(sentence)) and not bool(strict_revenue_finder.search(sentence)):
+                if bool(re.compile(r"\([^\)]*"+dollar_string[1:]).search(sentence)):
+                    continue
+                cost += dollar
+                found_cost = True
+                try:
+                    first_year = int(re.compile(dollar_string[1:]+r"[^\$-]+?\d{4}").findall(re.compile(dollar_string[1:]+r"[^\$-]+?\d{4}[^\.]+?\d{4}").findall(sentence)[0])[0][-4:])
+                except:
+                    pass
+                try:
+                    last_year = int(re.compile(dollar_string[1:]+r"[^\$]+(?:\d{4}-)?\d{4}").findall(sentence)[0][-4:])
+                except:
+                    pass
+                if last_year is not None and last_last_year is not None:
+                    if first_year is not None and last_first_year is not None:
+                        if first_year <= last_first_year and last_year>=last_last_year:
+                            cost -= last_dollar
+                    else:
+                        if last_last_year > year and last_year > last_last_year:
+                            cost -= last_dollar
+                if bool(re.compile(dollar_string[1:] + r".*?(?:each[ a-z]{1,25}year|a year|annually)").search(sentence)) or bool(re.compile(r"(?:each[ a-z]{1,25}year|annually)[^\$]+"+r"\$"+dollar_string[1:]).search(sentence)):
+                    if last_year is not None:
+                        end_year = last_year
+                    else:
+                        end_year = current_year
+                    if first_year is not None:
+                        begin_year = first_year
+                    else:
+                        begin_year = year+1
+                    cost += (1+end_year - begin_year)*dollar - dollar
+        found_revenue = False
+        try:
+            dollar_strings = re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?(?: billion| million)?", re.IGNORECASE).findall(sentence)
+        except:
+            continue
+        for dollar_string in dollar_strings:
+            revenue_keyword_finder = re.compile(r"(?:(?:additional|increase|resul).*(?:sav|revenue|collection|assessments)|(?:reduc|decrease).*(?:cost|spend|outlay)|(?:cost|spend|outlay).*(?:decrease|lower)|(?:offsetting|rais).*(?:collect|receipts)).*"+dollar_string[1:], re.IGNORECASE | re.DOTALL)
+            strict_cost_finder =  re.compile(r"(?:cost|provides|(?:additional|increase|resul)[^\$]+(?:spending|outlay)|discretion[^\$]+spending|(?:decrease|reduc)[^\$]+revenue|and premium payments|revenue[^\$]+(?:losses|lower))[^\$]+"+r"\$"+dollar_string[1:], re.IGNORECASE | re.DOTALL)
+            last_dollar, last_last_year, last_first_year = dollar, last_year, first_year
+            first_year, last_year = None, None
+            digits = re.compile(r"\d+(?:,\d+)?(?:\.\d+)?").findall(dollar_string)[0].replace(',','').replace('\n',' ')
+            dollar = float(digits)
+            if bool(re.compile("billion").search(dollar_string)):
+                dollar *= 1000000000
+            elif bool(re.compile("million").search(dollar_string)):
+                dollar *= 1000000
+            if bool(revenue_keyword_finder.search(sentence)) and not bool(cost_keyword_finder.search(sentence)):
+                if bool(re.compile(r"\([^\)]*"+dollar_string[1:]).search(sentence)):
+                    continue
+                revenue += dollar
+                found_revenue = True
+                try:
+                    first_year = int(re.compile(dollar_string[1:]+r"[^\$-]+?\d{4}").findall(re.compile(dollar_string[1:]+r"[^\$-]+?\d{4}[^\.]+?\d{4}").findall(sentence)[0])[0][-4:])
+                except:
+                    pass
+                try:
+                    last_year = int(re.compile(dollar_string[1:]+r"[^\$]+(?:\d{4}-)?\d{4}").findall(sentence)[0][-4:])
+                except:
+                    pass
+                if last_year is not None and last_last_year is not None and not found_cost:
+                    if first_year is not None and last_first_year is not None:
+                        if first_year <= last_first_year and last_year>=last_last_year:
+                            revenue -= last_dollar
+                    else:
+                        if last_last_year > year and last_year > last_last_year:
+                            revenue -= last_dollar
+                if bool(re.compile(dollar_string[1:] + r".*?(?:each[ a-z]{1,25}year|a year|annually)").search(sentence)) or bool(re.compile(r"(?:each[ a-z]{1,25}year|annually)[^\$]+"+r"\$"+dollar_string[1:]).search(sentence)):
+                    if last_year is not None:
+                        end_year = last_year
+                    else:
+                        end_year = current_year
+                    if first_year is not None:
+                        begin_year = first_year
+                    else:
+                        begin_year = year+1
+                    revenue += (1+end_year - begin_year)*dollar - dollar
+    return cost, revenue
+
+def record(summaries, path=CORPUS_PATH):
+    """Write summaries to the corpus with what baseline_parse finds in them
+
+    Parameters:
+        summaries (list): dictionaries with "bill", "source", "year",
+            "current_year" and "text"
+    """
+    corpus = list()
+    for summary in summaries:
+        cost, revenue = baseline_parse(summary["text"], summary["year"], summary["current_year"])
+        corpus.append({key:summary[key] for key in ("bill", "source", "year", "current_year", "text")})
+        corpus[-1].update(cost=cost, revenue=revenue)
+    with open(path, 'w') as f:
+        json.dump(corpus, f, indent=1)
+    return corpus
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    parser = argparse.ArgumentParser(description="Record the CBO summary corpus with the original parser's results")
+    parser.add_argument("--store", default=None, help="cbo_store.json.gz of a crawl to add summaries from")
+    parser.add_argument("--limit", type=int, default=50, help="most summaries to add from the store")
+    args = parser.parse_args()
+    with open(CORPUS_PATH) as f:
+        summaries = json.load(f)
+    if args.store is not None:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from cbo_store import CboStore
+        known = {summary["bill"] for summary in summaries}
+        added = [dict(bill=bill_name, **record_) for bill_name, record_ in sorted(CboStore(args.store).records.items())
+                 if bill_name not in known][:args.limit]
+        summaries += added
+    print(len(record(summaries)), "summaries recorded")
@@ -0,0 +1,37 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_benchmark.py
+Purpose: *Check that benchmark.py replays the recorded corpus in
+          tests/data/recorded through every stage of the scraper offline
+"""
+import shutil
+import pytest
+from benchmark import RECORDED_CACHE, run_benchmarks, parse_benchmarks, recorded_summaries, PAGE_TYPES
+from page_cache import PageCache
+
+SESSIONS = [108]
+
+@pytest.fixture
+def cache(tmp_path):
+    #The pdf text extracted during the run is saved in the cache, so the
+    #   corpus is replayed from a copy
+    shutil.copytree(RECORDED_CACHE, str(tmp_path / "recorded"))
+    return PageCache(str(tmp_path / "recorded"), offline=True)
+
+def test_every_stage_is_replayed(cache):
+    results = {row["stage"]:row for row in run_benchmarks(cache, SESSIONS, recorded_summaries(cache), "recorded")}
+    stages = ["members", "public laws", "house votes", "senate votes", "cbo estimates", "cbo parser",
+              "assign_scores", "create_csv"]
+    assert set(stages) <= set(results)
+    assert all(results[stage]["items"] > 0 for stage in stages)
+    #5 Representatives and 3 Senators, the 4 public laws, and every Rep's
+    #   vote on the 3 bills the House passed
+    assert results["members"]["items"] == 8
+    assert results["public laws"]["items"] == 4
+    assert results["house votes"]["items"] == 15
+
+def test_every_page_type_is_parsed(cache):
+    results = parse_benchmarks(cache, "recorded")
+    assert {row["stage"] for row in results} == {"parse %s (%s)" % (page_type[0], parser)
+                                                 for page_type in PAGE_TYPES for parser in ("bs4", "page_parsers")}
@@ -0,0 +1,26 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_cbo_parser.py
+Purpose: *Check that parse_cbo_summary finds the same costs and revenues as
+          the original get_cost_estimates in every summary of the regression
+          corpus, tests/data/cbo_summaries.json (see record_cbo_corpus.py)
+"""
+import json
+import pytest
+from cbo_parser import parse_cbo_summary
+from record_cbo_corpus import CORPUS_PATH, baseline_parse
+
+with open(CORPUS_PATH) as f:
+    CORPUS = json.load(f)
+
+@pytest.mark.parametrize("summary", CORPUS, ids=[summary["bill"] for summary in CORPUS])
+def test_same_as_baseline(summary):
+    estimate = parse_cbo_summary(summary["text"], summary["year"], summary["current_year"])
+    assert (estimate["cost"], estimate["revenue"]) == (summary["cost"], summary["revenue"])
+
+def test_corpus_is_recorded():
+    #The recorded results are what the original parser finds in the texts,
+    #   so editing a text means recording the corpus again
+    for summary in CORPUS:
+        assert baseline_parse(summary["text"], summary["year"], summary["current_year"]) == (summary["cost"], summary["revenue"])
@@ -0,0 +1,50 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_cbo_store_fill.py
+Purpose: *Check that bills restored from cbo-<session> checkpoints saved
+          before there was a CBO store are recorded in it, from the page cache
+"""
+from benchmark import write_synthetic_corpus
+from bill_catalogue import BillCatalogue
+from cbo_index import CboIndex
+from cbo_store import CboStore
+from page_cache import PageCache
+from pipeline import Checkpoints
+from web_scraping import checkpointed_cost_estimates, fill_cbo_store, get_cost_estimates
+
+SESSIONS = [110]
+
+def _corpus(tmp_path):
+    write_synthetic_corpus(str(tmp_path / "cache"), sessions=tuple(SESSIONS), representatives=4, senators=2,
+                           bills=20, pdfs=[])
+    cache = PageCache(str(tmp_path / "cache"), offline=True)
+    return cache, BillCatalogue(cache), CboIndex(cache)
+
+def test_restored_bills_are_recorded(tmp_path):
+    cache, catalogue, index = _corpus(tmp_path)
+    checkpoints = Checkpoints(str(tmp_path / "checkpoints"))
+    #A run from before the store only saved the checkpoints
+    before = checkpointed_cost_estimates(SESSIONS, checkpoints, cache, catalogue, index=index)
+    assert before[0]
+    store = CboStore()
+    after = checkpointed_cost_estimates(SESSIONS, Checkpoints(str(tmp_path / "checkpoints")), cache, catalogue,
+                                        index=index, store=store)
+    assert after == tuple(before)
+    assert set(store.records) == set(before[0])
+    assert store.bill_costs() == before[0]
+
+def test_bills_that_cannot_be_recorded_are_reported(tmp_path):
+    cache, catalogue, index = _corpus(tmp_path)
+    store = CboStore()
+    assert fill_cbo_store({"H.R.99999-110th":-1e6}, store, cache, index=index) == ["H.R.99999-110th"]
+    assert "H.R.99999-110th" not in store
+
+def test_paragraphs_with_tags_send_the_bill_to_the_pdf(tmp_path):
+    cache, catalogue, index = _corpus(tmp_path)
+    bill_name = next(iter(index.session(SESSIONS[0])))
+    #A summary with a link in it, which has no string
+    cache.store(index.lookup(bill_name)["url"], '<html><time>March 1, 2007</time>'
+                '<p>See <a href="/about">the notes</a> for $5 million.</p></html>')
+    bill_costs, no_report, from_summary, from_pdf, no_estimate = get_cost_estimates([bill_name], cache, index=index)
+    assert no_estimate == [bill_name] and not bill_costs
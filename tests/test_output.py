@@ -0,0 +1,31 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_output.py
+Purpose: *Check that the scores table loads from the committed
+          scores_data.csv, with regions, when there's no .parquet file
+"""
+import os
+import shutil
+from output import load_scores, load_regions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_csv_is_read_without_the_parquet(tmp_path):
+    shutil.copy(os.path.join(ROOT, "scores_data.csv"), str(tmp_path))
+    regions = load_regions(os.path.join(ROOT, "regions.csv"))
+    columns = ["Position", "Party", "Tenure", "Score", "YOB", "Region", "Division"]
+    df = load_scores(str(tmp_path / "scores_data.parquet"), columns=columns, regions=regions)
+    assert list(df.columns) == columns
+    assert len(df) == len(load_scores(os.path.join(ROOT, "scores_data.csv"), columns=["Name"]))
+    #Every state has a region; only the territories and D.C. have none
+    assert df["Region"].notna().sum() > 0.95*len(df)
+    assert str(df["Tenure"].dtype) == "int16" and str(df["Region"].dtype) == "category"
+
+def test_regions_match_the_states(tmp_path):
+    shutil.copy(os.path.join(ROOT, "scores_data.csv"), str(tmp_path))
+    regions = load_regions(os.path.join(ROOT, "regions.csv"))
+    df = load_scores(str(tmp_path / "scores_data.csv"), regions=regions)
+    assert "Unnamed: 0" not in df.columns
+    row = df[df["Name"] == "Abercrombie, Neil"].iloc[0]
+    assert (row["State"], row["Region"], row["Division"]) == ("HI", "West", "Pacific")
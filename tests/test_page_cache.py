@@ -0,0 +1,31 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_page_cache.py
+Purpose: *Check that the page cache raises on error pages instead of handing
+          them to the parsers, and only keeps pages that were sent
+"""
+import pytest
+import requests
+from page_cache import PageCache, CacheMiss
+from scheduler import PoliteSession
+
+def cache(tmp_path, offline=False):
+    return PageCache(str(tmp_path), offline=offline, session=PoliteSession(default_rate=1000, retries=1, backoff=0))
+
+def url(server, path):
+    return "http://127.0.0.1:%d%s" % (server.server_address[1], path)
+
+def test_pages_are_cached(server, tmp_path):
+    assert cache(tmp_path).get_bytes(url(server, "/ok"))[0] == b"ok"
+    assert cache(tmp_path, offline=True).get(url(server, "/ok")) == "ok"
+
+@pytest.mark.parametrize("status", [404, 503])
+def test_error_pages_raise(server, tmp_path, status):
+    #Still failing after the retry
+    page = url(server, "/fail?status=%d&times=2" % status)
+    with pytest.raises(requests.HTTPError) as error:
+        cache(tmp_path).get_bytes(page)
+    assert error.value.response.status_code == status
+    with pytest.raises(CacheMiss):
+        cache(tmp_path, offline=True).get_bytes(page)
@@ -0,0 +1,207 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_page_parsers.py
+Purpose: *Check that page_parsers.py and roll_calls.py read the same things
+          from the recorded pages in tests/data/recorded as the BeautifulSoup
+          code of the first version of web_scraping.py, with lxml and with
+          the html.parser fallback
+
+The baseline_* functions are the loops of the first version, unchanged
+except that they return what they read instead of storing it. The Senate
+isn't compared: the first version read the .htm vote menus and roll calls,
+and the XML files read now are different pages.
+"""
+import re
+from urllib.parse import urljoin
+import pytest
+from bs4 import BeautifulSoup
+import page_parsers
+from benchmark import RECORDED_CACHE, PAGE_TYPES, _cache_keys
+from bill_catalogue import PUBLIC_LAWS_URL, fetch_public_laws
+from cbo_index import COST_ESTIMATES_URL, ordinal, index_listing_page
+from page_cache import PageCache
+from page_parsers import member_search_rows, links, cbo_facet_href, estimate_page
+from roll_calls import index_house_roll_call_list, house_votes
+from roster import normalize_name
+from web_scraping import ROLL_CALL_PAGES, HOUSE_VOTES_URL
+
+SESSION = 108
+
+@pytest.fixture(params=["lxml", "html.parser"])
+def cache(request, monkeypatch):
+    if request.param == "html.parser":
+        monkeypatch.setattr(page_parsers, "etree", None)
+    elif page_parsers.etree is None:
+        pytest.skip("lxml isn't installed")
+    return PageCache(RECORDED_CACHE, offline=True)
+
+def pages(cache, kind):
+    """Return (key, page) of every recorded page of one kind of PAGE_TYPES"""
+    matches = next(page_type[1] for page_type in PAGE_TYPES if page_type[0] == kind)
+    found = [(key, cache.read(key)) for key in sorted(_cache_keys(cache)) if matches(key)]
+    assert found, "no %s pages recorded" % kind
+    return found
+
+def baseline_member_search(page):
+    """Return (name, birth, position, party, state) of every member"""
+    members = list()
+    soup = BeautifulSoup(page, 'html.parser')
+    member_name_tags = soup.find_all(name='a', href=True)
+    for tag in member_name_tags[:-1]:
+        name = tag.next
+        split = name.split(sep=',')
+        #Deal with the rare case that the last name starts with lowercase
+        if split[0][0].islower():
+            for i in range(1,len(split[0])):
+                if split[0][i].isupper():
+                    first = split[0][:i+1]
+                    for j in range(len(split[0][i+1:])):
+                        first += split[0][i+j+1].lower()
+                    break
+            split[0] = first
+            name = ''.join([word + "," for word in split]).strip()[:-1]
+        else:
+            split[0] = split[0][0] + split[0][1:].lower()
+            name = ''.join([word + "," for word in split]).strip()[:-1]
+        birth = tag.next.next.string[:4]
+        position = tag.next.next.next.next.next.next
+        party = tag.next.next.next.next.next.next.next.next
+        state = tag.next.next.next.next.next.next.next.next.next.next
+        members.append((name, birth, position, party, state))
+    return members
+
+def baseline_public_laws(page, session):
+    senate_bill_finder = re.compile(r"^S\.\d+$")
+    house_bill_finder = re.compile(r"^H.R.\d+$")
+    senate_bills = []
+    house_bills = []
+    soup = BeautifulSoup(page, "html.parser")
+    for tag in soup.find_all(name='a'):
+        if tag.string is not None:
+            if bool(senate_bill_finder.search(tag.string)):
+                senate_bills.append(tag.string+'-'+str(session)+"th")
+            if bool(house_bill_finder.search(tag.string)):
+                house_bills.append(tag.string+'-'+str(session)+"th")
+    return house_bills, senate_bills
+
+def baseline_roll_call_pages(page):
+    soup = BeautifulSoup(page, 'html.parser')
+    return [tag.attrs['href'] for tag in soup.find_all(name='a', href=True, string=re.compile(r"^Roll Calls"))]
+
+def baseline_roll_call_list(page):
+    """Return bill name -> (roll call URL or None if the question isn't "On
+    Passage", question) for every bill on the page"""
+    rows = dict()
+    page_soup = BeautifulSoup(page, 'html.parser')
+    bill_tags = page_soup.find_all(name='a', href=True, string=re.compile(r"^H R \d+$"))
+    bill_tags += page_soup.find_all(name='a', href=True, string=re.compile(r"^S \d+$"))
+    bills_on_page = set([tag.string for tag in bill_tags])
+    for bill_on_page in bills_on_page:
+        tag = page_soup.find(name='a', href=True, string=bill_on_page)
+        roll_call_url = None
+        if tag.next.next.next.string == "On Passage":
+            roll_call_url = tag.previous.previous.previous.previous.previous.previous.previous.previous.previous.attrs['href']
+        rows[''.join(i+'.' for i in bill_on_page.split())[:-1]] = (roll_call_url, tag.next.next.next.string)
+    return rows
+
+def baseline_house_votes(xml):
+    """Return (name, party, state, vote) of every row of a roll call"""
+    votes = list()
+    soup = BeautifulSoup(xml, 'html.parser')
+    tags = soup.find_all(name='recorded-vote')
+    for tag in tags:
+        rep_name = tag.next.string
+        state = tag.next.attrs['state']
+        party = tag.next.attrs['party']
+        #Store state if it's there
+        if bool(re.compile(r"\(").search(rep_name)):
+            state = rep_name.split(sep='(')[-1][0:2]
+            #Remove the state from the rep_name
+            rep_name = ''.join(rep_name.split(sep='(')[:-1]).strip()
+        votes.append((rep_name, party, state, tag.next.next.next.string))
+    return votes
+
+def baseline_cbo_facet(page, session):
+    soup = BeautifulSoup(page, 'html.parser')
+    try:
+        return soup.find(name='span', attrs={"class":"facet-item__value"}, string=re.compile(session)).previous.attrs['href']
+    except:
+        return None
+
+def baseline_cbo_listing(page, name):
+    #cbo.gov has strings as S. 1582 rather than S.1582 so we must
+    #   add a space to match the text
+    split = name.split(sep='.')
+    if len(split) < 3:
+        new_name = split[0] + '. ' + split[1]
+    else:
+        new_name = split[0]+'.'+split[1]+'. ' + split[2]
+    soup = BeautifulSoup(page, 'html.parser')
+    try:
+        return soup.find(name='a', string=re.compile(new_name)).attrs['href']
+    except:
+        return None
+
+def baseline_estimate_page(page):
+    """Return the year, the paragraphs and the pdf link of an estimate page"""
+    soup = BeautifulSoup(page, 'html.parser')
+    year = int(soup.find("time").string.split()[-1])
+    summary = [tag.string for tag in soup.find_all(name='p')]
+    try:
+        pdf_link = soup.find(name='a', string="View Document").attrs['href']
+    except:
+        pdf_link = None
+    return year, summary, pdf_link
+
+def test_member_search(cache):
+    for key, page in pages(cache, "member search"):
+        rows = [(normalize_name(row.name), row.birth, row.position, row.party, row.state)
+                for row in member_search_rows(page)]
+        assert rows and rows == baseline_member_search(page)
+
+def test_public_laws(cache):
+    for key, page in pages(cache, "public laws"):
+        session = int(key[len(PUBLIC_LAWS_URL):])
+        assert fetch_public_laws(session, cache) == baseline_public_laws(page, session)
+
+def test_roll_call_index(cache):
+    for key, page in pages(cache, "roll call index"):
+        assert links(page, ROLL_CALL_PAGES) == baseline_roll_call_pages(page)
+
+def test_roll_call_list(cache):
+    found = 0
+    for key, page in pages(cache, "roll call list"):
+        rows = {measure:(url if question == "On Passage" else None, question)
+                for measure, (url, question) in index_house_roll_call_list(page).items()}
+        assert rows == baseline_roll_call_list(page)
+        found += len(rows)
+    assert found
+
+#The first version read the XML as HTML too
+@pytest.mark.filterwarnings("ignore::bs4.XMLParsedAsHTMLWarning")
+def test_house_votes(cache):
+    xml_keys = [key for key in _cache_keys(cache) if key.startswith(HOUSE_VOTES_URL) and key.endswith(".xml")]
+    assert xml_keys
+    for key in xml_keys:
+        xml = cache.read_bytes(key)
+        votes = [(record.name, record.party, record.state, record.vote) for record in house_votes(xml, None, SESSION)]
+        assert votes and votes == baseline_house_votes(xml)
+
+def test_cbo_facet(cache):
+    page = cache.read(COST_ESTIMATES_URL)
+    for session in (107, 108, 109, 110):
+        assert cbo_facet_href(page, re.compile(ordinal(session))) == baseline_cbo_facet(page, ordinal(session))
+
+def test_cbo_listing(cache):
+    for key, page in pages(cache, "cbo listing"):
+        index = dict()
+        index_listing_page(page, key, SESSION, index)
+        assert index
+        for bill_name, entry in index.items():
+            assert entry["url"] == urljoin(key, baseline_cbo_listing(page, bill_name.split(sep='-')[0]))
+
+def test_estimate_page(cache):
+    for key, page in pages(cache, "cbo estimate"):
+        parsed = estimate_page(page)
+        assert (int(parsed.time.split()[-1]), parsed.paragraphs, parsed.pdf_href) == baseline_estimate_page(page)
@@ -0,0 +1,89 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_pdf_text.py
+Purpose: *Check the summaries pdf_text.py finds in the CBO pdfs of
+          tests/data/pdfs, and that pdfminer's text parses to the same costs
+          and revenues as pdftotext's, which cbo_parser.py was written for
+         *Check how pdftotext is run, and that extracted text is cached, with
+          a stand-in for the program where it isn't installed
+"""
+import os
+import glob
+import shutil
+import subprocess
+import importlib.util
+import pytest
+import pdf_text
+from cbo_parser import parse_cbo_summary, DOLLAR_FINDER
+from page_cache import PageCache
+from pdf_text import PdfTextExtractor, extract_text, SUMMARY_PAGES
+
+PDFS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "pdfs", "*.pdf")))
+HAVE_PDFTOTEXT = shutil.which("pdftotext") is not None
+HAVE_PDFMINER = importlib.util.find_spec("pdfminer") is not None
+#Year each estimate was published, from its first page
+YEARS = {"H.R.2739-108th":2003}
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def bill(path):
+    return os.path.basename(path)[:-len(".pdf")]
+
+@pytest.mark.skipif(not (HAVE_PDFTOTEXT or HAVE_PDFMINER), reason="needs pdftotext or pdfminer.six")
+@pytest.mark.parametrize("path", PDFS, ids=[bill(path) for path in PDFS])
+def test_finds_the_summary(path):
+    summary = PdfTextExtractor().summary(read(path))
+    assert DOLLAR_FINDER.search(summary)
+
+@pytest.mark.skipif(not (HAVE_PDFTOTEXT and HAVE_PDFMINER), reason="needs pdftotext and pdfminer.six")
+@pytest.mark.parametrize("path", PDFS, ids=[bill(path) for path in PDFS])
+def test_pdfminer_parses_like_pdftotext(path):
+    year = YEARS[bill(path)]
+    estimates = [parse_cbo_summary(PdfTextExtractor(method=method).summary(read(path)), year, 2020)
+                 for method in ("pdftotext", "pdfminer")]
+    assert (estimates[0]["cost"], estimates[0]["revenue"]) == (estimates[1]["cost"], estimates[1]["revenue"])
+
+@pytest.mark.skipif(not HAVE_PDFTOTEXT, reason="needs pdftotext")
+@pytest.mark.parametrize("path", PDFS, ids=[bill(path) for path in PDFS])
+def test_first_pages_match_the_whole_pdf(path):
+    #summary only reads the first pages when the summary ends on them
+    extractor = PdfTextExtractor(method="pdftotext")
+    assert extractor.text(read(path)).startswith(extractor.text(read(path), 1))
+
+#What pdftotext writes for a three page estimate whose summary ends on the
+#   second page, one string per page
+PAGES = ["CONGRESSIONAL BUDGET OFFICE\nCOST ESTIMATE\n\nH.R. 1\n\n",
+         "SUMMARY\n\nCBO estimates that implementing H.R. 1 would cost $12 million over the 2004-2008 period.\n\n"
+         "ESTIMATED COST TO THE FEDERAL GOVERNMENT\n\nThe costs fall within budget function 800.\n\n"
+         "BASIS OF ESTIMATE\n\nFor this estimate, CBO assumes that the bill will be enacted this year.\n\n"
+         "PAY-AS-YOU-GO CONSIDERATIONS\n\n",
+         "None.\n\nPREVIOUS CBO ESTIMATE\n\nNone.\n\nESTIMATE PREPARED BY\n"]
+
+@pytest.fixture
+def pdftotext(monkeypatch):
+    """Stand in for the pdftotext program: record how it was run and answer
+    with the text of the pages it was asked for"""
+    calls = list()
+    def run(command, input=None, capture_output=False, check=False):
+        calls.append((command, input))
+        pages = int(command[command.index("-l") + 1]) if "-l" in command else len(PAGES)
+        return subprocess.CompletedProcess(command, 0, stdout=''.join(PAGES[:pages]).encode("utf-8"))
+    monkeypatch.setattr(pdf_text.subprocess, "run", run)
+    return calls
+
+def test_pdftotext_reads_the_pdf_from_stdin(pdftotext):
+    assert extract_text(b"%PDF-1.4 estimate", 2, method="pdftotext") == ''.join(PAGES[:2])
+    command, given = pdftotext[0]
+    #Bytes in and text out, with no file on disk
+    assert command == ["pdftotext", "-l", "2", "-", "-"] and given == b"%PDF-1.4 estimate"
+
+def test_summary_is_extracted_once(pdftotext, tmp_path):
+    extractor = PdfTextExtractor(PageCache(str(tmp_path)), method="pdftotext")
+    for _ in range(2):
+        summary = extractor.summary(b"%PDF-1.4 estimate")
+        assert summary.startswith("SUMMARY") and "$12 million" in summary
+    #The first pages had the end of the summary, so the whole pdf was never read
+    assert [command for command, given in pdftotext] == [["pdftotext", "-l", str(SUMMARY_PAGES), "-", "-"]]
@@ -0,0 +1,48 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_reparse.py
+Purpose: *Check that parsing the stored CBO summaries again updates the
+          cbo-<session> checkpoints, bill_costs.json and scores_data.csv, so
+          the next run doesn't restore the old estimates
+"""
+import json
+import pandas as pd
+from benchmark import write_synthetic_corpus
+from bill_catalogue import BillCatalogue
+from cbo_index import CboIndex
+from cbo_store import CboStore
+from page_cache import PageCache
+from pipeline import Checkpoints
+from web_scraping import run_pipeline, reparse_pipeline, checkpointed_cost_estimates
+
+SESSIONS = [110]
+
+def test_reparsed_costs_replace_the_old_ones(tmp_path, monkeypatch):
+    write_synthetic_corpus(str(tmp_path / "cache"), sessions=tuple(SESSIONS), representatives=4, senators=2,
+                           bills=20, pdfs=[])
+    cache = PageCache(str(tmp_path / "cache"), offline=True)
+    #The pipeline writes its state to the working directory
+    monkeypatch.chdir(tmp_path)
+    Representatives, Senators, before = run_pipeline(SESSIONS, cache=cache)
+    old_scores = pd.read_csv("scores_data.csv").set_index(["Name", "Position"])["Score"]
+    #As if the parser now read this bill's summary differently
+    store = CboStore("cbo_store.json.gz")
+    bill_name = next(name for name in before[0] if name in store)
+    store.records[bill_name]["text"] = "CBO estimates that the bill would increase revenues by $7 billion over the 2008-2017 period."
+    store.save()
+    Representatives, Senators, after = reparse_pipeline(SESSIONS, workers=1)
+    assert after[0][bill_name] == 7e9 != before[0][bill_name]
+    assert after[1:] == tuple(before[1:])
+    assert CboStore("cbo_store.json.gz").records[bill_name]["net"] == 7e9
+    with open("bill_costs.json") as f:
+        assert json.load(f)[bill_name] == 7e9
+    #The next run restores the new estimates
+    restored = checkpointed_cost_estimates(SESSIONS, Checkpoints("checkpoints"), cache, BillCatalogue(cache),
+                                           index=CboIndex(cache))
+    assert restored[0][bill_name] == 7e9
+    scores = pd.read_csv("scores_data.csv").set_index(["Name", "Position"])["Score"]
+    assert (scores != old_scores).any()
+    for members in (Representatives, Senators):
+        for key, member in members.items():
+            assert scores[(key, member["Position"])] == member["score"]
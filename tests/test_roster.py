@@ -0,0 +1,64 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_roster.py
+Purpose: *Check that members keep the names the bioguide search gives them,
+          matched by bioguide id, when the bulk data spells them out in full
+"""
+import json
+import pytest
+from benchmark import write_synthetic_corpus
+from page_cache import PageCache
+from roster import Roster, LEGISLATORS_URLS, fetch_legislators
+from web_scraping import load_roster
+
+SESSIONS = [110]
+
+@pytest.fixture
+def cache(tmp_path):
+    write_synthetic_corpus(str(tmp_path / "cache"), sessions=tuple(SESSIONS), representatives=3, senators=1,
+                           bills=2, pdfs=[])
+    return PageCache(str(tmp_path / "cache"), offline=True)
+
+def searched_keys(roster):
+    return {member_id:member["key"] for member_id, member in roster.members.items()}
+
+def store_legislators(cache, searched, sessions):
+    """Save bulk data for the searched members, with full middle names"""
+    legislators = list()
+    for member_id, key in searched.items():
+        last, first = key.split(", ")
+        terms = [{"type":"rep" if member_id.startswith('R') else "sen", "state":"UT", "party":"Democrat",
+                  "start":"%d-01-03" % (2*session + 1787), "end":"%d-01-03" % (2*session + 1789)}
+                 for session in sessions]
+        legislators.append({"id":{"bioguide":member_id}, "bio":{"birthday":"1950-01-01"},
+                            "name":{"first":first, "middle":"Quincy", "last":last}, "terms":terms})
+    cache.store(LEGISLATORS_URLS[0], json.dumps(legislators))
+    cache.store(LEGISLATORS_URLS[1], "[]")
+
+def test_bulk_data_is_opt_in(cache):
+    #Offline, reading the bulk data would raise CacheMiss
+    roster = load_roster(SESSIONS, cache)
+    assert roster.has(SESSIONS[0], bulk=False)
+    assert all(key.endswith(", John") for key in searched_keys(roster).values())
+
+def test_search_names_replace_bulk_names(cache, tmp_path):
+    searched = searched_keys(load_roster(SESSIONS, cache))
+    store_legislators(cache, searched, SESSIONS)
+    path = str(tmp_path / "roster.json")
+    bulk = load_roster(SESSIONS, cache, path, bulk=True)
+    assert set(bulk.members) == set(searched)
+    assert all(key.endswith(", John Quincy") for key in searched_keys(bulk).values())
+    #Without the bulk data the saved bulk session is searched for again
+    roster = load_roster(SESSIONS, cache, path)
+    assert searched_keys(roster) == searched
+    assert searched_keys(Roster(path)) == searched
+    assert not Roster(path).bulk_sessions
+
+def test_bulk_data_keeps_searched_names(cache):
+    roster = load_roster(SESSIONS, cache)
+    searched = searched_keys(roster)
+    store_legislators(cache, searched, SESSIONS + [111])
+    roster.add_legislators(fetch_legislators(cache), [111])
+    Representatives, Senators = roster.chambers([111])
+    assert set(Representatives) | set(Senators) == set(searched.values())
@@ -0,0 +1,90 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: test_scheduler.py
+Purpose: *Check the scheduler against a stub HTTP server on localhost: each
+          website's token bucket, retries with backoff on 429 and 5xx
+          responses, and stages running at the same time
+"""
+import time
+import threading
+import pytest
+from scheduler import TokenBucket, PoliteSession, run_stages
+
+def hosts(server):
+    #127.0.0.1 and localhost are the same server but different websites to
+    #   the scheduler, so each gets its own token bucket
+    port = server.server_address[1]
+    return "127.0.0.1:%d" % port, "localhost:%d" % port
+
+def times(server, path):
+    return [when for when, requested in server.requests if requested == path]
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=20)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    #The first request goes right away and each one after it waits 1/20 s
+    assert time.monotonic() - start >= 4/20 - 0.01
+
+def test_each_website_is_paced_separately(server):
+    first, second = hosts(server)
+    session = PoliteSession(rates={first:10, second:10}, retries=0)
+    start = time.monotonic()
+    for _ in range(4):
+        assert session.get("http://%s/ok" % first).status_code == 200
+    paced = time.monotonic() - start
+    assert paced >= 3/10 - 0.02
+    #Four requests to each website at once take as long as four to one
+    start = time.monotonic()
+    threads = [threading.Thread(target=lambda host=host: [session.get("http://%s/ok" % host) for _ in range(4)])
+               for host in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start < 2*paced
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_with_backoff(server, status):
+    first, _ = hosts(server)
+    session = PoliteSession(rates={first:1000}, retries=3, backoff=0.05)
+    path = "/fail?status=%d&times=2" % status
+    assert session.get("http://%s%s" % (first, path)).status_code == 200
+    sent = times(server, path)
+    assert len(sent) == 3
+    #0.05 s before the first retry and twice that before the second
+    assert sent[1] - sent[0] >= 0.05 - 0.01
+    assert sent[2] - sent[1] >= 0.1 - 0.01
+
+def test_gives_up_after_the_last_retry(server):
+    first, _ = hosts(server)
+    session = PoliteSession(rates={first:1000}, retries=2, backoff=0.01)
+    path = "/fail?status=503&times=10"
+    assert session.get("http://%s%s" % (first, path)).status_code == 503
+    assert len(times(server, path)) == 3
+
+def test_does_not_retry_other_statuses(server):
+    first, _ = hosts(server)
+    session = PoliteSession(rates={first:1000}, retries=3, backoff=0.01)
+    path = "/fail?status=404&times=10"
+    assert session.get("http://%s%s" % (first, path)).status_code == 404
+    assert len(times(server, path)) == 1
+
+def test_run_stages_runs_stages_at_the_same_time(server):
+    first, second = hosts(server)
+    session = PoliteSession(rates={first:1000, second:1000}, retries=0)
+    stages = {name:(lambda host=host: session.get("http://%s/slow?seconds=0.5" % host).status_code)
+              for name, host in (("House", first), ("Senate", second), ("CBO", first))}
+    start = time.monotonic()
+    results = run_stages(stages)
+    assert results == {"House":200, "Senate":200, "CBO":200}
+    #One after another they would take 1.5 s
+    assert time.monotonic() - start < 1.0
+
+def test_run_stages_raises_a_stage_error():
+    def fail():
+        raise ValueError("stage failed")
+    with pytest.raises(ValueError):
+        run_stages({"ok":lambda: 1, "fail":fail})
@@ -0,0 +1,384 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: write_recorded_fixtures.py
+Purpose: *Write the small recorded corpus in tests/data/recorded that
+          benchmark.py replays and test_page_parsers.py parses: the pages of
+          the 108th Congress (2003-2004) the scraper reads for three House
+          bills and a Senate bill, and the CBO pdf of H.R. 2739
+         *Run again after editing a page below
+
+The pages are written the way each site lays them out, trimmed to the rows of
+these bills and members. The bills, public law numbers, members and bioguide
+ids are real and the H.R. 2739 pdf was downloaded from cbo.gov. The roll call
+numbers, the votes, the CBO publication numbers and the summaries of the other
+estimates are made up, since the sites can't be reached where this was written.
+Pages recorded by a real run can replace them with benchmark.py --record.
+"""
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmark import RECORDED_CACHE, FIXTURE_PDFS
+from bill_catalogue import PUBLIC_LAWS_URL
+from cbo_index import HOME_URL, COST_ESTIMATES_URL
+from page_cache import PageCache
+from pdf_text import PdfTextExtractor
+from roll_calls import SENATE_MENU_URL, SENATE_VOTE_URL
+from web_scraping import MEMBER_SEARCH_URL, HOUSE_VOTES_URL
+
+SESSION = 108
+
+#name, birth, bioguide id, position, party, state. Two Smiths make the clerk
+#   write "Smith (NJ)" and "Smith (MI)".
+MEMBERS = [("ABERCROMBIE, Neil", "1938", "A000014", "Representative", "Democrat", "HI"),
+           ("PELOSI, Nancy", "1940", "P000197", "Representative", "Democrat", "CA"),
+           ("SANDERS, Bernard", "1941", "S000033", "Representative", "Independent", "VT"),
+           ("SMITH, Christopher Henry", "1953", "S000522", "Representative", "Republican", "NJ"),
+           ("SMITH, Nick", "1934", "S000583", "Representative", "Republican", "MI"),
+           ("JEFFORDS, James Merrill", "1934", "J000072", "Senator", "Independent", "VT"),
+           ("KENNEDY, Edward Moore", "1932", "K000105", "Senator", "Democrat", "MA"),
+           ("McCAIN, John Sidney, III", "1936", "M000303", "Senator", "Republican", "AZ")]
+
+MEMBER_SEARCH = """<html>
+<head><title>Biographical Directory of the United States Congress</title></head>
+<body>
+<center><h2>Biographical Directory of the United States Congress</h2></center>
+<p>Congress: 108</p>
+<table border="1" cellpadding="2">
+<tr><th>Member Name</th><th>Birth-Death</th><th>Position</th><th>Party</th><th>State</th><th>Congress<br>(Year)</th></tr>
+%s
+</table>
+<p><a href="http://bioguide.congress.gov/biosearch/biosearch.asp">New Search</a></p>
+</body>
+</html>
+"""
+MEMBER_ROW = ('<tr><td><a href="http://bioguide.congress.gov/scripts/biodisplay.pl?index=%s">%s</a></td><td>%s-</td>\n'
+              '<td>%s</td><td>%s</td><td>%s</td><td align="center">108<br>(2003-2004)</td></tr>')
+
+PUBLIC_LAWS = """<!DOCTYPE html>
+<html lang="en">
+<head><title>Public Laws for the 108th Congress (2003-2004) | Congress.gov</title></head>
+<body>
+<nav><ul><li><a href="/">Congress.gov</a></li><li><a href="/advanced-search/legislation">Advanced Searches</a></li>
+<li><a href="/browse">Browse</a></li><li><a href="/help">Help</a></li></ul></nav>
+<main>
+<h1>Public Laws for the 108th Congress (2003-2004)</h1>
+<p>Previous Congress: <a href="/public-laws/107">107th</a> | Next Congress: <a href="/public-laws/109">109th</a></p>
+<table class="item_table">
+<thead><tr><th>Public Law</th><th>Bill</th><th>Title</th></tr></thead>
+<tbody>
+<tr><td>108-7</td><td><a href="/bill/108th-congress/house-joint-resolution/2">H.J.Res.2</a></td><td>Consolidated Appropriations Resolution, 2003</td></tr>
+<tr><td>108-77</td><td><a href="/bill/108th-congress/house-bill/2738">H.R.2738</a></td><td>United States-Chile Free Trade Agreement Implementation Act</td></tr>
+<tr><td>108-78</td><td><a href="/bill/108th-congress/house-bill/2739">H.R.2739</a></td><td>United States-Singapore Free Trade Agreement Implementation Act</td></tr>
+<tr><td>108-105</td><td><a href="/bill/108th-congress/senate-bill/3">S.3</a></td><td>Partial-Birth Abortion Ban Act of 2003</td></tr>
+<tr><td>108-173</td><td><a href="/bill/108th-congress/house-bill/1">H.R.1</a></td><td>Medicare Prescription Drug, Improvement, and Modernization Act of 2003</td></tr>
+</tbody>
+</table>
+<p><a href="/public-laws/108?page=2"><span>Next page</span></a></p>
+</main>
+<footer><a href="/about">About</a> <a href="/contact">Contact</a></footer>
+</body>
+</html>
+"""
+
+HOUSE_INDEX = """<HTML>
+<HEAD><TITLE>Office of the Clerk - Roll Call Votes %(year)d</TITLE></HEAD>
+<BODY>
+<P><A HREF="http://clerk.house.gov/">Office of the Clerk</A> | <A HREF="http://clerk.house.gov/evs/%(year)d/index.asp">Roll Call Votes %(year)d</A></P>
+<H3>%(congress)s Congress / %(year)d</H3>
+<UL>
+%(pages)s
+</UL>
+</BODY>
+</HTML>
+"""
+
+HOUSE_LIST = """<HTML>
+<HEAD><TITLE>Office of the Clerk - Roll Call Votes %(year)d</TITLE></HEAD>
+<BODY>
+<TABLE BORDER="0" CELLPADDING="2">
+<TR><TH><FONT FACE="Arial" SIZE="-1">Roll</FONT></TH>
+<TH><FONT FACE="Arial" SIZE="-1">Date</FONT></TH>
+<TH><FONT FACE="Arial" SIZE="-1">Issue</FONT></TH>
+<TH><FONT FACE="Arial" SIZE="-1">Question</FONT></TH>
+<TH><FONT FACE="Arial" SIZE="-1">Result</FONT></TH>
+<TH><FONT FACE="Arial" SIZE="-1">Title/Description</FONT></TH></TR>
+%(rows)s
+</TABLE>
+</BODY>
+</HTML>
+"""
+HOUSE_ROW = """<TR><TD><FONT FACE="Arial" SIZE="-1"><A HREF="http://clerk.house.gov/evs/%(year)d/roll%(roll)03d.xml">%(roll)d</A></FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(date)s</FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1"><A HREF="http://thomas.loc.gov/cgi-bin/bdquery/z?d108:%(thomas)s:">%(measure)s</A></FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(question)s</FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(result)s</FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(title)s</FONT></TD></TR>"""
+#A row of a vote that isn't on a bill
+HOUSE_OTHER_ROW = """<TR><TD><FONT FACE="Arial" SIZE="-1"><A HREF="http://clerk.house.gov/evs/%(year)d/roll%(roll)03d.xml">%(roll)d</A></FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(date)s</FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(measure)s</FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(question)s</FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(result)s</FONT></TD>
+<TD><FONT FACE="Arial" SIZE="-1">%(title)s</FONT></TD></TR>"""
+
+HOUSE_VOTE = """<?xml version="1.0" encoding="UTF-8"?>
+<rollcall-vote>
+<vote-metadata>
+<majority>R</majority>
+<congress>108</congress>
+<session>1st</session>
+<chamber>U.S. House of Representatives</chamber>
+<rollcall-num>%(roll)d</rollcall-num>
+<legis-num>%(measure)s</legis-num>
+<vote-question>On Passage</vote-question>
+<vote-type>YEA-AND-NAY</vote-type>
+<vote-result>Passed</vote-result>
+<action-date>%(date)s</action-date>
+</vote-metadata>
+<vote-data>
+%(votes)s
+</vote-data>
+</rollcall-vote>
+"""
+HOUSE_RECORDED_VOTE = ('<recorded-vote><legislator name-id="%s" sort-field="%s" unaccented-name="%s" party="%s" '
+                       'state="%s" role="legislator">%s</legislator><vote>%s</vote></recorded-vote>')
+
+SENATE_MENU = """<?xml version="1.0" encoding="UTF-8"?>
+<vote_summary>
+<congress>108</congress>
+<session>%(session)s</session>
+<congress_year>%(year)d</congress_year>
+<votes>
+%(votes)s
+</votes>
+</vote_summary>
+"""
+SENATE_MENU_VOTE = """<vote>
+<vote_number>%s</vote_number>
+<vote_date>%s</vote_date>
+<issue>%s</issue>
+<question>%s</question>
+<result>%s</result>
+<vote_tally><yeas>%d</yeas><nays>%d</nays></vote_tally>
+<title>%s</title>
+</vote>"""
+
+SENATE_VOTE = """<?xml version="1.0" encoding="UTF-8"?>
+<roll_call_vote>
+<congress>108</congress>
+<session>1</session>
+<congress_year>2003</congress_year>
+<vote_number>%(number)d</vote_number>
+<vote_date>%(date)s</vote_date>
+<vote_question_text>On Passage of the Bill (%(issue)s)</vote_question_text>
+<vote_result>Bill Passed</vote_result>
+<document><document_type>%(type)s</document_type><document_number>%(document)s</document_number></document>
+<members>
+%(members)s
+</members>
+</roll_call_vote>
+"""
+SENATE_MEMBER = """<member>
+<member_full>%s (%s-%s)</member_full>
+<last_name>%s</last_name>
+<first_name>%s</first_name>
+<party>%s</party>
+<state>%s</state>
+<vote_cast>%s</vote_cast>
+<lis_member_id>%s</lis_member_id>
+</member>"""
+#LIS ids; Frist isn't in the bioguide search above, so his row is unresolved
+SENATORS = [("Frist", "Bill", "R", "TN", "S191"), ("Jeffords", "James", "I", "VT", "S107"),
+            ("Kennedy", "Edward", "D", "MA", "S027"), ("McCain", "John", "R", "AZ", "S197")]
+
+COST_ESTIMATES = """<!DOCTYPE html>
+<html lang="en">
+<head><title>Cost Estimates | Congressional Budget Office</title></head>
+<body>
+<main>
+<h1>Cost Estimates</h1>
+<div class="view-content">
+<div class="views-row"><div class="teaser"><div class="teaser__date"><time datetime="2019-12-20T12:00:00Z">December 20, 2019</time></div>
+<h3 class="teaser__title"><a href="/publication/56000" hreflang="en">S. 3012, Fair Access to Banking Act</a></h3></div></div>
+</div>
+<aside>
+<h2>Congress</h2>
+<ul class="facet-widget">
+%s
+</ul>
+</aside>
+</main>
+</body>
+</html>
+"""
+FACET = ('<li class="facet-item"><a href="/cost-estimates?congress%%5B0%%5D=%d" rel="nofollow" '
+         'data-drupal-facet-item-id="congress-%d"><span class="facet-item__value">%s Congress (%d-%d)</span>\n'
+         '<span class="facet-item__count">(%d)</span></a></li>')
+
+CBO_LISTING = """<!DOCTYPE html>
+<html lang="en">
+<head><title>Cost Estimates | Congressional Budget Office</title></head>
+<body>
+<main>
+<h1>Cost Estimates</h1>
+<div class="view-content">
+%s
+</div>
+<nav class="pager"><ul class="pager__items">
+%s
+</ul></nav>
+</main>
+</body>
+</html>
+"""
+CBO_ENTRY = """<div class="views-row"><div class="teaser"><div class="teaser__date"><time datetime="%s">%s</time></div>
+<h3 class="teaser__title"><a href="/publication/%d" hreflang="en">%s</a></h3></div></div>"""
+
+ESTIMATE = """<!DOCTYPE html>
+<html lang="en">
+<head><title>%(title)s | Congressional Budget Office</title></head>
+<body>
+<main>
+<h1>%(title)s</h1>
+<div class="field--name-field-display-date"><time datetime="%(datetime)s">%(date)s</time></div>
+<div class="field--name-body">
+%(paragraphs)s
+</div>
+<div class="file-download"><a href="%(pdf)s">View Document</a></div>
+</main>
+</body>
+</html>
+"""
+
+#The rows of each House roll call list page, newest first: roll call, date,
+#   THOMAS id, measure, question, result, title. A row without a THOMAS id
+#   isn't a vote on a bill. H.R. 2738's passage comes before its motion to
+#   recommit, and S. 3 is only voted on as a conference report.
+HOUSE_ROWS = {(2003, "ROLL_300.asp"):[
+                  (332, "27-Jun", "HR00001", "H R 1", "On Passage", "P", "Medicare Prescription Drug and Modernization Act"),
+                  (331, "27-Jun", None, "QUORUM", "Call by States", "", "")],
+              (2003, "ROLL_400.asp"):[
+                  (436, "24-Jul", "HR02738", "H R 2738", "On Passage", "P", "United States-Chile Free Trade Agreement Implementation Act"),
+                  (432, "24-Jul", "HR02739", "H R 2739", "On Passage", "P", "United States-Singapore Free Trade Agreement Implementation Act"),
+                  (431, "24-Jul", "HR02738", "H R 2738", "On Motion to Recommit with Instructions", "F",
+                   "United States-Chile Free Trade Agreement Implementation Act"),
+                  (410, "22-Jul", "S00003", "S 3", "On Motion to Go to Conference", "P", "Partial-Birth Abortion Ban Act of 2003")],
+              (2004, "ROLL_000.asp"):[
+                  (2, "20-Jan", None, "H RES 502", "On Agreeing to the Resolution", "P", "Providing for the consideration of H.R. 2673")]}
+#The text of each index page's link to a list page
+HOUSE_PAGES = {"ROLL_000.asp":"Roll Calls 1 - 100", "ROLL_300.asp":"Roll Calls 301 - 400",
+               "ROLL_400.asp":"Roll Calls 401 - 500"}
+#Votes of the Representatives above on each passage
+HOUSE_VOTES = {332:["Nay", "Nay", "Nay", "Yea", "Yea", "Nay"], 436:["Yea", "Nay", "Nay", "Yea", "Yea", "Yea"],
+               432:["Yea", "Nay", "Nay", "Yea", "Not Voting", "Yea"]}
+SENATE_ROLLS = [("00051", "13-Mar", "S. 3", "On Passage of the Bill", "Passed", 64, 33, "Partial-Birth Abortion Ban Act of 2003"),
+                ("00261", "26-Jun", "H.R. 1", "On the Motion to Waive CBA", "Rejected", 38, 58, "Medicare Prescription Drug and Modernization Act"),
+                ("00262", "27-Jun", "H.R. 1", "On Passage of the Bill", "Passed", 76, 21, "Medicare Prescription Drug and Modernization Act"),
+                ("00318", "31-Jul", "H.R. 2738", "On Passage of the Bill", "Passed", 65, 32, "United States-Chile Free Trade Agreement Implementation Act"),
+                ("00319", "31-Jul", "H.R. 2739", "On Passage of the Bill", "Passed", 66, 32, "United States-Singapore Free Trade Agreement Implementation Act"),
+                ("00402", "21-Oct", "S. 3", "On the Conference Report", "Agreed to", 64, 34, "Partial-Birth Abortion Ban Act of 2003")]
+SENATE_VOTES = {"S. 3":["Yea", "Nay", "Nay", "Yea"], "H.R. 1":["Yea", "Yea", "Nay", "Nay"],
+                "H.R. 2738":["Yea", "Nay", "Yea", "Yea"], "H.R. 2739":["Yea", "Yea", "Yea", "Yea"]}
+
+PDF_HREF = "/sites/default/files/108th-congress-2003-2004/costestimate/hr27390.pdf"
+#(publication, datetime, date, title, paragraphs, pdf), newest first
+ESTIMATES = [(14929, "2003-11-20T12:00:00Z", "November 20, 2003",
+              "H.R. 1, Medicare Prescription Drug, Improvement, and Modernization Act of 2003",
+              ["Estimate of the conference agreement on H.R. 1, as filed on November 21, 2003",
+               "CBO estimates that the conference agreement on H.R. 1 would increase direct spending by $395 billion "
+               "over the 2004-2013 period. The agreement would also reduce revenues by $5 billion over the 2004-2013 period."],
+              "/sites/default/files/108th-congress-2003-2004/costestimate/hr1conf0.pdf"),
+             (14734, "2003-09-16T12:00:00Z", "September 16, 2003",
+              "H.R. 2739, United States-Singapore Free Trade Agreement Implementation Act",
+              ["As enacted on September 3, 2003"], PDF_HREF),
+             #A summary with a link in it has no string, so the pdf is read,
+             #   and it isn't in the corpus
+             (14733, "2003-09-16T12:00:00Z", "September 16, 2003",
+              "H.R. 2738, United States-Chile Free Trade Agreement Implementation Act",
+              ["As enacted on September 3, 2003",
+               'H.R. 2738 approves the <a href="/topics/trade">free trade agreement</a> with Chile.'],
+              "/sites/default/files/108th-congress-2003-2004/costestimate/hr27380.pdf")]
+#Listed on the second page, but not a public law above
+OTHER_ESTIMATE = ("2003-05-22T12:00:00Z", "May 22, 2003", 14520,
+                  "H.R. 1588, National Defense Authorization Act for Fiscal Year 2004")
+
+def write_fixtures(directory=RECORDED_CACHE):
+    """Write the corpus into a new page cache, replacing what was there"""
+    shutil.rmtree(directory, ignore_errors=True)
+    cache = PageCache(directory)
+    #The bioguide search
+    cache.store(MEMBER_SEARCH_URL + "?congress=" + str(SESSION),
+                MEMBER_SEARCH % '\n'.join(MEMBER_ROW % (member_id, name, birth, position, party, state)
+                                          for name, birth, member_id, position, party, state in MEMBERS))
+    #The public laws
+    cache.store(PUBLIC_LAWS_URL + str(SESSION), PUBLIC_LAWS)
+    #The House: the list pages with these bills, the other rows trimmed
+    representatives = [member for member in MEMBERS if member[3] == "Representative"]
+    smiths = sum(1 for member in representatives if member[0].startswith("SMITH,"))
+    for year in (2003, 2004):
+        pages = [page for page_year, page in HOUSE_ROWS if page_year == year]
+        cache.store(HOUSE_VOTES_URL + "%d/index.asp" % year, HOUSE_INDEX % {
+            "year":year, "congress":"108th",
+            "pages":'\n'.join('<LI><A HREF="%s">%s</A></LI>' % (page, HOUSE_PAGES[page]) for page in pages)})
+    for (year, page), rows in HOUSE_ROWS.items():
+        cache.store(HOUSE_VOTES_URL + "%d/%s" % (year, page), HOUSE_LIST % {"year":year, "rows":'\n'.join(
+            (HOUSE_ROW if thomas else HOUSE_OTHER_ROW) % {"year":year, "roll":roll, "date":date, "thomas":thomas,
+                                                          "measure":measure, "question":question, "result":result,
+                                                          "title":title}
+            for roll, date, thomas, measure, question, result, title in rows)})
+        for roll, date, thomas, measure, question, result, title in rows:
+            if roll not in HOUSE_VOTES:
+                continue
+            votes = list()
+            for (name, birth, member_id, position, party, state), vote in zip(representatives, HOUSE_VOTES[roll]):
+                last = name.split(sep=',')[0].capitalize()
+                if last == "Smith" and smiths > 1:
+                    last = "%s (%s)" % (last, state)
+                votes.append(HOUSE_RECORDED_VOTE % (member_id, last, last, party[0], state, last, vote))
+            cache.store(HOUSE_VOTES_URL + "%d/roll%03d.xml" % (year, roll), (HOUSE_VOTE % {
+                "roll":roll, "measure":measure, "date":"%s-%d" % (date, year), "votes":'\n'.join(votes)}).encode("utf-8"))
+    #The Senate
+    cache.store(SENATE_MENU_URL % (SESSION, 1), (SENATE_MENU % {"session":"1st", "year":2003, "votes":'\n'.join(
+        SENATE_MENU_VOTE % vote for vote in reversed(SENATE_ROLLS))}).encode("utf-8"))
+    cache.store(SENATE_MENU_URL % (SESSION, 2), (SENATE_MENU % {"session":"2nd", "year":2004, "votes":SENATE_MENU_VOTE % (
+        "00015", "29-Jan", "S. 150", "On Passage of the Bill", "Passed", 93, 3, "Internet Tax Nondiscrimination Act")}
+        ).encode("utf-8"))
+    for number, date, issue, question, result, yeas, nays, title in SENATE_ROLLS:
+        if result != "Passed":
+            continue
+        document_type, document = issue.split()
+        members = '\n'.join(SENATE_MEMBER % (last, party, state, last, first, party, state, vote, lis_id)
+                            for (last, first, party, state, lis_id), vote in zip(SENATORS, SENATE_VOTES[issue]))
+        cache.store(SENATE_VOTE_URL % (SESSION, 1, SESSION, 1, number), (SENATE_VOTE % {
+            "number":int(number), "date":date, "issue":issue, "type":document_type, "document":document,
+            "members":members}).encode("utf-8"))
+    #The CBO: the facet, two listing pages of the session and the estimates
+    cache.store(COST_ESTIMATES_URL, COST_ESTIMATES % '\n'.join(
+        FACET % (session, session, "%dth" % session, 2*session + 1787, 2*session + 1788, count)
+        for session, count in ((109, 2607), (108, 2416), (107, 2294))))
+    listing_url = COST_ESTIMATES_URL + "?congress%5B0%5D=108"
+    entries = [CBO_ENTRY % (datetime, date, publication, title)
+               for publication, datetime, date, title, paragraphs, pdf in ESTIMATES]
+    cache.store(listing_url, CBO_LISTING % ('\n'.join(entries),
+                '<li class="pager__item pager__item--next"><a href="?congress%5B0%5D=108&amp;page=1" rel="next">Next</a></li>'))
+    cache.store(listing_url + "&page=1", CBO_LISTING % (CBO_ENTRY % OTHER_ESTIMATE,
+                '<li class="pager__item pager__item--previous"><a href="?congress%5B0%5D=108&amp;page=0" rel="prev">Previous</a></li>'))
+    for publication, datetime, date, title, paragraphs, pdf in ESTIMATES:
+        cache.store(HOME_URL + "/publication/%d" % publication, ESTIMATE % {
+            "title":title, "datetime":datetime, "date":date, "pdf":pdf,
+            "paragraphs":'\n'.join("<p>%s</p>" % paragraph for paragraph in paragraphs)})
+    with open(os.path.join(FIXTURE_PDFS, "H.R.2739-108th.pdf"), 'rb') as f:
+        pdf = f.read()
+    cache.store(HOME_URL + PDF_HREF, pdf)
+    #The text of the pdf, as a real run saves it
+    try:
+        PdfTextExtractor(cache).summary(pdf)
+    except ImportError as e:
+        print("pdf text not saved:", e)
+    return cache
+
+if __name__ == "__main__":
+    write_fixtures()
@@ -0,0 +1,227 @@
+"""
+Fiscal Responsibility Index
+
+Script Name: vote_store.py
+Purpose: *Keep every vote as one row of three compact columns (member id,
+          bill id, vote code) instead of copying bill names into a Yeas, Nays
+          and Not Voting list for every member of Congress
+         *Look up a member's votes or a bill's votes without scanning every
+          member
+         *Save the votes as NumPy arrays or a Parquet file
+"""
+import json
+from array import array
+import numpy as np
+from scoring import VOTE_CODES
+
+#VOTE_CODES value -> "Yeas", "Nays" or "Not Voting"
+VOTE_NAMES = {code:vote_type for vote_type, code in VOTE_CODES.items()}
+
+class VoteStore:
+    """Columnar table of roll call votes for one chamber.
+
+    Member keys and bill names are interned: each is stored once and every
+    vote refers to it by an integer id. The columns are grown in compact
+    arrays while the roll calls are parsed, and turned into NumPy arrays the
+    first time they're read after a change.
+
+    Attributes:
+        member_keys (list): member key of each member id
+        member_ids (dict): member key -> member id
+        bill_names (list): bill name of each bill id
+        bill_ids (dict): bill name -> bill id
+    """
+    def __init__(self):
+        self.member_keys, self.member_ids = list(), dict()
+        self.bill_names, self.bill_ids = list(), dict()
+        self._members = array('i')
+        self._bills = array('i')
+        self._codes = array('b')
+        self._changed()
+
+    def __len__(self):
+        return len(self._codes)
+
+    def member_id(self, key):
+        """Return the id of a member key, giving it one if it's new"""
+        if key not in self.member_ids:
+            self.member_ids[key] = len(self.member_keys)
+            self.member_keys.append(key)
+        return self.member_ids[key]
+
+    def bill_id(self, bill):
+        """Return the id of a bill name, giving it one if it's new"""
+        if bill not in self.bill_ids:
+            self.bill_ids[bill] = len(self.bill_names)
+            self.bill_names.append(bill)
+        return self.bill_ids[bill]
+
+    def add(self, key, bill, vote_type):
+        """Record one vote
+
+        Parameters:
+            key (str): member key, "Last Name, First Name, Title"
+            bill (str): bill name including the session it passed in
+            vote_type (str): "Yeas", "Nays" or "Not Voting"
+        """
+        self._members.append(self.member_id(key))
+        self._bills.append(self.bill_id(bill))
+        self._codes.append(VOTE_CODES[vote_type])
+        self._changed()
+
+    def _column(self, name, values, dtype):
+        #The arrays keep growing while roll calls are parsed, so NumPy gets a
+        #   copy, made once until the next vote is added
+        if name not in self._arrays:
+            self._arrays[name] = np.frombuffer(values, dtype=dtype).copy() if len(values) else np.zeros(0, dtype=dtype)
+        return self._arrays[name]
+
+    @property
+    def members(self):
+        """(ndarray): member id of every vote"""
+        return self._column("members", self._members, np.int32)
+
+    @property
+    def bills(self):
+        """(ndarray): bill id of every vote"""
+        return self._column("bills", self._bills, np.int32)
+
+    @property
+    def codes(self):
+        """(ndarray): VOTE_CODES value of every vote"""
+        return self._column("codes", self._codes, np.int8)
+
+    def _changed(self):
+        self._arrays = dict()
+        self._by_member, self._by_bill = None, None
+
+    def _grouped(self, column, size):
+        """Return the votes sorted by a column and where each id starts, so the
+        votes of any member or bill are one slice"""
+        order = np.argsort(column, kind="stable")
+        starts = np.searchsorted(column[order], np.arange(size + 1))
+        return order, starts
+
+    def member_votes(self, key, vote_type=None):
+        """Return the bills a member voted on, in the order the votes were
+        recorded
+
+        Parameters:
+            key (str): member key
+            vote_type (str): only return "Yeas", "Nays" or "Not Voting", or
+                every vote if None
+
+        Returns:
+            (list): bill names
+        """
+        if key not in self.member_ids:
+            return list()
+        if self._by_member is None:
+            self._by_member = self._grouped(self.members, len(self.member_keys))
+        order, starts = self._by_member
+        member_id = self.member_ids[key]
+        votes = order[starts[member_id]:starts[member_id+1]]
+        if vote_type is not None:
+            votes = votes[self.codes[votes] == VOTE_CODES[vote_type]]
+        return [self.bill_names[bill_id] for bill_id in self.bills[votes]]
+
+    def bill_votes(self, bill):
+        """Return how every member voted on a bill
+
+        Returns:
+            (dict): member key -> "Yeas", "Nays" or "Not Voting"
+        """
+        if bill not in self.bill_ids:
+            return dict()
+        if self._by_bill is None:
+            self._by_bill = self._grouped(self.bills, len(self.bill_names))
+        order, starts = self._by_bill
+        bill_id = self.bill_ids[bill]
+        votes = order[starts[bill_id]:starts[bill_id+1]]
+        return {self.member_keys[member_id]:VOTE_NAMES[code]
+                for member_id, code in zip(self.members[votes], self.codes[votes])}
+
+    def members_voting_on(self, bills):
+        """Return the keys of the members who voted on any of the bills"""
+        bill_ids = [self.bill_ids[bill] for bill in bills if bill in self.bill_ids]
+        mask = np.isin(self.bills, bill_ids)
+        return {self.member_keys[member_id] for member_id in np.unique(self.members[mask])}
+
+    def extend(self, other):
+        """Add every vote of another VoteStore after the votes already here"""
+        member_map = np.array([self.member_id(key) for key in other.member_keys], dtype=np.int32)
+        bill_map = np.array([self.bill_id(bill) for bill in other.bill_names], dtype=np.int32)
+        if len(other):
+            self._members.extend(array('i', member_map[other.members].tobytes()))
+            self._bills.extend(array('i', bill_map[other.bills].tobytes()))
+            self._codes.extend(other._codes)
+        self._changed()
+
+    @classmethod
+    def concat(cls, stores):
+        """Return one VoteStore with the votes of every store, in order"""
+        votes = cls()
+        for store in stores:
+            votes.extend(store)
+        return votes
+
+    @classmethod
+    def from_columns(cls, member_keys, bill_names, members, bills, codes):
+        """Build a VoteStore from its columns, e.g. read back from disk"""
+        votes = cls()
+        for key in member_keys:
+            votes.member_id(key)
+        for bill in bill_names:
+            votes.bill_id(bill)
+        votes._members = array('i', np.asarray(members, dtype=np.int32).tobytes())
+        votes._bills = array('i', np.asarray(bills, dtype=np.int32).tobytes())
+        votes._codes = array('b', np.asarray(codes, dtype=np.int8).tobytes())
+        votes._changed()
+        return votes
+
+    def to_dict(self):
+        """Return the columns as lists json can write"""
+        return {"member_keys":self.member_keys, "bill_names":self.bill_names,
+                "members":self.members.tolist(), "bills":self.bills.tolist(),
+                "codes":self.codes.tolist()}
+
+    @classmethod
+    def from_dict(cls, columns):
+        """Read back a VoteStore written by to_dict"""
+        return cls.from_columns(columns["member_keys"], columns["bill_names"],
+                                columns["members"], columns["bills"], columns["codes"])
+
+    def save(self, path):
+        """Save the votes to a .npz file, or a .parquet file if pyarrow is
+        installed
+
+        Parameters:
+            path (str): file to write, ending in .npz or .parquet
+        """
+        if path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.table({"member":pa.DictionaryArray.from_arrays(self.members, self.member_keys),
+                              "bill":pa.DictionaryArray.from_arrays(self.bills, self.bill_names),
+                              "code":self.codes})
+            pq.write_table(table, path)
+        else:
+            np.savez_compressed(path, members=self.members, bills=self.bills, codes=self.codes,
+                                names=np.array(json.dumps({"member_keys":self.member_keys,
+                                                           "bill_names":self.bill_names})))
+
+    @classmethod
+    def load(cls, path):
+        """Read back a file written by save"""
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+            member = table.column("member").combine_chunks()
+            bill = table.column("bill").combine_chunks()
+            return cls.from_columns(member.dictionary.to_pylist(), bill.dictionary.to_pylist(),
+                                    member.indices.to_numpy(), bill.indices.to_numpy(),
+                                    table.column("code").to_numpy())
+        with np.load(path) as f:
+            names = json.loads(str(f["names"]))
+            return cls.from_columns(names["member_keys"], names["bill_names"],
+                                    f["members"], f["bills"], f["codes"])
@@ -10,119 +10,190 @@ Purpose: *Find the voting record for reps. from the House and U.S. Senators for
          *Create the Fiscal Responsibility Score for each Rep and Senator
          *Organize into a csv called scores_data.csv
 """
+import os
 import re
 import time
+import logging
+import argparse
+import contextlib
+import multiprocessing
+from urllib.parse import urljoin
 import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import NoSuchElementException
-from collections import defaultdict
-from matplotlib import pyplot as plt
+from member_index import MemberIndex, MemberRecord, add_member
+from roster import Roster, fetch_legislators, normalize_name
+from scoring import VoteMatrix, YEAS_ONLY
+from page_cache import PageCache, CacheMiss
+from fetch import HttpBackend, BrowserBackend
+from bill_catalogue import BillCatalogue
+from cbo_index import CboIndex, bill_key
+from cbo_parser import parse_cbo_summary, DOLLAR_FINDER, SAME_LINE_DOLLAR_FINDER
+from cbo_store import CboStore, net_cost, reparse, apply
+from pdf_text import PdfTextExtractor
+from page_parsers import member_search_rows, links, estimate_page
+from scheduler import run_stages, PoliteSession
+from concurrent.futures import ProcessPoolExecutor
+from metrics import METRICS, PROFILES, profile
+from output import scores_frame, write_scores, upsert_scores, have_pyarrow, write_votes
+from pipeline import Checkpoints, merge_members, merge_estimates, estimated_bills
+from vote_store import VoteStore
+from roll_calls import index_senate_vote_menu, index_house_roll_call_list, merge_indexes, senate_measure
+from roll_calls import senate_votes, house_votes, SENATE_MENU_URL
 import numpy as np
-import math
-from urllib.request import urlretrieve
-import textract
 from datetime import date
-import time
-import pandas as pd
 
-def quick_members_of_congress(sessions=[i for i in range(105,116)]):
+MEMBER_SEARCH_URL = "http://bioguide.congress.gov/biosearch/biosearch.asp"
+HOUSE_VOTES_URL = "http://clerk.house.gov/evs/"
+#Links on a year's index page to the pages of its roll calls
+ROLL_CALL_PAGES = re.compile(r"^Roll Calls")
+
+log = logging.getLogger(__name__)
+
+def quick_members_of_congress(sessions=[i for i in range(105,116)], cache=None, roster=None):
     """Find the names of all members of congress for given sessions of Congress
 
     Parameters:
         sessions (list): Which sessions to find members of Congress
+        cache (PageCache): where to save and reuse the search results
+        roster (Roster): members already loaded (see load_roster). Sessions
+            it doesn't have are searched for on the bioguide.
 
     Returns:
         (dict): House Representatives for the given sessions
                "Last Name, First Name, Title" (Title is Jr. or Sr.)
-               include State, Party, Birth, Congress Year
+               include State, Party, Birth, Congress Year, bioguide ID
         (dict): Senators for the given session
                "Last Name, First Name, Title"
-               include State, Party, Birth, Congress Year
+               include State, Party, Birth, Congress Year, bioguide ID
     """
-    member_search_url = "http://bioguide.congress.gov/biosearch/biosearch.asp"
-    browser = webdriver.Chrome()
+    if roster is not None:
+        if not all(roster.has(session) for session in sessions):
+            missing = [session for session in sessions if not roster.has(session)]
+            for record in iter_members_of_congress(missing, cache):
+                roster.add(record)
+            roster.searched(missing)
+        return roster.chambers(sessions)
     Representatives, Senators = dict(), dict()
+    for record in iter_members_of_congress(sessions, cache):
+        add_member(Representatives if record.position == 'Rep' else Senators, record)
+    return Representatives, Senators
+
+def load_roster(sessions=[i for i in range(105,116)], cache=None, path=None, bulk=False):
+    """Load every member of Congress of the given sessions into a Roster at
+    once
+
+    Sessions already in the saved roster are kept. The rest come from the
+    bioguide search, which is read from the cache when it was searched
+    before, or with bulk from the congress-legislators bulk data (two
+    downloads for every session) and the search for any session that isn't
+    in it.
+
+    The bulk data names members with their full middle names, e.g. "Biden,
+    Joseph Robinette, Jr." where the search has "Biden, Joseph R., Jr.", and
+    members are keyed by name in the checkpoints and scores_data.csv. So the
+    bulk data is opt-in, members who were ever searched for keep the name
+    from the search, and without bulk the sessions a saved roster loaded
+    from the bulk data are searched for again.
+
+    Parameters:
+        sessions (list): sessions of Congress to load
+        cache (PageCache): where to save and reuse the downloads
+        path (str): JSON file the roster is saved to, or None
+        bulk (bool): whether to use the bulk data, or only the search
+
+    Returns:
+        (Roster): the members, indexed by session
+    """
+    if cache is None:
+        cache = PageCache()
+    roster = Roster(path)
+    missing = [session for session in sessions if not roster.has(session, bulk)]
+    if missing and bulk:
+        with METRICS.timer("parse"):
+            roster.add_legislators(fetch_legislators(cache), missing)
+        #A session with no members in the bulk data is searched for instead
+        for session in missing:
+            if not roster.by_session[session]:
+                del roster.by_session[session]
+        missing = [session for session in sessions if not roster.has(session)]
+    for record in iter_members_of_congress(missing, cache) if missing else []:
+        roster.add(record)
+    roster.searched(missing)
+    if path is not None:
+        roster.save()
+    return roster
+
+def iter_members_of_congress(sessions=[i for i in range(105,116)], cache=None):
+    """Yield every member of Congress of the given sessions as soon as the
+    bioguide search for their session has been read
+
+    Parameters:
+        sessions (list): Which sessions to find members of Congress
+        cache (PageCache): where to save and reuse the search results
+
+    Yields:
+        (MemberRecord): one member serving in one session, session by session
+    """
+    #The bioguide search is a form, so it needs a browser
+    browser = BrowserBackend(cache)
+    position = None
     try:
-        browser.get(member_search_url)
-        time.sleep(2)
-        #soup = BeautifulSoup(browser.page_source, 'html.parser')
         for session in sessions:
-            try:
-                input_elements = browser.find_elements_by_tag_name("input")
-            except:
-                print("Couldn't find any input elements")
-            #Search bar for year or Congress session
-            input_congress = input_elements[2]
-            #Button for searching for members of Congress
-            input_search = input_elements[3]
-            input_congress.clear()
-            input_congress.send_keys(str(session))
-            input_search.click()
-            time.sleep(2)
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
-            member_name_tags = soup.find_all(name='a', href=True)
-            for tag in member_name_tags[:-1]:
-                name = tag.next
-                split = name.split(sep=',')
-                #Deal with the rare case that the last name starts with lowercase
-                if split[0][0].islower():
-                    for i in range(1,len(split[0])):
-                        if split[0][i].isupper():
-                            first = split[0][:i+1]
-                            for j in range(len(split[0][i+1:])):
-                                first += split[0][i+j+1].lower()
-                            break
-                    split[0] = first
-                    name = ''.join([word + "," for word in split]).strip()[:-1]
-                #Every other case starts with upper-case, but this website
-                #   puts the entire last name in all-caps, so we want to set
-                #   the other letters in the last name to lowercase
-                else:
-                    split[0] = split[0][0] + split[0][1:].lower()
-                    name = ''.join([word + "," for word in split]).strip()[:-1]
-                birth = tag.next.next.string[:4]
-
-                if tag.next.next.next.next.next.next == "Representative":
+            #The search results are cached under the URL of the form and the
+            #   session searched for
+            search_key = MEMBER_SEARCH_URL + "?congress=" + str(session)
+            page_source = browser.submit_form(search_key, MEMBER_SEARCH_URL,
+                                              lambda driver: search_bioguide(driver, session))
+            with METRICS.timer("parse"):
+                rows = member_search_rows(page_source)
+            for row in rows:
+                name = normalize_name(row.name)
+                birth = row.birth
+                #The link to the member's biography ends in their bioguide id
+                member_id = row.member_id
+
+                if row.position == "Representative":
                     position = 'R'
-                elif tag.next.next.next.next.next.next == "Senator":
+                elif row.position == "Senator":
                     position = 'S'
-                if tag.next.next.next.next.next.next.next.next == "Democrat":
+                if row.party == "Democrat":
                     party = 'D'
-                elif tag.next.next.next.next.next.next.next.next == "Republican":
+                elif row.party == "Republican":
                     party = 'R'
-                elif tag.next.next.next.next.next.next.next.next == "Independent":
+                elif row.party == "Independent":
                     party = "I"
-                state = tag.next.next.next.next.next.next.next.next.next.next
-                #Now add the member of Congress with all this information to the dict
+                state = row.state
+                #Hand the member of Congress with all this information to the
+                #   caller before reading the next row
                 if position == 'R':
-                    if name in Representatives.keys():
-                        Representatives[name]["Sessions"].append(session)
-                    else:
-                        Representatives[name] = {"State":state, "Party":party, "Sessions":[session]}
-                        Representatives[name]["Position"] = 'Rep'
-                        Representatives[name]["Birth"] = int(birth)
-
+                    yield MemberRecord(name, 'Rep', state, party, int(birth), session, member_id)
                 elif position == 'S':
-                    if name in Senators.keys():
-                        Senators[name]["Sessions"].append(session)
-                    else:
-                        Senators[name] = {"State":state, "Party":party, "Sessions":[session]}
-                        Senators[name]["Position"] = 'Sen'
-                        Senators[name]["Birth"] = int(birth)
-            browser.get(member_search_url)
-            time.sleep(2)
-
-
+                    yield MemberRecord(name, 'Sen', state, party, int(birth), session, member_id)
 
     finally:
         browser.close()
 
+def search_bioguide(browser, session):
+    """Search the bioguide for every member of a session of Congress
 
-    return Representatives, Senators
-
-def get_bill_names(sessions=[i for i in range(105,116)]):
+    Parameters:
+        browser (WebDriver): browser on the bioguide search page
+        session (int): session of Congress to search for
+    """
+    time.sleep(2)
+    try:
+        input_elements = browser.find_elements_by_tag_name("input")
+    except:
+        print("Couldn't find any input elements")
+    #Search bar for year or Congress session
+    input_congress = input_elements[2]
+    #Button for searching for members of Congress
+    input_search = input_elements[3]
+    input_congress.clear()
+    input_congress.send_keys(str(session))
+    input_search.click()
+    time.sleep(2)
+
+def get_bill_names(sessions=[i for i in range(105,116)], cache=None, catalogue=None):
     """Find the names of all bills signed into law during the given sessions of
     Congress. Default is all sessions available from Congress.gov. Return bills
     initiated in the House of Representatives and bills initiated in the Senate
@@ -130,708 +201,756 @@ def get_bill_names(sessions=[i for i in range(105,116)]):
 
     Parameters:
         sessions (list): Which sessions to find bill names for
+        cache (PageCache): where to save and reuse the public law pages
+        catalogue (BillCatalogue): sessions already looked up, so each session
+            is only fetched once per run
 
     Returns:
         house_bills (list): names of bills initiated in H.R. signed into law
         senate_bills (list): names of bills initiated in Senate signed into law
     """
+    if catalogue is None:
+        catalogue = BillCatalogue(cache)
+    return catalogue.bill_names(sessions)
 
-    base_url = "https://www.congress.gov/public-laws/"
-    #Bills initiated in the Senate start with "S." followed by numbers
-    #Bills initiated in the House of Rep. start with "H.R." followed by numbers
-    senate_bill_finder = re.compile(r"^S\.\d+$")
-    house_bill_finder = re.compile(r"^H.R.\d+$")
-    #Find the names of all the bill names passed with
-    #   Senate bill names and House bills in separate lists
-    senate_bills = []
-    house_bills = []
-    #Cycle through every session of congress publicly available on congress.gov
-    for session in sessions[::-1]:
-        #Navigate to the page corresponding to that session of Congress
-        soup = BeautifulSoup(requests.get(base_url+str(session)).text, "html.parser")
-        for tag in soup.find_all(name='a'):
-            if tag.string is not None:
-                if bool(senate_bill_finder.search(tag.string)):
-                    senate_bills.append(tag.string+'-'+str(session)+"th")
-                if bool(house_bill_finder.search(tag.string)):
-                    house_bills.append(tag.string+'-'+str(session)+"th")
-        #Congress.gov requires a wait time of 2 seconds while crawling
-        time.sleep(2)
-
-
-    return house_bills, senate_bills
-
-def get_senator_voting_records(Senators, sessions=[i for i in range(105,116)]):
+def get_senator_voting_records(Senators, sessions=[i for i in range(105,116)], cache=None, catalogue=None, backend=None, votes=None):
     """Create a dictionary storing the voting records of senators for all of the
     bills for a given session of congress
 
     Parameters:
         Senators (dict): dictionary of Senators,
         session (int): Session of congress to find senator voting records for
+        cache (PageCache): where to save and reuse the vote menus and roll calls
+        catalogue (BillCatalogue): bills signed into law during each session
+        backend (HttpBackend): how to load the vote menus and roll calls, which
+            are XML files read as they were sent
+        votes (VoteStore): where to record the votes, a new one by default
 
-    This function returns nothing because it modifies the dictionary it receives
+    Returns:
+        (VoteStore): every Senator's vote on each bill
+
+    Roll call rows that don't match exactly one Senator are counted and printed
+    at the end.
     """
-    for key in Senators.keys():
-        Senators[key]["Yeas"] = list()
-        Senators[key]["Nays"] = list()
-        Senators[key]["Not Voting"] = list()
-    browser = webdriver.Chrome()
+    senate_index = MemberIndex(Senators, votes)
+    for record in iter_senate_votes(sessions, cache, catalogue, backend):
+        senate_index.record(record)
+    senate_index.report("Senate")
+    return senate_index.votes
+
+def iter_senate_votes(sessions=[i for i in range(105,116)], cache=None, catalogue=None, backend=None):
+    """Yield every Senator's vote on the passage of each bill signed into law,
+    one roll call at a time, as soon as it has been parsed
+
+    Parameters:
+        sessions (list): Sessions of congress to find senator votes for
+        cache (PageCache): where to save and reuse the vote menus and roll calls
+        catalogue (BillCatalogue): bills signed into law during each session
+        backend (HttpBackend): how to load the vote menus and roll calls
+
+    Yields:
+        (VoteRecord): one Senator's vote, session by session and bill by bill
+    """
+    if cache is None:
+        cache = PageCache()
+    if catalogue is None:
+        catalogue = BillCatalogue(cache)
+    if backend is None:
+        backend = HttpBackend(cache)
     try:
         for session in sessions:
-            house_names, senate_names = get_bill_names([session])
-            bill_names = house_names + senate_names
-            other_bills = bill_names
             #Find the names of all the bills signed into law during this session of
             #   Congress.
-            senate_url = "https://www.senate.gov/"
-            base_url = "https://www.senate.gov/legislative/LIS/roll_call_lists/vote_menu_"
-            #URL for the first year of this session of Congress
-            first_year_url = base_url + str(session) + "_1.htm"
-            #URL for the second year of this session of Congress
-            second_year_url = base_url + str(session) + "_2.htm"
-################################################################################
-#For the first year of the Session of Congress                                 #
-################################################################################
-            browser.get(first_year_url)
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
-            tags_with_links = soup.find_all(name='a', href=True)[80:]
-            leftover_bills = []
-            for name in other_bills:
-                found = False
-                #senate.gov has strings as S. 1582 rather than S.1582 so we must
-                #   add a space to match the text
-                split = name.split(sep='.')
-                if len(split) < 3:
-                    new_name = split[0] + '. ' + split[1]
-                else:
-                    new_name = split[0]+'.'+split[1]+'. ' + split[2]
-                #Find if the bill is on the page
-                for tag in tags_with_links:
-                    if new_name.split('-')[0] == tag.string:
-                        #Save URL for roll-call votes
-                        try:
-                            roll_call_tag = tag.previous.previous.previous.previous.previous.previous.previous
-                            roll_call_page = roll_call_tag.attrs['href']
-                        except:
-                            roll_call_tag = tag.previous.previous.previous.previous.previous.previous.previous.previous.previous.previous
-                            roll_call_page = roll_call_tag.attrs['href']
-                        #Skip if they're not voting on the actual passage
-                        #   of the bill.
-                        if roll_call_tag.next.next.next != "Passed":
-                            continue
-                        found = True
-                        browser.get(senate_url + roll_call_page)
-                        roll_call_soup = BeautifulSoup(browser.page_source, 'html.parser')
-                        tags = roll_call_soup.find_all(name='span', attrs={"class":"contenttext"})
-                        tag = tags[0].next
-                        for i in range(100):
-                            split = tag.string.split(sep = " ")
-                            Sen_name = split[0]
-                            try:
-                                party = split[1][1]
-                                state = split[1][3:5]
-                                for key in Senators.keys():
-                                    #Check if last name from roll call matches the
-                                    #   last name of any Senators that have served
-                                    #   during the listed sessions
-                                    if Sen_name == key.split(sep=',')[0]:
-                                        #Only one Senator should match each of these
-                                        #   characteristics
-                                        if Senators[key]["Party"] == party and Senators[key]["State"] == state and session in Senators[key]["Sessions"]:
-                                            if tag.next.string == "Yea":
-                                                    Senators[key]["Yeas"].append(name)
-                                            elif tag.next.string == "Nay":
-                                                    Senators[key]["Nays"].append(name)
-                                            elif tag.next.string == "Not Voting":
-                                                    Senators[key]["Not Voting"].append(name)
-                                tag = tag.next.next.next.next.next
-                            except:
-                                #print("Missing Senator")
-                                pass
-                        break
-                if found == False:
-                    leftover_bills.append(name)
-
-################################################################################
-#Repeat for the second year of the session                                     #
-################################################################################
-            browser.get(second_year_url)
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
-            tags_with_links = soup.find_all(name='a', href=True)[80:]
-            other_bills = []
-            for name in leftover_bills:
-                found = False
-                #senate.gov has strings as S. 1582 rather than S.1582 so we must
-                #   add a space to match the text
-                split = name.split(sep='.')
-                if len(split) < 3:
-                    new_name = split[0] + '. ' + split[1]
-                else:
-                    new_name = split[0]+'.'+split[1]+'. ' + split[2]
-                #Find if the bill is on the page
-                for tag in tags_with_links:
-                    if new_name.split('-')[0] == tag.string:
-                        #Save URL for roll-call votes
-                        try:
-                            roll_call_tag = tag.previous.previous.previous.previous.previous.previous.previous
-                            roll_call_page = roll_call_tag.attrs['href']
-                        except:
-                            roll_call_tag = tag.previous.previous.previous.previous.previous.previous.previous.previous.previous.previous
-                            roll_call_page = roll_call_tag.attrs['href']
-                        #Skip if they're not voting on the actual passage
-                        #   of the bill.
-                        if roll_call_tag.next.next.next != "Passed":
-                            continue
-                        browser.get(senate_url + roll_call_page)
-                        roll_call_soup = BeautifulSoup(browser.page_source, 'html.parser')
-                        #if roll_call_soup.find(name='question').string != "On Passage of the Bill":
-                        #    continue
-                        found = True
-                        tags = roll_call_soup.find_all(name='span', attrs={"class":"contenttext"})
-                        tag = tags[0].next
-                        for i in range(100):
-                            split = tag.string.split(sep = " ")
-                            Sen_name = split[0]
-                            try:
-                                party = split[1][1]
-                                state = split[1][3:5]
-                                for key in Senators.keys():
-                                    #Check if last name from roll call matches the
-                                    #   last name of any Senators that have served
-                                    #   during the listed sessions
-                                    if Sen_name == key.split(sep=',')[0]:
-                                        #Only one Senator should match each of these
-                                        #   characteristics
-                                        if Senators[key]["Party"] == party and Senators[key]["State"] == state and session in Senators[key]["Sessions"]:
-                                            if tag.next.string == "Yea":
-                                                    Senators[key]["Yeas"].append(name)
-                                            elif tag.next.string == "Nay":
-                                                    Senators[key]["Nays"].append(name)
-                                            elif tag.next.string == "Not Voting":
-                                                    Senators[key]["Not Voting"].append(name)
-                                tag = tag.next.next.next.next.next
-                            except:
-                                #A senator is missing from the roll_call page
-                                pass
-                        break
-                if found == False:
-                    other_bills.append(name)
+            bill_names = catalogue.all_bills([session])
+            #Read both years' vote menus once into one index from measure to
+            #   roll call. The first year's passage vote comes first.
+            menus = [index_senate_vote_menu(backend.page_bytes(SENATE_MENU_URL % (session, year)), session, year)
+                     for year in (1, 2)]
+            roll_calls = merge_indexes(menus, "Passed")
+            for name in bill_names:
+                roll_call_url, result = roll_calls.get(senate_measure(name), (None, None))
+                #Skip if they're not voting on the actual passage of the bill.
+                if result != "Passed":
+                    continue
+                roll_call = backend.page_bytes(roll_call_url)
+                with METRICS.timer("parse"):
+                    records = list(senate_votes(roll_call, name, session))
+                yield from records
 
     finally:
-        browser.close()
+        backend.close()
 
-def get_representative_voting_records(Representatives, sessions=[i for i in range(105,116)]):
+def get_representative_voting_records(Representatives, sessions=[i for i in range(105,116)], cache=None, catalogue=None, backend=None, votes=None):
     """Create a dictionary storing the voting records of reps for all of the
     bills for a given session of congress
 
     Parameters:
         Representatives (dict): dictionary of Representatives,
         session (list): Sessions of congress to find rep voting records for
+        cache (PageCache): where to save and reuse the roll call pages
+        catalogue (BillCatalogue): bills signed into law during each session
+        backend (HttpBackend): how to load the roll call lists and the roll
+            call XML files
+        votes (VoteStore): where to record the votes, a new one by default
 
-    This function returns nothing because it modifies the dictionary it receives
+    Returns:
+        (VoteStore): every Rep's vote on each bill
+
+    Roll call rows that don't match exactly one Rep are counted and printed at
+    the end.
     """
-    home_url = "http://clerk.house.gov/legislative/legvotes.aspx"
-    base_url = "http://clerk.house.gov/evs/"
-    for key in Representatives.keys():
-        Representatives[key]["Yeas"] = list()
-        Representatives[key]["Nays"] = list()
-        Representatives[key]["Not Voting"] = list()
-
-    browser = webdriver.Chrome()
+    house_index = MemberIndex(Representatives, votes)
+    for record in iter_house_votes(sessions, cache, catalogue, backend):
+        house_index.record(record)
+    house_index.report("House")
+    return house_index.votes
+
+def iter_house_votes(sessions=[i for i in range(105,116)], cache=None, catalogue=None, backend=None):
+    """Yield every Rep's vote on the passage of each bill signed into law, one
+    roll call at a time, as soon as it has been parsed
+
+    Parameters:
+        sessions (list): Sessions of congress to find rep votes for
+        cache (PageCache): where to save and reuse the roll call pages
+        catalogue (BillCatalogue): bills signed into law during each session
+        backend (HttpBackend): how to load the roll call lists and the roll
+            call XML files
+
+    Yields:
+        (VoteRecord): one Rep's vote, session by session and roll call list
+                      page by page
+    """
+    base_url = HOUSE_VOTES_URL
+    if cache is None:
+        cache = PageCache()
+    if catalogue is None:
+        catalogue = BillCatalogue(cache)
+    if backend is None:
+        backend = HttpBackend(cache)
+
     try:
-        browser.get(home_url)
-        #Options for session of Congress to get roll call votes
-        option_elements = browser.find_elements_by_tag_name("option")
-        submit_button = browser.find_elements_by_tag_name("input")[-2]
         for session in sessions:
-            bill_names = get_bill_names([session])
-            bill_names = bill_names[0] + bill_names[1]
-            other_bills = bill_names
+            other_bills = catalogue.all_bills([session])
             #101 Session of Congress only has 1 roll call page
             if session == 101:
-                num_sessions = 1
-                index = 0
-                options = [option_elements[0]]
                 years = [1990]
-            #115 Session of Congress only has 1 roll call page
-            elif session == 115:
-                index = -1
-                num_sessions = 2
-                options = [option_elements[-1]]
-                years = [2017, 2018]
-            #Every other session has two roll call pages
+            #Every other session has two roll call pages, one for each year
             else:
-                num_sessions = 2
-                index = 2*(session - 102) + 1
-                options = option_elements[index:index+2]
                 year1 = 2*(session - 102) + 1991
                 years = [year1, year1 + 1]
-            for i in range(num_sessions):
-                year = years[i]
-                if session == 115 and i > 0:
-                    browser.get("http://clerk.house.gov/evs/2018/index.asp")
-                else:
-                    #There are two years for each session the first "option"
-                    #   corresponds to the first year; similarly for the second option
-                    option = browser.find_elements_by_tag_name("option")[index+i]
-                    submit_button = browser.find_elements_by_tag_name("input")[-2]
-                    option.click()
-                    submit_button.click()
-                #This brings us to a page with links to pages each containing
-                #   several of the roll call vote records for the given year
-                soup = BeautifulSoup(browser.page_source, 'html.parser')
-                search_page_urls = [tag.attrs['href'] for tag in soup.find_all(name='a', href=True, string=re.compile(r"^Roll Calls"))]
+            for year in years:
+                #Each year has a static index page with links to pages each
+                #   containing several of the roll call vote records for the
+                #   year. It's the same page the form on legvotes.aspx leads to.
+                with METRICS.timer("parse"):
+                    search_page_urls = links(backend.page(base_url + str(year) + "/index.asp"), ROLL_CALL_PAGES)
                 for page_url in search_page_urls:
-                    browser.get(base_url + str(year) + '/' + page_url)
                     #Each page contains links to pages containing the actual
                     #   roll call vote records
-                    page_soup = BeautifulSoup(browser.page_source, 'html.parser')
-
-                    bill_tags = page_soup.find_all(name='a', href=True, string=re.compile(r"^H R \d+$"))
-                    bill_tags += page_soup.find_all(name='a', href=True, string=re.compile(r"^S \d+$"))
-                    bills_on_page = set([tag.string for tag in bill_tags])
+                    roll_calls = index_house_roll_call_list(backend.page(base_url + str(year) + '/' + page_url))
                     #Keep track of the bills that haven't been found so we don't
                     #   keep searching for bills we've already added to the
                     #   records
                     leftover_bills = []
                     for bill_name in other_bills:
-                        found = False
-                        for bill_on_page in bills_on_page:
-                            if bill_name.split(sep='-')[0] == ''.join(i+'.' for i in bill_on_page.split())[:-1]:
-                                tag = page_soup.find(name='a', href=True, string=bill_on_page)
-                                #Skip if they're not voting on the actual passage
-                                #   of the bill.
-                                if tag.next.next.next.string != "On Passage":
-                                    continue
-                                found = True
-                                roll_call_url = tag.previous.previous.previous.previous.previous.previous.previous.previous.previous.attrs['href']
-                                soup = BeautifulSoup(requests.get(roll_call_url).text, 'html.parser')
-
-                                tags = soup.find_all(name='recorded-vote')
-                                for tag in tags:
-                                    got_state = False
-                                    rep_name = tag.next.string
-                                    state = tag.next.attrs['state']
-                                    party = tag.next.attrs['party']
-                                    #Store state if it's there
-                                    if bool(re.compile(r"\(").search(rep_name)):
-                                        got_state = True
-                                        state = rep_name.split(sep='(')[-1][0:2]
-                                        #Remove the state from the rep_name
-                                        rep_name = ''.join(rep_name.split(sep='(')[:-1]).strip()
-                                    #Following we add the vote to the Rep dict, but
-                                    #   first we have to uniquely identify the Rep.
-                                    #   We use state, party, and session of Congress
-                                    #   if all we have is the last name.
-                                    #if ',' in rep_name:
-                                    #    Representatives[rep_name][vote_types[i]].append(bill_name)
-                                    #    print("Success1")
-                                    #else:
-                                    for key in Representatives.keys():
-                                        if rep_name == key.split(sep=',')[0]:
-                                            #Use state information to get the right senator
-                                            #   if you have it
-                                            if got_state == True:
-                                                if state == Representatives[key]["State"] and party == Representatives[key]["Party"] and session in Representatives[key]["Sessions"]:
-                                                    if tag.next.next.next.string == "Yea":
-                                                        Representatives[key]["Yeas"].append(bill_name)
-                                                    elif tag.next.next.next.string == "Nay":
-                                                        Representatives[key]["Nays"].append(bill_name)
-                                                    elif tag.next.next.next.string == "Not Voting":
-                                                        Representatives[key]["Not Voting"].append(bill_name)
-                                            #This is if we don't have state information
-                                            else:
-                                                if party == Representatives[key]["Party"] and session in Representatives[key]["Sessions"]:
-                                                    if tag.next.next.next.string == "Yea":
-                                                        Representatives[key]["Yeas"].append(bill_name)
-                                                    elif tag.next.next.next.string == "Nay":
-                                                        Representatives[key]["Nays"].append(bill_name)
-                                                    elif tag.next.next.next.string == "Not Voting":
-                                                        Representatives[key]["Not Voting"].append(bill_name)
-                                break
-
-                        if found == False:
+                        roll_call_url, question = roll_calls.get(bill_name.split(sep='-')[0], (None, None))
+                        #Skip if they're not voting on the actual passage
+                        #   of the bill.
+                        if question != "On Passage" or roll_call_url is None:
                             leftover_bills.append(bill_name)
+                            continue
+                        roll_call = backend.page_bytes(roll_call_url)
+                        with METRICS.timer("parse"):
+                            records = list(house_votes(roll_call, bill_name, session))
+                        yield from records
                     other_bills = leftover_bills
-
-                browser.get(home_url)
-
+                    if not other_bills:
+                        break
 
     finally:
-        browser.close()
+        backend.close()
 
-def get_cost_estimates(bill_names):
+def get_cost_estimates(bill_names, cache=None, backend=None, extractor=None, index=None, store=None):
     """Find the net cost estimates for each bill and return a dictionary
 
     Parameters:
         bill_names (list): list of bill names including the session in which
             the bill was passed
+        cache (PageCache): where to save and reuse the estimate pages and pdfs
+        backend (HttpBackend): how to load the estimate pages
+        extractor (PdfTextExtractor): extracts and saves the text of the pdfs
+        index (CboIndex): every estimate on cbo.gov by bill. A bill that isn't
+            in it has no report, without asking cbo.gov.
+        store (CboStore): where to keep every summary and what was found in
+            it, to parse again later without crawling
 
     Returns:
         (dict): each bill name with its net cost estimate
     """
     start_time = time.time()
     home_url = "https://www.cbo.gov"
-    base_url = "https://www.cbo.gov/cost-estimates"
-    important_bills = list()
     bill_costs = dict()
-    count = 0
-    costs, revenues = [],[]
     no_report, from_summary, from_pdf, no_estimate = list(), list(), list(), list()
-    successes, failures = list(), list()
+    if cache is None:
+        cache = PageCache()
+    if backend is None:
+        backend = HttpBackend(cache)
+    if extractor is None:
+        extractor = PdfTextExtractor(cache)
+    if index is None:
+        index = CboIndex(cache)
+    def missing_estimate(bill_name, reason):
+        #Why each bill without an estimate has none is counted, e.g.
+        #   "no_estimate_pdf" for a pdf that couldn't be downloaded
+        log.info("%s: no estimate (%s)", bill_name, reason.replace('_', ' '))
+        METRICS.count("no_estimate_" + reason)
+        no_estimate.append(bill_name)
     try:
-        browser = webdriver.Chrome()
         for bill_name in bill_names:
-            found_summary = False
-            cost, revenue, dollar = 0, 0, 0
-            name, session = bill_name.split(sep='-')
-            #go to the cost estimates page and search for the bill name
-            browser.get(base_url)
-            browser_elements = browser.find_elements_by_tag_name("input")
-            try:
-                search_bill = browser_elements[4]
-                search_button = browser_elements[8]
-                search_bill.clear()
-                search_bill.send_keys(name)
-                search_button.click()
-            except:
+            #Find the bill's cost estimate page in the listing of its session
+            #   of Congress
+            entry = index.lookup(bill_name)
+            if entry is None:
                 no_report.append(bill_name)
                 continue
-            #Limit the search to the session of congress that bill was passed
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
-            try:
-                link = soup.find(name='span', attrs={"class":"facet-item__value"}, string=re.compile(session)).previous.attrs['href']
-            except:
-                #print(bill_name, "No CBO estimate")
-                no_report.append(bill_name)
-                continue
-            browser.get(home_url + link)
-            #cbo.gov has strings as S. 1582 rather than S.1582 so we must
-            #   add a space to match the text
-            split = name.split(sep='.')
-            if len(split) < 3:
-                new_name = split[0] + '. ' + split[1]
-            else:
-                new_name = split[0]+'.'+split[1]+'. ' + split[2]
-            #Get the link for the bill's cost estimate page and navigate to the page
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
+            #Offline, a page that was never cached is a bill without an
+            #   estimate instead of the end of the stage
             try:
-                link = soup.find(name='a', string=re.compile(new_name)).attrs['href']
-            except:
-                #print(bill_name, "Failed to get bill's cost estimate page")
-                no_report.append(bill_name)
+                content = backend.page(entry["url"])
+            except (requests.RequestException, CacheMiss):
+                missing_estimate(bill_name, "page")
                 continue
-            browser.get(home_url + link)
-            soup = BeautifulSoup(browser.page_source, 'html.parser')
+            with METRICS.timer("parse"):
+                page = estimate_page(content)
             #Find the year for calculating total costs for annual estimates
             #   when no date range is given for the number of years.
             #   Explained more below.
             try:
-                year = int(soup.find("time").string.split()[-1])
-            except:
-                print(bill_name, "failed to retrieve year")
-                no_estimate.append(bill_name)
+                year = int(page.time.split()[-1])
+            except (AttributeError, IndexError, ValueError):
+                missing_estimate(bill_name, "year")
                 continue
-            #Try to get the summary without downloading the pdf
-            try:
-                tags = soup.find_all(name='p')
-                summary = [tag.string for tag in tags]
-                #combine all the paragaphs into one text string
-                summary = ''.join([paragraph+'\n\n' for paragraph in summary]).strip()[:-1]
-                if bool(re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?\n? ?(?:billion|million)?", re.IGNORECASE).search(summary)):
-                    found_summary = True
-                    from_summary.append(bill_name)
-
-            except:
-                pass
-
-            #Download the pdf if you have to
-            if found_summary is not True:
-                #Navigate to the pdf
-                try:
-                    pdf_link = soup.find(name='a', string="View Document").attrs['href']
-                except exception as e:
-                    #print(bill_name, 'failed to get the pdf link')
-                    no_estimate.append(bill_name)
-                    continue
-                browser.get(home_url + pdf_link)
-                #Extract the text from the pdf to start parsing for costs/revenues
-                try:
-                    urlretrieve(home_url + pdf_link, "pdfs/temp.pdf")
-                except:
-                    print(bill_name, "failed to get pdf")
-                    no_estimate.append(bill_name)
-                    continue
-                try:
-                    text = textract.process("pdfs/temp.pdf").decode("utf-8")
-                except:
-                    #print(bill_name, "Error exracting text from pdf")
-                    no_estimate.append(bill_name)
-                    continue
-                #Put the dash back in the 1999-2000 that textract accidentally takes
-                #   out.
-                text = re.sub(r"(\d{4}) ?(\d{4})", r"\1-\2", text)
-                #temp_input = input("Continue? ")
+            #Try to get the summary without downloading the pdf. Combine all
+            #   the paragraphs into one text string. A paragraph with tags in
+            #   it has no string, and then the summary is read from the pdf.
+            if None in page.paragraphs:
+                summary = ''
+            else:
+                summary = ''.join([paragraph+'\n\n' for paragraph in page.paragraphs]).strip()[:-1]
+            from_web_page = bool(DOLLAR_FINDER.search(summary))
+            if from_web_page:
+                from_summary.append(bill_name)
+            else:
+                #Download the pdf if you have to
+                pdf_url = entry["pdf"]
+                if pdf_url is None:
+                    if page.pdf_href is None:
+                        missing_estimate(bill_name, "pdf_link")
+                        continue
+                    pdf_url = urljoin(home_url, page.pdf_href)
+                    index.set_pdf(bill_name, pdf_url)
+                #Download the pdf into memory
                 try:
-                    #summary = re.compile(r"SUMMARY.*?[A-Z ]{12,}", re.DOTALL).findall(text)[0]
-                    summary = re.compile(r"[A-Z ]{7,}.*?[A-Z ]{12,}", re.DOTALL).findall(text)[1] #Trying to grab more cases this way
-                    #print("Summary:", summary)
-                    if bool(re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?\n? ?(?:billion|million)?", re.IGNORECASE).search(summary)):
-                        found_summary = True
-                        from_pdf.append(bill_name)
-                except Exception as e:
-                    print("Couldn't find dollar_string in pdf")
-                    no_estimate.append(bill_name)
+                    pdf_bytes, encoding = cache.get_bytes(pdf_url)
+                except (requests.RequestException, CacheMiss):
+                    missing_estimate(bill_name, "pdf")
                     continue
-
-#                if not found_summary:
-#                    #print(bill_name, 'No "ESTIMATED COST" section')
-#                    try:
-#                        table_years = [year for year in re.compile(r"(?:\d{4}\n{1,2}){3,}(?:\d{4}[ -]?\d{4}\n{,2}){,2}").findall(text)[0].split(sep='\n') if year != '']
-#                        string = re.compile(r"deficit.*[\n \-\d\.\,\*]{16,}", re.IGNORECASE|re.DOTALL).findall(text)[0]
-#                        nums = [digit for digit in string.split(sep='\n') if digit != '' and not bool(re.compile(r"[a-zA-z]").search(digit))]
-#                        deficit = int(nums[len(table_years)-1].replace(',',''))
-#                        if bool(re.compile(r"billions of dollars", re.IGNORECASE).search(text)):
-#                            bill_costs[bill_name]= -1e9*deficit
-#                            print(bill_name, -1e9*deficit)
-#                        elif bool(re.compile(r"millions of dollars", re.IGNORECASE).search(text)):
-#                            bill_costs[bill_name]= -1e6*deficit
-#                            print(bill_name, -1e6*deficit)
-#                    except Exception as e:
-#                        print("Finding the table didn't work either")
-#                        print("Exception:", e)
-#                    continue
-
-            #Split the summary into sentences
-            sentences = re.compile(r"\. [A-Z]|\.\n[A-Z]").split(summary)
-################################################################################
-#First for costs                                                               #
-################################################################################
-            first_year, last_year = None, None
-            for i, sentence in enumerate(sentences):
-                found_cost = False
+                #Extract the summary from the pdf to start parsing for
+                #   costs/revenues
                 try:
-                    dollar_strings = re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?\n? ?(?:billion|million)?", re.IGNORECASE).findall(sentence)
-                except:
-                    #print(bill_name, "couldn't find dollar string")
+                    summary = extractor.summary(pdf_bytes)
+                except IndexError:
+                    missing_estimate(bill_name, "pdf_summary")
                     continue
-                for dollar_string in dollar_strings:
-                    cost_keyword_finder = re.compile(r"(?:cost|provides|(?:additional|increase|resul).*(?:spending|outlay)|discretion.*spending|(?:decrease|reduc).*revenue|and premium payments|revenue.*(?:lower|losses)).*"+dollar_string[1:], re.IGNORECASE | re.DOTALL)
-                    strict_revenue_finder = re.compile(r"(?:(?:additional|increase|resul)[^\$]+(?:sav|revenue|collection|assessments)|(?:reduc|decrease)[^\$]+(?:cost|spend|outlay)|(?:cost|spend|outlay)[^\$]+(?:decrease|lower)|(?:offsetting|rais)[^\$]+(?:collect|receipts))[^\$]+"+r"\$"+dollar_string[1:], re.IGNORECASE | re.DOTALL)
-                    last_dollar, last_last_year, last_first_year = dollar, last_year, first_year
-                    first_year, last_year = None, None
-                    #print(dollar_string)
-                    digits = re.compile(r"\d+(?:,\d+)?(?:\.\d+)?").findall(dollar_string)[0].replace(',','').replace('\n',' ')
-                    dollar = float(digits)
-                    if bool(re.compile("billion").search(dollar_string)):
-                        dollar *= 1000000000
-                    elif bool(re.compile("million").search(dollar_string)):
-                        dollar *= 1000000
-                    #This if statement is complicated because in the paragraph
-                    #   referring to a cost or revenue, the cost-keyword or
-                    #   revenue-key word can come at the beginning of the sentence
-                    #   with multiple listed costs or revenues. But sometimes a
-                    #   cost-keyword and revenue-keyword occur in the same
-                    #   sentence so the most recent keyword must not be revenue-
-                    #   if we're looking for cost and vice-versa
-                    #if bool(re.compile(r"(?:cost|provides|(?:additional|increase|resul)[ a-z\-]*\n*[ a-z\-]*(?:spending|outlay)|discretion[ a-z\-]*\n*[ a-z\-]*spending|reduc[ a-z\-]*\n*[ a-z\-]*revenue|appropriat|authori|and premium payments|revenue[ a-z\-]*\n*[ a-z\-]losses).*"+dollar_string[1:], re.IGNORECASE | re.DOTALL).search(sentence)) and not bool(re.compile(r"(?:(?:additional|increase|resul)[ a-z\-]*\n*[ a-z\-]*(?:sav|revenue|collection|assessments)|(?:reduc|decrease)[ a-z\-]*\n*[ a-z\-]*(?:cost|spend|outlay)|(?:cost|spend|outlay)[ a-z\-]*\n*[ a-z\-]*decrease|(?:offsetting|rais)[ a-z\-]*\n*[ a-z\-]*(?:collect|receipts))[^\$]+"+r"\$"+dollar_string[1:], re.IGNORECASE | re.MULTILINE).search(sentence)):
-                    if bool(cost_keyword_finder.search(sentence)) and not bool(strict_revenue_finder.search(sentence)):
-                        #If the dollar_string is nested in parentheses, don't
-                        #   count it as a cost
-                        if bool(re.compile(r"\([^\)]*"+dollar_string[1:]).search(sentence)):
-                            #skip to next dollar_string
-                            continue
-                        cost += dollar
-                        found_cost = True
-                        #Sometimes there is an estimate that overlaps another
-                        #   estimate e.g. $X from 2000-2003 and $Y from 2000-2010
-                        #   so in this following code we remove $X from the total
-                        #   cost estimate
-                        try:
-                            first_year = int(re.compile(dollar_string[1:]+r"[^\$-]+?\d{4}").findall(re.compile(dollar_string[1:]+r"[^\$-]+?\d{4}[^\.]+?\d{4}").findall(sentence)[0])[0][-4:])
-                            #print(dollar_string, first_year)
-                        except:
-                            #No first year
-                            pass
-                        try:
-                            last_year = int(re.compile(dollar_string[1:]+r"[^\$]+(?:\d{4}-)?\d{4}").findall(sentence)[0][-4:])
-                            #print(dollar_string, last_year)
-                        except:
-                            #No last year
-                            pass
-                        if last_year is not None and last_last_year is not None:
-                            if first_year is not None and last_first_year is not None:
-                                if first_year <= last_first_year and last_year>=last_last_year:
-                                    cost -= last_dollar
-                            else:
-                                if last_last_year > year and last_year > last_last_year:
-                                    cost -= last_dollar
-                        #If cost or revenue is yearly, cumulate it according to the
-                        #   number of years that have occurred since the year after
-                        #   the passing of the bill (or as is specified in the text)
-                        if bool(re.compile(dollar_string[1:] + r".*?(?:each[ a-z]{1,25}year|a year|annually)").search(sentence)) or bool(re.compile(r"(?:each[ a-z]{1,25}year|annually)[^\$]+"+r"\$"+dollar_string[1:]).search(sentence)):
-                            if last_year is not None:
-                                end_year = last_year
-                            else:
-                                end_year = date.today().year
-                            if first_year is not None:
-                                begin_year = first_year
-                            else:
-                                begin_year = year+1
-                            #Add one to include the endpoints
-                            cost += (1+end_year - begin_year)*dollar - dollar
-################################################################################
-#Now for revenues                                                              #
-################################################################################
-            #for i, sentence in enumerate(sentences):
-                found_revenue = False
-                try:
-                    dollar_strings = re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?(?: billion| million)?", re.IGNORECASE).findall(sentence)
-                except:
-                    #print(bill_name, "couldn't find dollar string")
+                except Exception:
+                    missing_estimate(bill_name, "pdf_text")
                     continue
-                for dollar_string in dollar_strings:
-                    revenue_keyword_finder = re.compile(r"(?:(?:additional|increase|resul).*(?:sav|revenue|collection|assessments)|(?:reduc|decrease).*(?:cost|spend|outlay)|(?:cost|spend|outlay).*(?:decrease|lower)|(?:offsetting|rais).*(?:collect|receipts)).*"+dollar_string[1:], re.IGNORECASE | re.DOTALL)
-                    strict_cost_finder =  re.compile(r"(?:cost|provides|(?:additional|increase|resul)[^\$]+(?:spending|outlay)|discretion[^\$]+spending|(?:decrease|reduc)[^\$]+revenue|and premium payments|revenue[^\$]+(?:losses|lower))[^\$]+"+r"\$"+dollar_string[1:], re.IGNORECASE | re.DOTALL)
-                    last_dollar, last_last_year, last_first_year = dollar, last_year, first_year
-                    first_year, last_year = None, None
-                    digits = re.compile(r"\d+(?:,\d+)?(?:\.\d+)?").findall(dollar_string)[0].replace(',','').replace('\n',' ')
-                    dollar = float(digits)
-                    if bool(re.compile("billion").search(dollar_string)):
-                        dollar *= 1000000000
-                    elif bool(re.compile("million").search(dollar_string)):
-                        dollar *= 1000000
-                    #This if statement is complicated because in the paragraph
-                    #   referring to a cost or revenue, the cost-keyword or
-                    #   revenue-key word can come at the beginning of the sentence
-                    #   with multiple listed costs or revenues. But sometimes a
-                    #   cost-keyword and revenue-keyword occur in the same
-                    #   sentence so the most recent keyword must not be revenue-
-                    #   if we're looking for cost and vice-versa
-                    #if bool(re.compile(r"(?:(?:additional|increase|resul)[ a-z\-]*\n*[ a-z\-]*(?:revenue|collection|assessments)|sav|(?:reduc|decrease)[ a-z\-]*\n*[ a-z\-]*(?:cost|spend|outlay)|(?:cost|spend|outlay)[ a-z\-]*\n*[ a-z\-]*decrease|(?:offsetting|rais)[ a-z\-]*\n*[ a-z\-]*(?:collection|receipts)).*"+dollar_string[1:], re.IGNORECASE | re.DOTALL).search(sentence)) and not bool(re.compile(r"(?:cost|provides|(?:additional|increase|resul)[ a-z\-]*\n*[ a-z\-]*(?:spending|outlay)|reduc[ a-z\-]*\n*[ a-z\-]*revenue|appropriat|and premium payments)[^\$]+"+r"\$"+dollar_string[1:], re.IGNORECASE | re.MULTILINE).search(sentence)):
-                    if bool(revenue_keyword_finder.search(sentence)) and not bool(cost_keyword_finder.search(sentence)):
-                        #If the dollar_string is nested in parentheses, don't
-                        #   count it as a cost
-                        if bool(re.compile(r"\([^\)]*"+dollar_string[1:]).search(sentence)):
-                            #skip to next dollar_string
-                            continue
-                        revenue += dollar
-                        found_revenue = True
-                        #Sometimes there is an estimate that overlaps another
-                        #   estimate e.g. $X from 2000-2003 and $Y from 2000-2010
-                        #   so in this following code we remove $X from the total
-                        #   cost estimate
-                        try:
-                            first_year = int(re.compile(dollar_string[1:]+r"[^\$-]+?\d{4}").findall(re.compile(dollar_string[1:]+r"[^\$-]+?\d{4}[^\.]+?\d{4}").findall(sentence)[0])[0][-4:])
-                            #print(dollar_string, first_year)
-                        except:
-                            #No first year
-                            pass
-                        try:
-                            last_year = int(re.compile(dollar_string[1:]+r"[^\$]+(?:\d{4}-)?\d{4}").findall(sentence)[0][-4:])
-                            #print(dollar_string, last_year)
-                        except:
-                            #No last year
-                            pass
-                        if last_year is not None and last_last_year is not None and not found_cost:
-                            if first_year is not None and last_first_year is not None:
-                                if first_year <= last_first_year and last_year>=last_last_year:
-                                    revenue -= last_dollar
-                            else:
-                                if last_last_year > year and last_year > last_last_year:
-                                    revenue -= last_dollar
-                        #If cost or revenue is yearly, cumulate it according to the
-                        #   number of years that have occurred since the year after
-                        #   the passing of the bill (or as is specified in the text)
-                        if bool(re.compile(dollar_string[1:] + r".*?(?:each[ a-z]{1,25}year|a year|annually)").search(sentence)) or bool(re.compile(r"(?:each[ a-z]{1,25}year|annually)[^\$]+"+r"\$"+dollar_string[1:]).search(sentence)):
-                            if last_year is not None:
-                                end_year = last_year
-                            else:
-                                end_year = date.today().year
-                            if first_year is not None:
-                                begin_year = first_year
-                            else:
-                                begin_year = year+1
-                            #Add one to include the endpoints
-                            revenue += (1+end_year - begin_year)*dollar - dollar
-
-            print(bill_name, re.compile(r"\$\d+(?:,\d+)?(?:\.\d+)?(?: billion| million)?", re.IGNORECASE | re.DOTALL | re.MULTILINE).findall(summary))
-            if cost!=0 or revenue!=0:
-                count += 1
-                print(bill_name, "cost:", "{:,}".format(cost))
-                print(bill_name, "revenue:", "{:,}".format(revenue))
-
-                #if input("Were these costs and revenues correct? (Answer Yes or No)\nResponse: ") == "Yes":
-                #    successes.append(bill_name)
-                #else:
-                #    failures.append(bill_name)
-
-
-
-            important_bills.append(bill_name)
-            #costs.append(cost)
-            #revenues.append(revenue)
-            if cost < 0:
-                cost = 0
-            if revenue < 0:
-                revenue = 0
-            bill_costs[bill_name]= revenue - cost
+                if bool(DOLLAR_FINDER.search(summary)):
+                    from_pdf.append(bill_name)
+
+            #Find the costs and revenues in the summary
+            current_year = date.today().year
+            with METRICS.timer("regex"):
+                estimate = parse_cbo_summary(summary, year, current_year)
+            if store is not None:
+                store.record(bill_name, summary, "from_summary" if from_web_page else "from_pdf", year, current_year, estimate, entry["url"])
+            log.debug("%s: %s", bill_name, SAME_LINE_DOLLAR_FINDER.findall(summary))
+            if estimate["cost"] != 0 or estimate["revenue"] != 0:
+                METRICS.count("bills_nonzero")
+                log.debug("%s cost: %s revenue: %s", bill_name, "{:,}".format(estimate["cost"]),
+                          "{:,}".format(estimate["revenue"]))
+            #Negative costs and revenues count as zero
+            bill_costs[bill_name] = net_cost(estimate)
     finally:
-        browser.close()
-    print("count:", count)
-    running_time = time.time()-start_time
-    print("Time to run:", int(running_time//60), "minutes and", int(running_time%60), "seconds")
+        backend.close()
+    for outcome, bills in (("estimated", bill_costs), ("no_report", no_report), ("from_summary", from_summary),
+                           ("from_pdf", from_pdf), ("no_estimate", no_estimate)):
+        METRICS.count("bills_" + outcome, len(bills))
+    log.info("%d of %d bills estimated in %d seconds", len(bill_costs), len(bill_names), time.time() - start_time)
     return bill_costs, no_report, from_summary, from_pdf, no_estimate
 
-def assign_scores(Representatives, Senators, scores):
-    for Sen in Senators.keys():
-        Senators[Sen]["score"] = 0
-    for Rep in Representatives.keys():
-        Representatives[Rep]["score"] = 0
-    for bill in scores.keys():
-        for Rep in Representatives.keys():
-            if bill in Representatives[Rep]["Yeas"]:
-                Representatives[Rep]["score"] += scores[bill]
-        for Sen in Senators.keys():
-            if bill in Senators[Sen]["Yeas"]:
-                Senators[Sen]["score"] += scores[bill]
-
-def create_csv(Representatives, Senators):
-    names = list(Representatives.keys()) + list(Senators.keys())
-    positions = [Representatives[Rep]["Position"] for Rep in Representatives.keys()] + [Senators[Sen]["Position"] for Sen in Senators.keys()]
-    parties = [Representatives[Rep]["Party"] for Rep in Representatives.keys()] + [Senators[Sen]["Party"] for Sen in Senators.keys()]
-    states = [Representatives[Rep]["State"] for Rep in Representatives.keys()] + [Senators[Sen]["State"] for Sen in Senators.keys()]
-    tenures = [len(Representatives[Rep]["Sessions"]) for Rep in Representatives.keys()] + [len(Senators[Sen]["Sessions"]) for Sen in Senators.keys()]
-    scores = [Representatives[Rep]["score"] for Rep in Representatives.keys()] + [Senators[Sen]["score"] for Sen in Senators.keys()]
-    births = [Representatives[Rep]["Birth"] for Rep in Representatives.keys()] + [Senators[Sen]["Birth"] for Sen in Senators.keys()]
-    df = pd.DataFrame({"Name":pd.Series(names), "Position":pd.Series(positions), "Party":pd.Series(parties), "State":pd.Series(states), "Tenure":pd.Series(tenures), "Score":pd.Series(scores), "YOB":pd.Series(births)})
-    df.to_csv("scores_data.csv", index=False)
-
-def random_bills(n=10, sessions=[i for i in range(105,116)]):
-    bill_names = get_bill_names(sessions)
+def _cost_estimates_worker(bill_names, directory, ttl, offline, rates, default_rate, index_sessions, stage,
+                           profiling=False):
+    """Run get_cost_estimates in a worker process of parallel_cost_estimates,
+    with its own download session and copy of the CBO index. Returns the
+    estimates, the worker's metrics, the summaries it parsed and its cProfile
+    stats if the run is profiled."""
+    METRICS.reset()
+    METRICS.set_stage(stage)
+    PROFILES.reset()
+    PROFILES.enabled = profiling
+    cache = PageCache(directory, ttl, offline, PoliteSession(rates, default_rate))
+    store = CboStore()
+    with PROFILES.thread():
+        estimates = get_cost_estimates(bill_names, cache, index=CboIndex(cache, sessions=index_sessions), store=store)
+    return estimates, METRICS.to_dict(), store.records, PROFILES.to_dict()
+
+def parallel_cost_estimates(bill_names, cache=None, workers=None, index=None, store=None):
+    """Same as get_cost_estimates, but the bills are split between several
+    processes
+
+    Each process loads its own estimate pages and parses its own pdfs,
+    sharing the page cache on disk. The polite rate of each website is split
+    between the processes, so cbo.gov gets no more requests per second than
+    from one process; the page loads and parsing overlap instead.
+
+    Parameters:
+        bill_names (list): list of bill names including the session in which
+            the bill was passed
+        cache (PageCache): the page cache the processes share
+        workers (int): how many processes to use, one per CPU by default
+        index (CboIndex): every estimate on cbo.gov by bill. The sessions of
+            the bills are crawled before the processes start.
+        store (CboStore): where to keep the summaries the processes parse
+
+    Returns:
+        (tuple): what get_cost_estimates returns, with every list and the
+                 dictionary in the same order as bill_names
+    """
+    if cache is None:
+        cache = PageCache()
+    if index is None:
+        index = CboIndex(cache)
+    bill_names = list(bill_names)
+    workers = min(workers or os.cpu_count() or 1, len(bill_names))
+    if workers <= 1:
+        return get_cost_estimates(bill_names, cache, index=index, store=store)
+    sessions = {bill_key(name)[1] for name in bill_names}
+    index_sessions = {session:index.session(session) for session in sessions}
+    rates = {host:rate/workers for host, rate in cache.session.rates.items()}
+    default_rate = cache.session.default_rate/workers
+    #Every worker gets every n-th bill so each gets a similar mix of sessions.
+    #   The House and Senate stages may be running in other threads, so the
+    #   processes are started fresh instead of forked.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(_cost_estimates_worker, bill_names[i::workers], cache.directory,
+                                   cache.ttl, cache.offline, rates, default_rate, index_sessions,
+                                   METRICS.current_stage(), PROFILES.enabled)
+                   for i in range(workers)]
+        estimates = list()
+        for future in futures:
+            worker_estimates, worker_metrics, worker_records, worker_profile = future.result()
+            estimates.append(worker_estimates)
+            METRICS.merge(worker_metrics)
+            if worker_profile:
+                PROFILES.add(worker_profile)
+            if store is not None:
+                store.update(worker_records)
+    #Put the bills back in the order they were given, as one process would
+    order = {name:i for i, name in enumerate(bill_names)}
+    bill_costs, no_report, from_summary, from_pdf, no_estimate = merge_estimates(estimates)
+    return ({name:bill_costs[name] for name in sorted(bill_costs, key=order.get)},
+            sorted(no_report, key=order.get), sorted(from_summary, key=order.get),
+            sorted(from_pdf, key=order.get), sorted(no_estimate, key=order.get))
+
+def assign_scores(Representatives, Senators, scores, house_votes, senate_votes, weights=YEAS_ONLY, per_session=False):
+    """Give every member of Congress a Fiscal Responsibility Score, the sum of
+    the net cost estimates of the bills they voted for
+
+    Parameters:
+        Representatives (dict): dictionary of Representatives
+        Senators (dict): dictionary of Senators
+        scores (dict): net cost estimate of each bill from get_cost_estimates
+        house_votes (VoteStore): from get_representative_voting_records
+        senate_votes (VoteStore): from get_senator_voting_records
+        weights (dict): how much each vote type counts (see scoring.py)
+        per_session (bool): divide each score by the member's tenure
+
+    This function returns nothing because it modifies the dictionaries it receives
+    """
+    #The chambers are scored separately because a member who served in both
+    #   has the same key in both dictionaries
+    for members, votes in ((Representatives, house_votes), (Senators, senate_votes)):
+        vote_matrix = VoteMatrix.from_store(members, votes, scores.keys())
+        member_scores = vote_matrix.score(scores, weights, per_session)
+        for key, score in zip(vote_matrix.members, member_scores):
+            members[key]["score"] = score
+
+def create_csv(Representatives, Senators, path="scores_data.csv", parquet_path="scores_data.parquet"):
+    """Write every member's score to scores_data.csv, and to a Parquet file
+    with their bioguide id, region and division if pyarrow is installed
+
+    Parameters:
+        Representatives (dict): dictionary of Representatives with scores
+        Senators (dict): dictionary of Senators with scores
+        path (str): the csv to write
+        parquet_path (str): the Parquet file to write, or None
+    """
+    df = scores_frame(Representatives, Senators)
+    write_scores(df, path)
+    if parquet_path is not None and have_pyarrow():
+        write_scores(df, parquet_path)
+
+def random_bills(n=10, sessions=[i for i in range(105,116)], cache=None, catalogue=None):
+    bill_names = get_bill_names(sessions, cache, catalogue)
     bill_names = np.array(bill_names[0] + bill_names[1])
     random_mask = np.random.randint(0, len(bill_names), n)
     return [name for name in bill_names[random_mask]]
 
 
-def test_run(n=50, sessions=[i for i in range(105,116)]):
-    Representatives, Senators = quick_members_of_congress(sessions)
-    bill_names = random_bills(n, sessions)
-    get_representative_voting_records(Representatives, sessions)
-    get_senator_voting_records(Senators, sessions)
-    scores = get_cost_estimates(bill_names)
-    assign_scores(Representatives, Senators, scores)
+def test_run(n=50, sessions=[i for i in range(105,116)], cache=None):
+    if cache is None:
+        cache = PageCache()
+    catalogue = BillCatalogue(cache)
+    Representatives, Senators = quick_members_of_congress(sessions, cache)
+    bill_names = random_bills(n, sessions, cache, catalogue)
+    house_votes = get_representative_voting_records(Representatives, sessions, cache, catalogue)
+    senate_votes = get_senator_voting_records(Senators, sessions, cache, catalogue)
+    scores = get_cost_estimates(bill_names, cache)[0]
+    assign_scores(Representatives, Senators, scores, house_votes, senate_votes)
     return Representatives, Senators, scores
 
+def checkpointed_members(sessions, checkpoints, cache=None, roster=None):
+    """Same as quick_members_of_congress, but each session's members are saved
+    as they're found and reused after that, so adding a session only searches
+    the bioguide for that session"""
+    chambers = [checkpoints.run("members-" + str(session), {"session":session},
+                                lambda: quick_members_of_congress([session], cache, roster))
+                for session in sessions]
+    return merge_members(chambers)
+
+def checkpointed_voting_records(chamber, get_voting_records, members, sessions, checkpoints, cache=None, catalogue=None, backend=None):
+    """Find the voting records of one chamber a session at a time, saving each
+    session as it finishes and reusing the sessions that were already saved
+
+    Parameters:
+        chamber (str): "house" or "senate", used to name the checkpoints
+        get_voting_records (function): get_representative_voting_records or
+            get_senator_voting_records
+        members (dict): Representatives or Senators
+        sessions (list): sessions of Congress to find voting records for
+        checkpoints (Checkpoints): where each session's votes are saved
+        cache (PageCache): where to save and reuse the pages
+        catalogue (BillCatalogue): bills signed into law during each session
+        backend (HttpBackend): how to load the pages of the sessions that have
+            to be redone
+
+    Returns:
+        (VoteStore): the chamber's votes in every session
+    """
+    session_votes = list()
+    for session in sessions:
+        #A session's votes only depend on its bills and on who served in it
+        inputs = {"session":session, "bills":catalogue.all_bills([session]),
+                  "members":sorted(key for key, member in members.items() if session in member["Sessions"])}
+        columns = checkpoints.run(chamber + "-votes-" + str(session), inputs,
+                                  lambda: get_voting_records(members, [session], cache, catalogue, backend).to_dict())
+        session_votes.append(VoteStore.from_dict(columns))
+    return VoteStore.concat(session_votes)
+
+def checkpointed_cost_estimates(sessions, checkpoints, cache=None, catalogue=None, workers=1, index=None, store=None):
+    """Same as get_cost_estimates for all the bills of the given sessions, but
+    each session's estimates are saved as they finish and reused after that.
+    When a session gets new bills, only the new bills are looked up. With
+    more than one worker the bills are split between processes (see
+    parallel_cost_estimates)."""
+    if index is None:
+        index = CboIndex(cache)
+    estimates = list()
+    for session in sessions[::-1]:
+        bill_names = catalogue.all_bills([session])
+        def estimate(previous):
+            if previous is None:
+                return parallel_cost_estimates(bill_names, cache, workers, index, store)
+            new_bills = [name for name in bill_names if name not in estimated_bills(previous)]
+            if not new_bills:
+                return previous
+            return merge_estimates([previous, parallel_cost_estimates(new_bills, cache, workers, index, store)])
+        estimates.append(checkpoints.update("cbo-" + str(session), {"bills":bill_names}, estimate))
+    estimates = merge_estimates(estimates)
+    if store is not None:
+        fill_cbo_store(estimates[0], store, cache, workers, index)
+    return estimates
+
+def fill_cbo_store(bill_costs, store, cache=None, workers=1, index=None):
+    """Record the summaries of estimated bills that aren't in the store, e.g.
+    bills restored from cbo-<session> checkpoints saved before there was a
+    store, so reparse and diff cover every bill that was scored
+
+    The bills are parsed again from the page cache; the estimates in the
+    checkpoints are kept as they are. Bills that still can't be recorded,
+    e.g. because their pages aren't cached offline, are logged and counted
+    as "bills_missing_from_store".
+
+    Parameters:
+        bill_costs (dict): each estimated bill name with its net cost estimate
+        store (CboStore): the store to fill in
+        cache (PageCache): where the estimate pages and pdfs were saved
+        workers (int): processes to parse with
+        index (CboIndex): every estimate on cbo.gov by bill
+
+    Returns:
+        (list): the estimated bills that are still missing from the store
+    """
+    missing = [bill_name for bill_name in bill_costs if bill_name not in store]
+    if missing:
+        #Counted in a stage of their own so the CBO stage's bill counts
+        #   aren't doubled
+        with METRICS.stage("CBO store"):
+            parallel_cost_estimates(missing, cache, workers, index, store)
+        missing = [bill_name for bill_name in missing if bill_name not in store]
+    if missing:
+        log.warning("%d estimated bills are missing from the CBO store: %s", len(missing), ', '.join(missing))
+    METRICS.count("bills_missing_from_store", len(missing))
+    return missing
+
+def run_pipeline(sessions=[i for i in range(105,116)], directory="checkpoints", cache=None, workers=1, bulk=False):
+    """Find the members, their voting records and the cost estimates of the
+    bills, score the members and write scores_data.csv
+
+    Every stage is saved to disk as it finishes (one session at a time), so a
+    run that crashes picks up where it left off. Stages whose inputs didn't
+    change are read back instead of run again.
+
+    Parameters:
+        sessions (list): sessions of Congress to score
+        directory (str): where the checkpoints are saved
+        cache (PageCache): where to save and reuse the pages
+        workers (int): processes to look up the cost estimates with
+        bulk (bool): load the members from the congress-legislators bulk
+            data instead of searching the bioguide for every session. Off by
+            default, since members only found in it get other names than
+            the search gives them (see load_roster).
+
+    Returns:
+        (dict): Representatives with voting records and scores
+        (dict): Senators with voting records and scores
+        (tuple): what get_cost_estimates returns for all the bills
+    """
+    sessions = list(sessions)
+    #Every stage shares one cache so a rerun replays pages from disk
+    if cache is None:
+        cache = PageCache()
+    checkpoints = Checkpoints(directory)
+    #The public laws for each session are looked up once and saved for next time
+    catalogue = BillCatalogue(cache, "bill_catalogue.json")
+    #So is the listing of each session's cost estimates on cbo.gov
+    index = CboIndex(cache, "cbo_index.json")
+    #The summaries are kept so the costs can be parsed again (see cbo_store.py)
+    store = CboStore("cbo_store.json.gz")
+    #Every member of every session is loaded in one pass and saved for next time
+    roster = load_roster(sessions, cache, "roster.json", bulk)
+    Representatives, Senators = checkpointed_members(sessions, checkpoints, cache, roster)
+    catalogue.bill_names(sessions)
+    catalogue.save()
+    #clerk.house.gov, senate.gov and cbo.gov are crawled at the same time, each
+    #   at its own polite rate
+    results = run_stages({
+        "House":lambda: checkpointed_voting_records("house", get_representative_voting_records, Representatives, sessions, checkpoints, cache, catalogue),
+        "Senate":lambda: checkpointed_voting_records("senate", get_senator_voting_records, Senators, sessions, checkpoints, cache, catalogue),
+        "CBO":lambda: checkpointed_cost_estimates(sessions, checkpoints, cache, catalogue, workers, index, store)})
+    index.save()
+    store.save()
+    assign_scores(Representatives, Senators, results["CBO"][0], results["House"], results["Senate"])
+    create_csv(Representatives, Senators)
+    write_votes(results["House"], results["Senate"], results["CBO"][0])
+    checkpoints.report()
+    return Representatives, Senators, results["CBO"]
+
+def update_csv(Representatives, Senators, affected, path="scores_data.csv", parquet_path="scores_data.parquet"):
+    """Rewrite only the rows of scores_data.csv (and the Parquet file) for the
+    given members, adding rows for members who aren't in it yet
+
+    Parameters:
+        Representatives (dict): dictionary of Representatives with scores
+        Senators (dict): dictionary of Senators with scores
+        affected (set): (name, position) of the members to update, e.g.
+            ("Doe, John", "Rep")
+        path (str): the csv written by create_csv
+        parquet_path (str): the Parquet file written by create_csv, or None
+    """
+    upsert_scores(scores_frame(Representatives, Senators, affected=affected), path)
+    if parquet_path is not None and have_pyarrow():
+        if os.path.exists(parquet_path):
+            upsert_scores(scores_frame(Representatives, Senators, affected=affected), parquet_path)
+        else:
+            write_scores(scores_frame(Representatives, Senators), parquet_path)
+
+def update_pipeline(sessions=[i for i in range(105,116)], directory="checkpoints", cache=None, ttl=60*60, path="scores_data.csv", workers=1, bulk=False):
+    """Bring a finished run up to date with new public laws, roll calls and
+    sessions without redoing the rest
+
+    The public law list of every session is checked for new bills. Only
+    sessions that are new or got new bills have their roll calls looked up
+    again (asking the websites whether saved pages older than ttl changed),
+    only the new bills are looked up on cbo.gov, and only the members who
+    voted on a new bill or served in a new session get a new row in the csv.
+
+    Parameters:
+        sessions (list): sessions of Congress to score, including any new ones
+        directory (str): where the checkpoints of the last run are saved
+        cache (PageCache): where to save and reuse the pages
+        ttl (float): ask again for saved pages older than this many seconds
+            when a session has to be redone
+        path (str): the csv to update
+        workers (int): processes to look up the cost estimates with
+        bulk (bool): load the members from the congress-legislators bulk
+            data instead of searching the bioguide for every session. Off by
+            default, since members only found in it get other names than
+            the search gives them (see load_roster).
+
+    Returns:
+        (dict): Representatives with voting records and scores
+        (dict): Senators with voting records and scores
+        (tuple): what get_cost_estimates returns for all the bills
+    """
+    sessions = list(sessions)
+    if cache is None:
+        cache = PageCache()
+    if not os.path.exists(path):
+        return run_pipeline(sessions, directory, cache, workers, bulk)
+    checkpoints = Checkpoints(directory)
+    catalogue = BillCatalogue(cache, "bill_catalogue.json")
+    new_sessions = [session for session in sessions if session not in catalogue.sessions]
+    new_bills = set()
+    for session in sessions:
+        new_bills.update(catalogue.refresh(session, ttl))
+    catalogue.save()
+    print("New sessions:", new_sessions, "New bills:", len(new_bills))
+    #New bills may have new cost estimates, so their sessions' listings are
+    #   crawled again
+    index = CboIndex(cache, "cbo_index.json")
+    store = CboStore("cbo_store.json.gz")
+    for session in sorted({bill_key(name)[1] for name in new_bills}):
+        index.refresh(session, ttl)
+    roster = load_roster(sessions, cache, "roster.json", bulk)
+    Representatives, Senators = checkpointed_members(sessions, checkpoints, cache, roster)
+    #Pages of the sessions that are redone are checked for new roll calls
+    backend = HttpBackend(cache, ttl)
+    results = run_stages({
+        "House":lambda: checkpointed_voting_records("house", get_representative_voting_records, Representatives, sessions, checkpoints, cache, catalogue, backend),
+        "Senate":lambda: checkpointed_voting_records("senate", get_senator_voting_records, Senators, sessions, checkpoints, cache, catalogue, backend),
+        "CBO":lambda: checkpointed_cost_estimates(sessions, checkpoints, cache, catalogue, workers, index, store)})
+    index.save()
+    store.save()
+    #Scoring every member takes seconds, but only the affected rows change
+    assign_scores(Representatives, Senators, results["CBO"][0], results["House"], results["Senate"])
+    affected = set()
+    for members, votes in ((Representatives, results["House"]), (Senators, results["Senate"])):
+        voted = votes.members_voting_on(new_bills)
+        for name, member in members.items():
+            if name in voted or set(member["Sessions"]) & set(new_sessions):
+                affected.add((name, member["Position"]))
+    update_csv(Representatives, Senators, affected, path)
+    write_votes(results["House"], results["Senate"], results["CBO"][0])
+    print("Updated", len(affected), "members")
+    checkpoints.report()
+    return Representatives, Senators, results["CBO"]
+
+def reparse_pipeline(sessions=[i for i in range(105,116)], directory="checkpoints", workers=None, store=None, estimates=None):
+    """Score the members again with the stored CBO summaries parsed again,
+    e.g. after the regexes in cbo_parser.py change, without crawling anything
+
+    The new net costs replace the old ones in the store, in the cbo-<session>
+    checkpoints (so the next run doesn't restore the old ones) and in
+    bill_costs.json, and scores_data.csv is written again from the members and
+    votes saved by the last run.
+
+    Parameters:
+        sessions (list): sessions of Congress the last run scored
+        directory (str): where the checkpoints of the last run are saved
+        workers (int): processes to parse with, one per CPU by default
+        store (CboStore): the summaries, cbo_store.json.gz by default
+        estimates (dict): what cbo_store.reparse returned, if the summaries
+            were already parsed again
+
+    Returns:
+        (dict): Representatives with voting records and scores
+        (dict): Senators with voting records and scores
+        (tuple): what get_cost_estimates returns for all the bills
+
+    Raises:
+        KeyError: if the last run didn't finish a stage of one of the sessions
+    """
+    sessions = list(sessions)
+    checkpoints = Checkpoints(directory)
+    if store is None:
+        store = CboStore("cbo_store.json.gz")
+    if estimates is None:
+        estimates = reparse(store, workers=workers)
+    apply(store, estimates)
+    store.save()
+    def previous(name):
+        output = checkpoints.previous(name)
+        if output is None:
+            raise KeyError(name)
+        return output
+    #Only the net costs change; the bills without an estimate stay as they are
+    session_estimates = list()
+    for session in sessions[::-1]:
+        bill_costs, no_report, from_summary, from_pdf, no_estimate = previous("cbo-" + str(session))
+        bill_costs = {bill_name:estimates[bill_name]["net"] if bill_name in estimates else cost
+                      for bill_name, cost in bill_costs.items()}
+        output = [bill_costs, no_report, from_summary, from_pdf, no_estimate]
+        checkpoints.replace("cbo-" + str(session), output)
+        session_estimates.append(output)
+    cbo = merge_estimates(session_estimates)
+    Representatives, Senators = merge_members([previous("members-" + str(session)) for session in sessions])
+    house, senate = [VoteStore.concat([VoteStore.from_dict(previous(chamber + "-votes-" + str(session)))
+                                       for session in sessions])
+                     for chamber in ("house", "senate")]
+    assign_scores(Representatives, Senators, cbo[0], house, senate)
+    create_csv(Representatives, Senators)
+    write_votes(house, senate, cbo[0])
+    log.info("Rescored %d members with %d reparsed bills", len(Representatives) + len(Senators), len(estimates))
+    return Representatives, Senators, cbo
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score members of Congress by the cost of the bills they vote for")
+    parser.add_argument("--update", action="store_true",
+                        help="only add new public laws, roll calls and sessions to the last run")
+    parser.add_argument("--reparse-only", action="store_true",
+                        help="parse the CBO summaries saved by the last run again and rescore it, without crawling")
+    parser.add_argument("--sessions", type=int, nargs=2, default=[105, 115], metavar=("FIRST", "LAST"),
+                        help="sessions of Congress to score (default: 105 115)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes to look up (or reparse) the CBO cost estimates with (default: 1)")
+    parser.add_argument("--bulk-members", action="store_true",
+                        help="load the members from the congress-legislators bulk data instead of searching the bioguide "
+                             "for every session; members who were never searched for get their full middle names")
+    parser.add_argument("--metrics", default="metrics.json", metavar="PATH",
+                        help="where to save the timings and counts of the run, .json or .csv (default: metrics.json)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="run under cProfile, with every stage thread and CBO process, and save the stats to PATH")
+    parser.add_argument("--verbose", action="store_true",
+                        help="show what was found for every bill")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    sessions = list(range(args.sessions[0], args.sessions[1]+1))
     start_time = time.time()
-    Representatives, Senators = quick_members_of_congress()
-    bill_names = get_bill_names()
-    bill_names = bill_names[0] + bill_names[1]
-    get_representative_voting_records(Representatives)
-    get_senator_voting_records(Senators)
-    scores, no_report, from_summary, from_pdf, no_estimate = get_cost_estimates(bill_names)
-    assign_scores(Representatives, Senators, scores)
-    create_csv(Representatives, Senators)
+    with profile(args.profile) if args.profile else contextlib.nullcontext():
+        if args.reparse_only:
+            Representatives, Senators, estimates = reparse_pipeline(sessions, workers=args.workers)
+        elif args.update:
+            Representatives, Senators, estimates = update_pipeline(sessions, workers=args.workers, bulk=args.bulk_members)
+        else:
+            Representatives, Senators, estimates = run_pipeline(sessions, workers=args.workers, bulk=args.bulk_members)
+    scores, no_report, from_summary, from_pdf, no_estimate = estimates
+    #Where every bill's estimate came from, including the resumed sessions
+    for outcome, bills in (("estimated", scores), ("no_report", no_report), ("from_summary", from_summary),
+                           ("from_pdf", from_pdf), ("no_estimate", no_estimate)):
+        METRICS.count("bills_" + outcome, len(bills), stage="total")
+    METRICS.report()
+    METRICS.save(args.metrics)
     running_time = time.time()-start_time
     print("Time to run:", int(running_time//(60*60)), "hours and", int(running_time%(60*60)//60), "minutes")